@@ -1,6 +1,6 @@
 import tkinter as tk
 from tkinter import messagebox
-import random
+from room_layout import DEFAULT_ADJACENCY, DEFAULT_BOUNDARY, generate_layouts, parse_pairs
 import matplotlib.pyplot as plt
 import matplotlib.patches as patches
 import os
@@ -12,6 +12,7 @@ class FlatDesignerApp:
         
         self.room_names = ["Bedroom", "Living Room", "Kitchen", "Bathroom", "Toilet", "Balcony"]
         self.entries = []
+        self.flat_size = (20, 15)
 
         self.create_input_fields()
         self.create_generate_button()
@@ -29,9 +30,29 @@ class FlatDesignerApp:
 
             self.entries.append((area_entry, min_dim_entry))
 
+        # Flat outline and layout rules
+        row = len(self.room_names)
+        tk.Label(self.root, text="Flat Width and Height (m):").grid(row=row, column=0, padx=10, pady=5)
+        self.flat_width_entry = tk.Entry(self.root)
+        self.flat_width_entry.insert(0, str(self.flat_size[0]))
+        self.flat_width_entry.grid(row=row, column=1, padx=10, pady=5)
+        self.flat_height_entry = tk.Entry(self.root)
+        self.flat_height_entry.insert(0, str(self.flat_size[1]))
+        self.flat_height_entry.grid(row=row, column=2, padx=10, pady=5)
+
+        tk.Label(self.root, text="Adjacent rooms (A-B, C-D):").grid(row=row + 1, column=0, padx=10, pady=5)
+        self.adjacency_entry = tk.Entry(self.root, width=45)
+        self.adjacency_entry.insert(0, ", ".join(f"{a}-{b}" for a, b in DEFAULT_ADJACENCY))
+        self.adjacency_entry.grid(row=row + 1, column=1, columnspan=2, padx=10, pady=5, sticky="we")
+
+        tk.Label(self.root, text="Rooms on the outer edge:").grid(row=row + 2, column=0, padx=10, pady=5)
+        self.boundary_entry = tk.Entry(self.root, width=45)
+        self.boundary_entry.insert(0, ", ".join(DEFAULT_BOUNDARY))
+        self.boundary_entry.grid(row=row + 2, column=1, columnspan=2, padx=10, pady=5, sticky="we")
+
     def create_generate_button(self):
         generate_button = tk.Button(self.root, text="Generate PDF Designs", command=self.generate_designs)
-        generate_button.grid(row=len(self.room_names), column=0, columnspan=3, pady=20)
+        generate_button.grid(row=len(self.room_names) + 3, column=0, columnspan=3, pady=20)
 
     def generate_designs(self):
         room_data = {}
@@ -40,49 +61,28 @@ class FlatDesignerApp:
                 area = float(area_entry.get())
                 min_dim = float(min_dim_entry.get())
                 room_data[room] = (area, min_dim)
-
-            options = self.generate_design_options(room_data)
-            self.display_options(options)
+            self.flat_size = (float(self.flat_width_entry.get()), float(self.flat_height_entry.get()))
         except ValueError:
             messagebox.showerror("Input Error", "Please enter valid numeric values for area and dimensions.")
+            return
 
-    def generate_design_options(self, room_data):
-        options = []
-        flat_width = 20  # Arbitrary flat width in meters
-        flat_height = 15  # Arbitrary flat height in meters
-
-        for _ in range(3):  # Generate 3 options
-            design = {}
-            available_spaces = [(0, 0, flat_width, flat_height)]
-
-            for room_name, (area, min_dim) in room_data.items():
-                max_dim = area / min_dim
-                room_width = min_dim
-                room_height = max_dim
-
-                # Randomly pick a space and place the room
-                for _ in range(100):  # Attempt 100 times to place the room
-                    space = random.choice(available_spaces)
-                    x1, y1, x2, y2 = space
-
-                    if x2 - x1 >= room_width and y2 - y1 >= room_height:
-                        # Place the room in this space
-                        x_offset = x1
-                        y_offset = y1
-
-                        design[room_name] = (x_offset, y_offset, room_width, room_height)
-                        available_spaces.remove(space)
-
-                        # Update available spaces
-                        available_spaces.append((x_offset + room_width, y_offset, x2, y2))
-                        available_spaces.append((x1, y_offset + room_height, x2, y2))
-                        break
-                else:
-                    # If unable to place room after multiple attempts, skip
-                    continue
-
-            options.append(design)
+        try:
+            self.adjacency = parse_pairs(self.adjacency_entry.get())
+            self.boundary = [name.strip() for name in self.boundary_entry.get().split(",") if name.strip()]
+            options = self.generate_design_options(room_data)
+        except ValueError as e:
+            messagebox.showerror("Layout Error", str(e))
+            return
+        if not options:
+            messagebox.showerror("Layout Error", "No layout satisfies the room sizes and rules in this flat.")
+            return
+        self.display_options(options)
 
+    def generate_design_options(self, room_data):
+        # Three distinct layouts that place every room and satisfy the rules
+        flat_width, flat_height = self.flat_size
+        options = generate_layouts(room_data, flat_width, flat_height, count=3,
+                                   adjacency=self.adjacency, boundary=self.boundary)
         return options
 
     def display_options(self, options):
@@ -92,10 +92,11 @@ class FlatDesignerApp:
 
         for i, option in enumerate(options):
             ax = axs[i]
-            ax.set_xlim(0, 20)
-            ax.set_ylim(0, 15)
+            ax.set_xlim(0, self.flat_size[0])
+            ax.set_ylim(0, self.flat_size[1])
             ax.set_aspect('equal')
             ax.set_title(f"Option {i + 1}")
+            ax.add_patch(patches.Rectangle((0, 0), *self.flat_size, linewidth=2, edgecolor='black', facecolor='none'))
             
             for room_name, (x, y, w, h) in option.items():
                 rect = patches.Rectangle((x, y), w, h, linewidth=1, edgecolor='r', facecolor='none')
@@ -110,13 +111,13 @@ class FlatDesignerApp:
         plt.show()
 
         save_button = tk.Button(self.root, text="Save as PDF", command=lambda: self.save_as_pdf(options))
-        save_button.grid(row=len(self.room_names) + 1, column=0, columnspan=3, pady=20)
+        save_button.grid(row=len(self.room_names) + 4, column=0, columnspan=3, pady=20)
 
         plt.tight_layout()
         plt.show()
 
         save_button = tk.Button(self.root, text="Save as PDF", command=lambda: self.save_as_pdf(options))
-        save_button.grid(row=len(self.room_names) + 1, column=0, columnspan=3, pady=20)
+        save_button.grid(row=len(self.room_names) + 4, column=0, columnspan=3, pady=20)
 
     def save_as_pdf(self, options):
         save_dir = "pdf_designs"  # Directory to save PDF files
@@ -124,10 +125,11 @@ class FlatDesignerApp:
 
         for i, option in enumerate(options):
             fig, ax = plt.subplots(figsize=(10, 7))
-            ax.set_xlim(0, 20)
-            ax.set_ylim(0, 15)
+            ax.set_xlim(0, self.flat_size[0])
+            ax.set_ylim(0, self.flat_size[1])
             ax.set_aspect('equal')
             ax.set_title(f"Design Option {i + 1}")
+            ax.add_patch(patches.Rectangle((0, 0), *self.flat_size, linewidth=2, edgecolor='black', facecolor='none'))
 
             for room_name, (x, y, w, h) in option.items():
                 rect = patches.Rectangle((x, y), w, h, linewidth=1, edgecolor='r', facecolor='none')
@@ -0,0 +1,154 @@
+"""Precomputed design space of rectangular tanks.
+
+A dense (volume, depth, aspect ratio) grid is evaluated once with NumPy:
+plan length and width, footprint, wall surface area (as shown in the
+design details, 2 (L + W) D) and the largest plan dimension. Slider
+queries are then answered by trilinear interpolation between the eight
+surrounding grid points, found by bisecting the axes, so a query costs
+microseconds whatever the grid size.
+
+The Pareto frontier of a volume slice holds the (depth, ratio) designs
+not beaten on all of footprint, surface area and largest plan dimension
+by another design of the same volume. Frontiers are extracted on first
+use with a sort and a 2-D staircase sweep, then cached.
+"""
+import argparse
+import time
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+
+import numpy as np
+
+DEFAULT_VOLUMES = (1.0, 5000.0, 400)  # geometric spacing
+DEFAULT_DEPTHS = (0.5, 8.0, 151)
+DEFAULT_RATIOS = (1.0, 5.0, 41)
+METRICS = ("length", "width", "footprint", "surface_area", "max_dimension")
+
+
+class DesignSpace:
+    """Metrics of every (volume, depth, ratio) grid point"""
+
+    def __init__(self, volumes=None, depths=None, ratios=None):
+        self.volumes = np.geomspace(*DEFAULT_VOLUMES) if volumes is None else np.asarray(volumes, dtype=float)
+        self.depths = np.linspace(*DEFAULT_DEPTHS) if depths is None else np.asarray(depths, dtype=float)
+        self.ratios = np.linspace(*DEFAULT_RATIOS) if ratios is None else np.asarray(ratios, dtype=float)
+        # Plain lists for fast bisect in queries
+        self._axes = (self.volumes.tolist(), self.depths.tolist(), self.ratios.tolist())
+
+        area = (self.volumes[:, None] / self.depths[None, :])[:, :, None]
+        ratio = self.ratios[None, None, :]
+        length = np.sqrt(area * ratio)
+        width = area / length
+        self.metrics = {
+            "length": length.astype(np.float32),
+            "width": width.astype(np.float32),
+            "footprint": np.broadcast_to(area, length.shape).astype(np.float32),
+            "surface_area": (2 * (length + width) * self.depths[None, :, None]).astype(np.float32),
+            "max_dimension": np.maximum(length, width).astype(np.float32),
+        }
+        self.frontier = lru_cache(maxsize=len(self.volumes))(self._frontier)
+
+    @property
+    def size(self):
+        return len(self.volumes) * len(self.depths) * len(self.ratios)
+
+    def _bracket(self, axis, value):
+        """Lower grid index and interpolation weight of value on an axis"""
+        values = self._axes[axis]
+        if len(values) == 1:
+            return 0, 0.0
+        i = min(max(bisect_right(values, value) - 1, 0), len(values) - 2)
+        lo, hi = values[i], values[i + 1]
+        t = (value - lo) / (hi - lo)
+        return i, min(max(t, 0.0), 1.0)
+
+    def lookup(self, volume, depth, ratio):
+        """Interpolated metrics of a design; inputs are clamped to the grid"""
+        (i, ti), (j, tj), (k, tk) = self._bracket(0, volume), self._bracket(1, depth), self._bracket(2, ratio)
+        i1 = min(i + 1, len(self.volumes) - 1)
+        j1 = min(j + 1, len(self.depths) - 1)
+        k1 = min(k + 1, len(self.ratios) - 1)
+        result = {}
+        for name, grid in self.metrics.items():
+            c = grid[i:i1 + 1, j:j1 + 1, k:k1 + 1]
+            # Collapse one axis at a time
+            c = c[0] + (c[-1] - c[0]) * ti
+            c = c[0] + (c[-1] - c[0]) * tj
+            result[name] = float(c[0] + (c[-1] - c[0]) * tk)
+        return result
+
+    def nearest_volume_index(self, volume):
+        i = bisect_left(self._axes[0], volume)
+        if i > 0 and (i == len(self.volumes) or volume - self._axes[0][i - 1] < self._axes[0][i] - volume):
+            i -= 1
+        return min(i, len(self.volumes) - 1)
+
+    def _frontier(self, volume_index):
+        """Non-dominated (depth, ratio, footprint, surface, max dim) rows of a volume slice"""
+        f = self.metrics["footprint"][volume_index].ravel()
+        s = self.metrics["surface_area"][volume_index].ravel()
+        p = self.metrics["max_dimension"][volume_index].ravel()
+        order = np.lexsort((p, s, f))
+        # Staircase of (surface, max dim) of kept points: surface ascending, max dim descending
+        stair_s = []
+        stair_p = []
+        keep = []
+        for idx, si, pi in zip(order.tolist(), s[order].tolist(), p[order].tolist()):
+            pos = bisect_right(stair_s, si)
+            if pos and stair_p[pos - 1] <= pi:
+                continue  # an earlier (smaller footprint) point is at least as good
+            keep.append(idx)
+            end = pos
+            while end < len(stair_s) and stair_p[end] >= pi:
+                end += 1
+            stair_s[pos:end] = [si]
+            stair_p[pos:end] = [pi]
+        keep = np.asarray(keep, dtype=np.int64)
+        j, k = np.unravel_index(keep, (len(self.depths), len(self.ratios)))
+        return np.column_stack([self.depths[j], self.ratios[k], f[keep], s[keep], p[keep]])
+
+    def frontier_for(self, volume, max_dimension=None):
+        """Frontier of the volume slice nearest volume.
+
+        max_dimension keeps designs whose longest side fits on site; any
+        design dominating a fitting one fits too, so filtering the cached
+        frontier gives the constrained frontier.
+        """
+        rows = self.frontier(self.nearest_volume_index(volume))
+        if max_dimension is not None:
+            rows = rows[rows[:, 4] <= max_dimension]
+        return rows
+
+
+@lru_cache(maxsize=1)
+def default_space():
+    """The shared default grid, built on first use"""
+    return DesignSpace()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the precomputed tank design space")
+    parser.add_argument("--volume", type=float, required=True, help="Volume in m³")
+    parser.add_argument("--depth", type=float, help="Depth in m (default: list the frontier only)")
+    parser.add_argument("--ratio", type=float, default=1.0, help="Length:width ratio")
+    parser.add_argument("--max-dimension", type=float, help="Longest plan side allowed on site (m)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    space = default_space()
+    print(f"Grid: {space.size:,} designs built in {(time.perf_counter() - started) * 1000:.0f} ms")
+    if args.depth is not None:
+        started = time.perf_counter()
+        m = space.lookup(args.volume, args.depth, args.ratio)
+        print(f"L {m['length']:.2f} m, W {m['width']:.2f} m, footprint {m['footprint']:.2f} m², "
+              f"surface {m['surface_area']:.2f} m² ({(time.perf_counter() - started) * 1e6:.0f} µs)")
+    started = time.perf_counter()
+    rows = space.frontier_for(args.volume, args.max_dimension)
+    print(f"Pareto frontier ({len(rows)} designs, {(time.perf_counter() - started) * 1000:.1f} ms):")
+    for depth, ratio, footprint, surface, longest in rows[:: max(1, len(rows) // 20)]:
+        print(f"  depth {depth:.2f} m, ratio {ratio:.1f}:1 -> footprint {footprint:.2f} m², "
+              f"surface {surface:.2f} m², longest side {longest:.2f} m")
+
+
+if __name__ == "__main__":
+    main()
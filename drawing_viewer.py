@@ -0,0 +1,319 @@
+"""Pan/zoom viewer for compartment layouts and exported drawings.
+
+Usage:
+    python drawing_viewer.py PATH
+
+PATH is a DXF drawing (read with dxf_diff.read_entities) or an
+interactive_tank.py spec file (.json), laid out exactly as it is exported.
+
+Drag to pan, scroll to zoom, press "f" to fit the drawing.
+
+The item boxes of a drawing go into a uniform grid index once. The view is
+split into screen-sized tiles per zoom level (a power of two), and the
+items of each tile are looked up once and cached, so panning only queries
+the tiles that come into view. Every frame draws the union of the visible
+tiles with levels of detail, decided once per cached tile at its level's
+scale: items smaller than MIN_ITEM_PIXELS are replaced by an outline of
+their tile's contents, labels are skipped below MIN_LABEL_PIXELS text
+height, and a view with more than MAX_DRAWN_ITEMS items is drawn as tile
+outlines only. The canvas therefore never holds
+more than a few thousand items, however large the layout.
+"""
+import argparse
+import math
+import time
+import tkinter as tk
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from dxf_diff import read_entities
+from geometry_ir import ACI_COLORS, TEXT_CHAR_WIDTH, Drawing
+
+TILE_PIXELS = 256
+TILE_CACHE_SIZE = 4096
+# Items spanning more grid cells than this are checked on every query
+MAX_CELL_SPAN = 16
+MIN_ITEM_PIXELS = 2.0
+MIN_LABEL_PIXELS = 7.0
+MAX_DRAWN_ITEMS = 2500
+ZOOM_STEP = 1.25
+SUMMARY_COLOR = "#b0b0b0"
+
+
+def drawing_from_entities(entities):
+    """Drawing of the (LWPOLYLINE/TEXT) tuples returned by read_entities"""
+    drawing = Drawing()
+    for entity in entities:
+        if entity[0] == "LWPOLYLINE":
+            drawing.add_polyline(entity[4], closed=entity[3], color=entity[2])
+        else:
+            drawing.add_text(entity[3], entity[4], entity[5], color=entity[2])
+    return drawing
+
+
+def load_drawing(path):
+    """Drawing of a DXF file or of a compartment spec file"""
+    if Path(path).suffix.lower() == ".json":
+        from interactive_tank import build_drawing, load_spec
+        compartments, _ = load_spec(path)
+        return build_drawing(compartments)
+    return drawing_from_entities(read_entities(path))
+
+
+class SpatialIndex:
+    """Uniform grid over the bounding boxes of a drawing's items.
+
+    Items are numbered polylines first, then texts. Each item is listed
+    under every grid cell its box touches; items spanning more than
+    MAX_CELL_SPAN cells per axis are kept in a short list checked on every
+    query instead.
+    """
+
+    def __init__(self, drawing):
+        self.xy = np.frombuffer(drawing.coords, dtype=float).reshape(-1, 2)
+        self.offsets = np.asarray(drawing.offsets, dtype=np.int64)
+        self.n_polylines = len(self.offsets) - 1
+        self.closed = np.asarray(drawing.closed, dtype=bool)
+        self.texts = drawing.texts
+        self.colors = np.concatenate([np.asarray(drawing.colors, dtype=np.int64),
+                                      np.asarray(drawing.text_colors, dtype=np.int64)])
+        self.text_heights = np.asarray(drawing.text_heights, dtype=float)
+        self.text_inserts = np.frombuffer(drawing.text_inserts, dtype=float).reshape(-1, 2)
+
+        boxes = [np.zeros((0, 4))]
+        if self.n_polylines:
+            starts = self.offsets[:-1]
+            boxes.append(np.hstack([np.minimum.reduceat(self.xy, starts), np.maximum.reduceat(self.xy, starts)]))
+        if len(self.texts):
+            widths = np.fromiter((len(t) for t in self.texts), dtype=float, count=len(self.texts))
+            widths *= self.text_heights * TEXT_CHAR_WIDTH
+            boxes.append(np.column_stack([self.text_inserts, self.text_inserts[:, 0] + widths,
+                                          self.text_inserts[:, 1] + self.text_heights]))
+        self.boxes = np.vstack(boxes)
+        self.extent = np.maximum(self.boxes[:, 2] - self.boxes[:, 0], self.boxes[:, 3] - self.boxes[:, 1])
+        if len(self.boxes):
+            self.bounds = (*self.boxes[:, :2].min(axis=0), *self.boxes[:, 2:].max(axis=0))
+        else:
+            self.bounds = (0.0, 0.0, 1.0, 1.0)
+
+        # About four items per cell
+        width = max(self.bounds[2] - self.bounds[0], 1e-9)
+        height = max(self.bounds[3] - self.bounds[1], 1e-9)
+        self.cell = max(math.sqrt(width * height / max(len(self.boxes) / 4, 1)), 1e-9)
+        self.columns = int(width / self.cell) + 1
+        self.rows = int(height / self.cell) + 1
+        c0 = self._cells(self.boxes[:, 0], self.bounds[0], self.columns)
+        r0 = self._cells(self.boxes[:, 1], self.bounds[1], self.rows)
+        cw = self._cells(self.boxes[:, 2], self.bounds[0], self.columns) - c0 + 1
+        rh = self._cells(self.boxes[:, 3], self.bounds[1], self.rows) - r0 + 1
+        small = (cw <= MAX_CELL_SPAN) & (rh <= MAX_CELL_SPAN)
+        self.large = np.flatnonzero(~small)
+
+        # One (cell key, item) pair per covered cell of every small item
+        ids = np.flatnonzero(small)
+        counts = (cw * rh)[ids]
+        items = np.repeat(ids, counts)
+        k = np.arange(len(items)) - np.repeat(np.cumsum(counts) - counts, counts)
+        keys = (r0[items] + k // cw[items]) * self.columns + c0[items] + k % cw[items]
+        order = np.argsort(keys, kind="stable")
+        self.cell_keys = keys[order]
+        self.cell_items = items[order]
+
+    def _cells(self, values, origin, count):
+        return np.clip(((values - origin) / self.cell).astype(np.int64), 0, count - 1)
+
+    def query(self, x1, y1, x2, y2):
+        """Sorted indices of the items whose boxes overlap the rectangle"""
+        b = self.bounds
+        if x2 < b[0] or x1 > b[2] or y2 < b[1] or y1 > b[3] or not len(self.boxes):
+            return np.zeros(0, dtype=np.int64)
+        c0, c1 = self._cells(np.array([x1, x2]), b[0], self.columns)
+        r0, r1 = self._cells(np.array([y1, y2]), b[1], self.rows)
+        if (c1 - c0 + 1) * (r1 - r0 + 1) * 4 >= len(self.boxes):
+            candidates = np.arange(len(self.boxes))
+        else:
+            row_keys = np.arange(r0, r1 + 1) * self.columns
+            lo = np.searchsorted(self.cell_keys, row_keys + c0, side="left")
+            hi = np.searchsorted(self.cell_keys, row_keys + c1, side="right")
+            parts = [self.cell_items[a:z] for a, z in zip(lo.tolist(), hi.tolist()) if z > a]
+            candidates = np.unique(np.concatenate(parts + [self.large]))
+        boxes = self.boxes[candidates]
+        hit = (boxes[:, 0] <= x2) & (boxes[:, 2] >= x1) & (boxes[:, 1] <= y2) & (boxes[:, 3] >= y1)
+        return candidates[hit]
+
+
+class TileCache:
+    """Items and content outline of fixed-size tiles, per zoom level"""
+
+    def __init__(self, index, size=TILE_CACHE_SIZE):
+        self.index = index
+        self.tile = lru_cache(maxsize=size)(self._tile)
+
+    @staticmethod
+    def level(scale):
+        return math.floor(math.log2(scale))
+
+    @staticmethod
+    def tile_size(level):
+        """World size of the tiles of a level (TILE_PIXELS to twice that on screen)"""
+        return TILE_PIXELS / 2.0 ** level
+
+    def _tile(self, level, tx, ty):
+        """(polyline ids, text ids, content outline, item count, whether items are left out).
+
+        Levels of detail are decided once per tile at the level's smallest
+        scale, so a frame over cached tiles does no per-item work.
+        """
+        size = self.tile_size(level)
+        index = self.index
+        ids = index.query(tx * size, ty * size, (tx + 1) * size, (ty + 1) * size)
+        if not len(ids):
+            return ids, ids, None, 0, False
+        boxes = index.boxes[ids]
+        outline = (max(boxes[:, 0].min(), tx * size), max(boxes[:, 1].min(), ty * size),
+                   min(boxes[:, 2].max(), (tx + 1) * size), min(boxes[:, 3].max(), (ty + 1) * size))
+        scale = 2.0 ** level
+        visible = ids[index.extent[ids] * scale >= MIN_ITEM_PIXELS]
+        is_text = visible >= index.n_polylines
+        texts = visible[is_text]
+        texts = texts[index.text_heights[texts - index.n_polylines] * scale >= MIN_LABEL_PIXELS]
+        polylines = visible[~is_text]
+        return polylines, texts, outline, len(polylines) + len(texts), len(visible) < len(ids)
+
+    def frame(self, x1, y1, x2, y2, scale):
+        """Items to draw for a view: (polyline ids, text ids, outlines).
+
+        Outlines stand in for tiles whose items are too small to see, or for
+        every tile when the view holds more than MAX_DRAWN_ITEMS items
+        (items shared by tiles are counted once per tile).
+        """
+        level = self.level(scale)
+        size = self.tile_size(level)
+        tiles = [self.tile(level, tx, ty)
+                 for ty in range(math.floor(y1 / size), math.floor(y2 / size) + 1)
+                 for tx in range(math.floor(x1 / size), math.floor(x2 / size) + 1)]
+        tiles = [t for t in tiles if t[2] is not None]
+        empty = np.zeros(0, dtype=np.int64)
+        if sum(t[3] for t in tiles) > MAX_DRAWN_ITEMS:
+            return empty, empty, [t[2] for t in tiles]
+        polylines = np.unique(np.concatenate([t[0] for t in tiles])) if tiles else empty
+        texts = np.unique(np.concatenate([t[1] for t in tiles])) if tiles else empty
+        return polylines, texts, [t[2] for t in tiles if t[4]]
+
+
+class DrawingViewer:
+    """Canvas window with drag-to-pan and wheel zoom over a Drawing"""
+
+    def __init__(self, window, drawing, title="Drawing Viewer", width=900, height=700):
+        self.window = window
+        self.window.title(title)
+        self.index = SpatialIndex(drawing)
+        self.tiles = TileCache(self.index)
+        self.canvas = tk.Canvas(window, width=width, height=height, bg="white")
+        self.canvas.pack(fill="both", expand=True)
+        self.status = tk.Label(window, anchor="w", font=("Arial", 9))
+        self.status.pack(fill="x")
+        self.scale = 1.0
+        self.origin = (0.0, 0.0)  # world point at the top-left corner
+        self.drag_start = None
+        self.redraw_job = None
+
+        self.canvas.bind("<ButtonPress-1>", self.on_press)
+        self.canvas.bind("<B1-Motion>", self.on_drag)
+        self.canvas.bind("<MouseWheel>", lambda e: self.zoom(e.x, e.y, ZOOM_STEP if e.delta > 0 else 1 / ZOOM_STEP))
+        self.canvas.bind("<Button-4>", lambda e: self.zoom(e.x, e.y, ZOOM_STEP))
+        self.canvas.bind("<Button-5>", lambda e: self.zoom(e.x, e.y, 1 / ZOOM_STEP))
+        self.canvas.bind("<Configure>", lambda e: self.schedule_redraw())
+        self.window.bind("f", lambda e: self.fit())
+        self.fit(width, height)
+
+    def fit(self, width=None, height=None):
+        """Zoom to show the whole drawing"""
+        width = width or self.canvas.winfo_width()
+        height = height or self.canvas.winfo_height()
+        x1, y1, x2, y2 = self.index.bounds
+        self.scale = 0.95 * min(width / max(x2 - x1, 1e-9), height / max(y2 - y1, 1e-9))
+        cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
+        self.origin = (cx - width / 2 / self.scale, cy + height / 2 / self.scale)
+        self.schedule_redraw()
+
+    def on_press(self, event):
+        self.drag_start = (event.x, event.y)
+
+    def on_drag(self, event):
+        dx, dy = event.x - self.drag_start[0], event.y - self.drag_start[1]
+        self.drag_start = (event.x, event.y)
+        self.origin = (self.origin[0] - dx / self.scale, self.origin[1] + dy / self.scale)
+        # Shift what is drawn now; the redraw fills in the uncovered edge
+        self.canvas.move("all", dx, dy)
+        self.schedule_redraw()
+
+    def zoom(self, x, y, factor):
+        # Keep the world point under the cursor in place
+        wx, wy = self.origin[0] + x / self.scale, self.origin[1] - y / self.scale
+        self.scale *= factor
+        self.origin = (wx - x / self.scale, wy + y / self.scale)
+        self.schedule_redraw()
+
+    def schedule_redraw(self):
+        """Coalesce the events of one frame into a single redraw"""
+        if self.redraw_job is None:
+            self.redraw_job = self.window.after_idle(self.redraw)
+
+    def redraw(self):
+        self.redraw_job = None
+        started = time.perf_counter()
+        width, height = self.canvas.winfo_width(), self.canvas.winfo_height()
+        ox, oy = self.origin
+        s = self.scale
+        polylines, texts, outlines = self.tiles.frame(ox, oy - height / s, ox + width / s, oy, s)
+        canvas = self.canvas
+        canvas.delete("all")
+
+        for x1, y1, x2, y2 in outlines:
+            canvas.create_rectangle((x1 - ox) * s, (oy - y2) * s, (x2 - ox) * s, (oy - y1) * s,
+                                    outline=SUMMARY_COLOR, fill="#eeeeee")
+
+        index = self.index
+        if len(polylines):
+            # Transform all points of the drawn polylines at once
+            starts, stops = index.offsets[polylines], index.offsets[polylines + 1]
+            counts = stops - starts
+            points = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+            screen = ((index.xy[points] - (ox, oy)) * (s, -s)).ravel().tolist()
+            pos = 0
+            for i, count in zip(polylines.tolist(), counts.tolist()):
+                flat = screen[pos:pos + 2 * count]
+                pos += 2 * count
+                color = ACI_COLORS.get(int(index.colors[i]), "black")
+                if count > 2 and index.closed[i]:
+                    canvas.create_polygon(flat, outline=color, fill="")
+                elif count >= 2:
+                    canvas.create_line(flat, fill=color)
+
+        for i in texts.tolist():
+            t = i - index.n_polylines
+            x, y = index.text_inserts[t]
+            canvas.create_text((x - ox) * s, (oy - y) * s, text=index.texts[t], anchor="sw",
+                               font=("Arial", -max(int(index.text_heights[t] * s), 1)),
+                               fill=ACI_COLORS.get(int(index.colors[i]), "black"))
+
+        elapsed = (time.perf_counter() - started) * 1000
+        self.status.config(text=f"Zoom {s:.3g} px/m | {len(polylines)} shapes, {len(texts)} labels, "
+                                f"{len(outlines)} outlines | {elapsed:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pan/zoom viewer for DXF drawings and compartment specs")
+    parser.add_argument("path", help="DXF file or interactive_tank.py spec (.json)")
+    args = parser.parse_args()
+    drawing = load_drawing(args.path)
+    root = tk.Tk()
+    DrawingViewer(root, drawing, title=f"Drawing Viewer - {Path(args.path).name}")
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""Fast DXF ingest and semantic diff of exported drawings.
+
+The reader memory-maps a drawing, jumps straight to the ENTITIES section and
+extracts only the LWPOLYLINE and TEXT entities this project writes, without
+building an ezdxf document. Two drawings are equal when their geometry and
+texts match within a tolerance; handles, owners and "Created:" timestamps
+are ignored, as is entity order.
+
+Usage:
+    python dxf_diff.py OLD NEW [--tolerance 1e-6] [--jobs N]
+
+OLD and NEW are DXF files or directories; directories are compared file by
+file on matching relative paths.
+"""
+import argparse
+import mmap
+import os
+import re
+import sys
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+DEFAULT_TOLERANCE = 1e-6
+
+# Text lines that change on every export
+VOLATILE_TEXT = re.compile(r"^Created: ")
+
+
+def read_entities(path):
+    """Return the LWPOLYLINE/TEXT entities of a DXF file as tuples.
+
+    Polylines are ("LWPOLYLINE", layer, color, closed, ((x, y), ...)) and
+    texts ("TEXT", layer, color, text, (x, y), height).
+    """
+    with open(path, 'rb') as fh:
+        if os.fstat(fh.fileno()).st_size == 0:
+            return []
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start = mm.find(b"\nENTITIES")
+            if start < 0:
+                return []
+            end = mm.find(b"\nENDSEC", start)
+            body = mm[start:end if end >= 0 else len(mm)]
+    # body starts with "\nENTITIES"; group code/value pairs follow
+    return _parse_entities(body.split(b"\n")[2:])
+
+
+def _parse_entities(lines):
+    entities = []
+    kind = None
+    group = None
+    for i in range(0, len(lines) - 1, 2):
+        code = lines[i].strip()
+        value = lines[i + 1].rstrip(b"\r")
+        if code == b"0":
+            if kind is not None:
+                entities.append(_make_entity(kind, group))
+            name = value.strip()
+            kind = name.decode() if name in (b"LWPOLYLINE", b"TEXT") else None
+            group = {"points": [], "x": None}
+        elif kind is not None:
+            _collect(group, code, value)
+    if kind is not None:
+        entities.append(_make_entity(kind, group))
+    return entities
+
+
+def _collect(group, code, value):
+    if code == b"10":
+        group["x"] = float(value)
+    elif code == b"20":
+        group["points"].append((group["x"], float(value)))
+    elif code == b"8":
+        group["layer"] = value.decode("utf-8", "replace").strip()
+    elif code == b"62":
+        group["color"] = int(value)
+    elif code == b"70":
+        group["flags"] = int(value)
+    elif code == b"40":
+        group["height"] = float(value)
+    elif code == b"1":
+        group["text"] = value.decode("utf-8", "replace")
+
+
+def _make_entity(kind, group):
+    layer = group.get("layer", "0")
+    color = group.get("color", 256)
+    if kind == "LWPOLYLINE":
+        return (kind, layer, color, bool(group.get("flags", 0) & 1), tuple(group["points"]))
+    insert = group["points"][0] if group["points"] else (0.0, 0.0)
+    return (kind, layer, color, group.get("text", ""), insert, group.get("height", 0.0))
+
+
+def _signature(entity):
+    """Part of an entity that must match exactly"""
+    if entity[0] == "LWPOLYLINE":
+        return entity[:4] + (len(entity[4]),)
+    return entity[:4]
+
+
+def _coords(entity):
+    if entity[0] == "LWPOLYLINE":
+        return [c for point in entity[4] for c in point]
+    return list(entity[4]) + [entity[5]]
+
+
+def _close(a, b, tolerance):
+    return all(abs(x - y) <= tolerance for x, y in zip(_coords(a), _coords(b)))
+
+
+def diff_entities(old, new, tolerance=DEFAULT_TOLERANCE):
+    """Return (removed, added) entities between two entity lists"""
+    groups = defaultdict(lambda: ([], []))
+    for side, entities in ((0, old), (1, new)):
+        for entity in entities:
+            if entity[0] == "TEXT" and VOLATILE_TEXT.match(entity[3]):
+                continue
+            groups[_signature(entity)][side].append(entity)
+
+    removed = []
+    added = []
+    for olds, news in groups.values():
+        olds.sort(key=_coords)
+        news.sort(key=_coords)
+        # Fast path: sorted order pairs every entity with its counterpart
+        if len(olds) == len(news) and all(_close(a, b, tolerance) for a, b in zip(olds, news)):
+            continue
+        unmatched = list(news)
+        for a in olds:
+            for idx, b in enumerate(unmatched):
+                if _close(a, b, tolerance):
+                    del unmatched[idx]
+                    break
+            else:
+                removed.append(a)
+        added.extend(unmatched)
+    return removed, added
+
+
+def diff_files(old_path, new_path, tolerance=DEFAULT_TOLERANCE):
+    return diff_entities(read_entities(old_path), read_entities(new_path), tolerance)
+
+
+def _diff_pair(args):
+    rel, old_path, new_path, tolerance = args
+    if old_path is None or new_path is None:
+        return rel, old_path, new_path, None
+    return rel, old_path, new_path, diff_files(old_path, new_path, tolerance)
+
+
+def _drawing_pairs(old, new):
+    old, new = Path(old), Path(new)
+    if old.is_file() and new.is_file():
+        return [(new.name, old, new)]
+    old_files = {p.relative_to(old): p for p in old.rglob("*.dxf")}
+    new_files = {p.relative_to(new): p for p in new.rglob("*.dxf")}
+    return [(str(rel), old_files.get(rel), new_files.get(rel))
+            for rel in sorted(set(old_files) | set(new_files))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Semantic diff of DXF drawings or drawing directories")
+    parser.add_argument("old", help="Previous DXF file or directory")
+    parser.add_argument("new", help="Regenerated DXF file or directory")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Coordinate tolerance in drawing units")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="Worker processes")
+    args = parser.parse_args()
+
+    pairs = [(rel, o, n, args.tolerance) for rel, o, n in _drawing_pairs(args.old, args.new)]
+    changed = 0
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        for rel, old_path, new_path, result in pool.map(_diff_pair, pairs, chunksize=64):
+            if old_path is None:
+                print(f"ADDED {rel}")
+            elif new_path is None:
+                print(f"REMOVED {rel}")
+            elif result[0] or result[1]:
+                print(f"CHANGED {rel}")
+                for entity in result[0]:
+                    print(f"  - {entity}")
+                for entity in result[1]:
+                    print(f"  + {entity}")
+            else:
+                continue
+            changed += 1
+    print(f"{len(pairs)} drawings compared, {changed} differ")
+    return 1 if changed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,231 @@
+"""Format-independent drawing geometry with pluggable output backends.
+
+A Drawing is computed once per design and holds its primitives in flat
+``array('d')`` buffers: polylines (rectangles and leader lines included) as
+one coordinate array plus offsets, texts as insert/height arrays plus their
+strings. Backends registered in BACKENDS turn a Drawing into a file; emit()
+writes several formats from the same in-memory geometry in one pass, and
+builds the matplotlib figure only once for all of PNG/PDF. Every file is
+written under a temporary name and renamed into place, so a crash never
+leaves a half-written drawing behind.
+"""
+import os
+from array import array
+from pathlib import Path
+
+# AutoCAD color index -> color used by the SVG and matplotlib backends
+ACI_COLORS = {1: "red", 2: "goldenrod", 3: "green", 4: "cyan", 5: "blue", 6: "magenta", 7: "black", 256: "black"}
+BYLAYER = 256
+# Text width per character as a fraction of the text height
+TEXT_CHAR_WIDTH = 0.8
+# Cap height of the SVG/preview font as a fraction of its size
+CAP_HEIGHT = 0.72
+
+
+class Drawing:
+    """Polylines and texts in drawing units (meters)"""
+
+    def __init__(self):
+        self.coords = array('d')  # x0, y0, x1, y1, ... of all polylines
+        self.offsets = array('l', [0])  # polyline i uses points offsets[i]:offsets[i + 1]
+        self.closed = array('b')
+        self.colors = array('l')
+        self.text_inserts = array('d')  # x, y per text
+        self.text_heights = array('d')
+        self.text_colors = array('l')
+        self.texts = []
+
+    def add_polyline(self, points, closed=False, color=BYLAYER):
+        for x, y in points:
+            self.coords.append(x)
+            self.coords.append(y)
+        self.offsets.append(len(self.coords) // 2)
+        self.closed.append(bool(closed))
+        self.colors.append(color)
+
+    def add_rect(self, x1, y1, x2, y2, color=BYLAYER):
+        self.add_polyline(((x1, y1), (x2, y1), (x2, y2), (x1, y2)), closed=True, color=color)
+
+    def add_line(self, start, end, color=BYLAYER):
+        self.add_polyline((start, end), color=color)
+
+    def add_text(self, text, insert, height, color=BYLAYER):
+        self.texts.append(text)
+        self.text_inserts.extend(insert)
+        self.text_heights.append(height)
+        self.text_colors.append(color)
+
+    def extend(self, other):
+        """Append all primitives of another drawing"""
+        base = len(self.coords) // 2
+        self.coords.extend(other.coords)
+        self.offsets.extend(o + base for o in other.offsets[1:])
+        self.closed.extend(other.closed)
+        self.colors.extend(other.colors)
+        self.texts.extend(other.texts)
+        self.text_inserts.extend(other.text_inserts)
+        self.text_heights.extend(other.text_heights)
+        self.text_colors.extend(other.text_colors)
+        return self
+
+    def polylines(self):
+        """Yield (points, closed, color) for every polyline"""
+        c = self.coords
+        for i in range(len(self.closed)):
+            start, stop = self.offsets[i], self.offsets[i + 1]
+            points = [(c[2 * k], c[2 * k + 1]) for k in range(start, stop)]
+            yield points, bool(self.closed[i]), self.colors[i]
+
+    def text_items(self):
+        """Yield (text, (x, y), height, color) for every text"""
+        for i, text in enumerate(self.texts):
+            yield text, (self.text_inserts[2 * i], self.text_inserts[2 * i + 1]), self.text_heights[i], self.text_colors[i]
+
+    def bounds(self):
+        """(min_x, min_y, max_x, max_y) of all polylines and texts"""
+        # Text extents are estimated from the character count
+        text_ends = [x + len(t) * h * TEXT_CHAR_WIDTH
+                     for x, t, h in zip(self.text_inserts[0::2], self.texts, self.text_heights)]
+        xs = list(self.coords[0::2]) + list(self.text_inserts[0::2]) + text_ends
+        ys = list(self.coords[1::2]) + [y + h for y, h in zip(self.text_inserts[1::2], self.text_heights)]
+        if not xs:
+            return 0.0, 0.0, 1.0, 1.0
+        return min(xs), min(ys), max(xs), max(ys)
+
+
+def write_dxf(drawing, path, meters=False):
+    import ezdxf
+    from ezdxf import units
+
+    doc = ezdxf.new('R2010')
+    if meters:
+        doc.units = units.M
+    msp = doc.modelspace()
+    for points, closed, color in drawing.polylines():
+        attribs = {} if color == BYLAYER else {'color': color}
+        msp.add_lwpolyline(points, close=closed, dxfattribs=attribs)
+    for text, insert, height, color in drawing.text_items():
+        attribs = {'height': height, 'insert': insert}
+        if color != BYLAYER:
+            attribs['color'] = color
+        msp.add_text(text, dxfattribs=attribs)
+    doc.saveas(str(path))
+
+
+def write_svg(drawing, path, **kwargs):
+    min_x, min_y, max_x, max_y = drawing.bounds()
+    margin = max(max_x - min_x, max_y - min_y) * 0.02 or 1.0
+    width = max_x - min_x + 2 * margin
+    height = max_y - min_y + 2 * margin
+    # SVG y grows downwards: flip around the drawing's top edge
+    fy = lambda y: max_y + margin - y
+    fx = lambda x: x - min_x + margin
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {width:.6g} {height:.6g}">']
+    for points, closed, color in drawing.polylines():
+        pts = " ".join(f"{fx(x):.6g},{fy(y):.6g}" for x, y in points)
+        tag = "polygon" if closed else "polyline"
+        parts.append(f'<{tag} points="{pts}" fill="none" stroke="{ACI_COLORS.get(color, "black")}" '
+                     f'stroke-width="{margin / 10:.4g}"/>')
+    for text, (x, y), h, color in drawing.text_items():
+        escaped = text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+        parts.append(f'<text x="{fx(x):.6g}" y="{fy(y):.6g}" font-size="{h / CAP_HEIGHT:.4g}" '
+                     f'font-family="sans-serif" fill="{ACI_COLORS.get(color, "black")}">{escaped}</text>')
+    parts.append('</svg>')
+    Path(path).write_text("\n".join(parts), encoding="utf-8")
+
+
+def render_matplotlib(drawing, max_fig_w=12.0):
+    """Build a matplotlib figure of the drawing"""
+    import matplotlib.pyplot as plt
+
+    min_x, min_y, max_x, max_y = drawing.bounds()
+    margin_x = max(0.1, (max_x - min_x) * 0.02)
+    margin_y = max(0.1, (max_y - min_y) * 0.02)
+    width = max_x - min_x + 2 * margin_x
+    height = max_y - min_y + 2 * margin_y
+    fig_w = min(max_fig_w, max(4.0, width))
+    fig_h = max(3.0, fig_w * (height / max(width, 1e-6)))
+
+    fig = plt.figure(figsize=(fig_w, fig_h))
+    ax = fig.add_subplot(111)
+    ax.set_xlim(min_x - margin_x, max_x + margin_x)
+    ax.set_ylim(min_y - margin_y, max_y + margin_y)
+    ax.set_aspect('equal')
+    ax.axis('off')
+    # Font size in points for one drawing unit of text (cap) height
+    ax.apply_aspect()
+    points_per_unit = ax.get_position().width * fig_w * 72.0 / width / CAP_HEIGHT
+
+    for points, closed, color in drawing.polylines():
+        xs = [p[0] for p in points]
+        ys = [p[1] for p in points]
+        if closed:
+            xs.append(xs[0])
+            ys.append(ys[0])
+        ax.plot(xs, ys, color=ACI_COLORS.get(color, "black"), linewidth=1 if closed else 0.5)
+    for text, (x, y), h, color in drawing.text_items():
+        ax.text(x, y, text, fontsize=h * points_per_unit, color=ACI_COLORS.get(color, "black"),
+                verticalalignment='baseline', horizontalalignment='left')
+    return fig
+
+
+def write_matplotlib(drawing, path, figure=None, **kwargs):
+    import matplotlib.pyplot as plt
+
+    fig = figure or render_matplotlib(drawing)
+    fig.savefig(str(path), bbox_inches='tight', dpi=150)
+    if figure is None:
+        plt.close(fig)
+
+
+# Output backends by file suffix
+BACKENDS = {
+    ".dxf": write_dxf,
+    ".svg": write_svg,
+    ".png": write_matplotlib,
+    ".pdf": write_matplotlib,
+}
+
+
+def partial_path(path):
+    """Temporary name next to path; keeps the suffix the backends dispatch on"""
+    path = Path(path)
+    return path.with_name(f".{path.stem}.{os.getpid()}.partial{path.suffix}")
+
+
+def emit(drawing, paths, optional=(), **kwargs):
+    """Write the drawing to every path, choosing the backend by suffix.
+
+    Errors writing a path listed in optional (e.g. a preview) do not stop
+    the others; they are returned as (path, error) pairs.
+    """
+    figure = None
+    optional = {str(path) for path in optional}
+    failed = []
+    try:
+        for path in paths:
+            tmp = partial_path(path)
+            try:
+                backend = BACKENDS.get(Path(path).suffix.lower())
+                if backend is None:
+                    raise ValueError(f"No drawing backend for {path}")
+                if backend is write_matplotlib:
+                    if figure is None:
+                        figure = render_matplotlib(drawing)
+                    backend(drawing, tmp, figure=figure)
+                else:
+                    backend(drawing, tmp, **kwargs)
+                os.replace(tmp, path)
+            except Exception as e:
+                tmp.unlink(missing_ok=True)
+                if str(path) not in optional:
+                    raise
+                failed.append((path, e))
+            except BaseException:
+                tmp.unlink(missing_ok=True)
+                raise
+        return failed
+    finally:
+        if figure is not None:
+            import matplotlib.pyplot as plt
+            plt.close(figure)
@@ -1,7 +1,41 @@
+"""Compartment DXF generator.
+
+Run without arguments for the interactive prompts, or with spec files:
+
+    python interactive_tank.py --spec compartments.json [--watch]
+
+A spec file holds the same inputs as the prompts:
+
+    {"depth": 2.5, "fixed": "width", "fixed_value": 3.0,
+     "output": "compartments.dxf",
+     "compartments": [{"name": "Domestic", "volume": 20}, ...]}
+
+Instead of "compartments" a spec may ask for automatic partitioning of a
+total volume (see partition_volumes):
+
+    {"depth": 2.5, "fixed": "width", "fixed_value": 3.0,
+     "auto": {"volume": 400, "min_compartments": 2, "max_span": 8,
+              "split": "proportional", "uses": {"Domestic": 3, "Fire": 1}}}
+
+The same rules are available on the command line:
+
+    python interactive_tank.py --auto-volume 400 --depth 2.5 --fixed width \
+        --fixed-value 3 --min-compartments 2 --max-span 8 [--uses Domestic:3,Fire:1]
+
+With --watch the spec files are polled and a drawing is regenerated only
+when its parsed spec changed.
+"""
+import argparse
+import heapq
+import json
 import math
-import ezdxf
-from ezdxf import units
-import matplotlib.pyplot as plt
+import time
+from pathlib import Path
+
+from geometry_ir import Drawing, emit
+from label_placement import place_labels
+from tank_validation import COMPARTMENT_SCHEMA, COMPARTMENT_SPEC_SCHEMA, ValidationError
+from tank_watch import diff_specs, file_signature, watch_files
 
 
 def get_positive_float(prompt):
@@ -28,6 +62,36 @@ def get_positive_int(prompt):
             print("Please enter an integer.")
 
 
+def get_optional_positive_float(prompt):
+    """A positive number, or None for a blank answer"""
+    while True:
+        v = input(prompt).strip()
+        if not v:
+            return None
+        try:
+            if float(v) > 0:
+                return float(v)
+            print("Value must be positive. Try again.")
+        except ValueError:
+            print("Please enter a numeric value.")
+
+
+def get_uses(prompt):
+    """Uses and shares as parsed by parse_uses, or None for a blank answer"""
+    while True:
+        v = input(prompt).strip()
+        if not v:
+            return None
+        try:
+            uses = parse_uses(v)
+        except ValueError as e:
+            print(f"{e}. Try again.")
+            continue
+        if uses and all(share > 0 for _, share in uses):
+            return uses
+        print("Every share must be positive. Try again.")
+
+
 def get_nonempty(prompt, default=None):
     v = input(prompt).strip()
     if v:
@@ -35,9 +99,10 @@ def get_nonempty(prompt, default=None):
     return default
 
 
-def main():
+def interactive():
     print("Interactive compartment DXF generator")
-    n = get_positive_int("Number of compartments: ")
+    auto = input("Partition a total volume automatically? (y/N): ").strip().lower() == "y"
+    n = 0 if auto else get_positive_int("Number of compartments: ")
 
     # Global inputs
     depth = get_positive_float("Global Depth/height for all compartments (m): ")
@@ -49,10 +114,48 @@ def main():
         print("Please enter 'Width' or 'Length'.")
     fixed_value = get_positive_float(f"Fixed {fixed_choice.title()} value (meters): ")
 
+    if auto:
+        total = get_positive_float("Total volume (cubic meters): ")
+        # re-ask every partition input on failure, so whichever one was wrong can change
+        while True:
+            min_count = get_positive_int("Minimum number of compartments (for maintenance): ")
+            max_span = get_optional_positive_float(f"Maximum {'length' if fixed_choice == 'width' else 'width'} "
+                                                   "of a compartment (m, blank for no limit): ")
+            uses = get_uses("Uses and shares for a proportional split, e.g. Domestic:3,Fire:1 "
+                            "(blank for equal compartments): ")
+            try:
+                named_volumes = partition_volumes(total, depth, fixed_value, min_count, max_span,
+                                                  "proportional" if uses else "equal", uses)
+                break
+            except ValueError as e:
+                print(f"{e}. Try again.")
+        for name, volume in named_volumes:
+            print(f"  {name}: {volume:.3f} m^3")
+    else:
+        named_volumes = []
+        for i in range(1, n + 1):
+            name = input(f"Name of compartment {i}: ").strip() or f"Compartment_{i}"
+            named_volumes.append((name, get_positive_float(f"Volume of '{name}' (cubic meters): ")))
+        # Names must be unique; ask again for every repeated one
+        while True:
+            report = COMPARTMENT_SCHEMA.validate({"name": [name for name, _ in named_volumes],
+                                                  "volume": [volume for _, volume in named_volumes]})
+            if report.ok:
+                break
+            print(report.format())
+            for row in report.bad_rows.tolist():
+                name = input(f"New name of compartment {row + 1}: ").strip() or f"Compartment_{row + 1}"
+                named_volumes[row] = (name, named_volumes[row][1])
+    compartments = make_compartments(depth, fixed_choice, fixed_value, named_volumes)
+
+    filename = input("Filename to save DXF (default: compartments.dxf): ").strip() or "compartments.dxf"
+    export_compartments(compartments, filename)
+
+
+def make_compartments(depth, fixed_choice, fixed_value, named_volumes):
+    """Compartment dicts for (name, volume) pairs sharing depth and fixed side"""
     compartments = []
-    for i in range(1, n + 1):
-        name = input(f"Name of compartment {i}: ").strip() or f"Compartment_{i}"
-        volume = get_positive_float(f"Volume of '{name}' (cubic meters): ")
+    for name, volume in named_volumes:
         # compute variable dimension: variable = volume / (depth * fixed)
         variable = volume / (depth * fixed_value)
         compartments.append({
@@ -63,12 +166,197 @@ def main():
             "fixed_value": fixed_value,
             "variable": variable,
         })
+    return compartments
+
+
+def partition_volumes(total_volume, depth, fixed_value, min_compartments=1, max_span=None,
+                      split="equal", uses=None, min_span=0.0):
+    """Split a total volume into compartments; return (name, volume) pairs.
+
+    The span of a compartment is its variable dimension, volume / (depth *
+    fixed_value). "equal" makes the fewest equal compartments with at
+    least min_compartments and no span over max_span. "proportional" gives
+    each use of uses ({name: share} or (name, share) pairs) its share of
+    the volume, split into the fewest equal compartments within max_span;
+    further compartments, up to min_compartments, go one at a time to the
+    use with the longest compartments, which keeps the longest span as
+    short as possible. Raises ValueError if a compartment would end up
+    shorter than min_span.
+    """
+    if total_volume <= 0 or depth <= 0 or fixed_value <= 0:
+        raise ValueError("Total volume, depth and fixed value must be positive")
+    if max_span is not None and max_span <= 0:
+        raise ValueError("Maximum span must be positive")
+    span = total_volume / (depth * fixed_value)
+    if split == "equal":
+        uses = [("Compartment", 1.0)]
+    elif split == "proportional":
+        uses = list(uses.items() if hasattr(uses, "items") else uses or ())
+        if not uses or any(share <= 0 for _, share in uses):
+            raise ValueError("A proportional split needs uses with positive shares")
+    else:
+        raise ValueError(f"Unknown split '{split}' (use 'equal' or 'proportional')")
+
+    total_share = sum(share for _, share in uses)
+    spans = [span * share / total_share for _, share in uses]
+    counts = [max(1, math.ceil(s / max_span - 1e-9)) if max_span else 1 for s in spans]
+    # Longest compartment first; each extra compartment splits it further
+    heap = [(-s / k, j) for j, (s, k) in enumerate(zip(spans, counts))]
+    heapq.heapify(heap)
+    for _ in range(max(0, min_compartments - sum(counts))):
+        _, j = heapq.heappop(heap)
+        counts[j] += 1
+        heapq.heappush(heap, (-spans[j] / counts[j], j))
 
-    # Compute drawing layout for serial (linear) arrangement
-    padding = 0.0  # zero padding between compartments as requested
+    shortest = min(s / k for s, k in zip(spans, counts))
+    if shortest < min_span - 1e-9:
+        raise ValueError(f"Compartments would be {shortest:.3f} m long, below the minimum span of {min_span:g} m")
 
+    named_volumes = []
+    number = 1
+    for (name, share), k in zip(uses, counts):
+        volume = total_volume * share / total_share / k
+        for i in range(1, k + 1):
+            if split == "equal":
+                label = f"Compartment_{number}"
+            else:
+                label = f"{name} {i}" if k > 1 else name
+            named_volumes.append((label, volume))
+            number += 1
+    return named_volumes
+
+
+def parse_uses(text):
+    """Parse "Domestic:3,Fire:1" into (name, share) pairs"""
+    uses = []
+    for item in text.split(","):
+        if item.strip():
+            name, sep, share = item.partition(":")
+            try:
+                uses.append((name.strip(), float(share) if sep else 1.0))
+            except ValueError:
+                raise ValueError(f"Invalid share in '{item.strip()}'")
+    return uses
+
+
+def load_spec(path):
+    """Read a spec file; return (compartments, DXF filename)"""
+    with open(path) as fh:
+        spec = json.load(fh)
+    fixed_choice = str(spec.get("fixed", "width")).lower()
+    if fixed_choice not in ("width", "length"):
+        raise ValueError(f"{path}: 'fixed' must be 'width' or 'length'")
+    # Report every bad value at once rather than the first one found
+    report = COMPARTMENT_SPEC_SCHEMA.validate({"depth": [spec.get("depth")],
+                                              "fixed_value": [spec.get("fixed_value")]})
+    if not report.ok:
+        raise ValueError(f"{path}: " + "; ".join(f"{e['field']} {e['message']}" for e in report.errors()))
+    depth, fixed_value = float(report.columns["depth"][0]), float(report.columns["fixed_value"][0])
+    try:
+        if "auto" in spec:
+            auto = spec["auto"]
+            max_span = auto.get("max_span")
+            named_volumes = partition_volumes(float(auto["volume"]), depth, fixed_value,
+                                              int(auto.get("min_compartments", 1)),
+                                              None if max_span is None else float(max_span),
+                                              auto.get("split", "proportional" if auto.get("uses") else "equal"),
+                                              auto.get("uses"), float(auto.get("min_span", 0.0)))
+        else:
+            report = COMPARTMENT_SCHEMA.validate(spec["compartments"])
+            if not report.ok:
+                raise ValidationError(report, path)
+            named_volumes = [(name if name.strip() else f"Compartment_{i}", volume) for i, (name, volume)
+                             in enumerate(zip(report.columns["name"], report.columns["volume"].tolist()), 1)]
+    except ValidationError:
+        raise
+    except (KeyError, TypeError) as e:
+        raise ValueError(f"{path}: missing or invalid value: {e}")
+    except ValueError as e:
+        raise ValueError(f"{path}: {e}")
+    filename = spec.get("output") or str(Path(path).with_suffix(".dxf"))
+    return make_compartments(depth, fixed_choice, fixed_value, named_volumes), filename
+
+
+def export_compartments(compartments, filename):
+    """Write the compartment DXF and its PNG preview"""
+    drawing = build_drawing(compartments)
+    # PNG preview from the same geometry in the same pass; it is optional
+    png_name = filename.rsplit('.', 1)[0] + '.png'
+    failed = emit(drawing, [filename, png_name], optional=[png_name], meters=True)
+    print(f"Saved DXF to {filename}")
+    if failed:
+        print(f"PNG preview failed: {failed[0][1]}")
+    else:
+        print(f"Saved PNG preview to {png_name}")
+
+
+def run_specs(paths, watch=False):
+    """Export every spec file; with watch, re-export specs as they change"""
+    specs = {}
+
+    def export_changed(changed_paths):
+        started = time.perf_counter()
+        parsed = {}
+        for path in changed_paths:
+            try:
+                parsed[path] = load_spec(path)
+            except (OSError, ValueError) as e:
+                # Usually a save still in progress; the next write triggers again
+                print(f"Cannot read {path}: {e}")
+        changed, _ = diff_specs({p: specs[p] for p in parsed if p in specs}, parsed)
+        for path in changed:
+            export_compartments(*parsed[path])
+            specs[path] = parsed[path]
+        if watch:
+            print(f"{len(changed)} drawings updated ({(time.perf_counter() - started) * 1000:.0f} ms)")
+
+    baseline = {path: file_signature(path) for path in paths}
+    export_changed(paths)
+    if watch:
+        watch_files(paths, export_changed, baseline=baseline)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compartment DXF generator (interactive or from spec files)")
+    parser.add_argument("--spec", nargs="+", help="JSON spec files to export instead of prompting")
+    parser.add_argument("--watch", action="store_true", help="Re-export spec files whenever they change")
+    auto = parser.add_argument_group("automatic partitioning")
+    auto.add_argument("--auto-volume", type=float, help="Total volume (m³) to partition into compartments")
+    auto.add_argument("--depth", type=float, help="Depth of all compartments (m)")
+    auto.add_argument("--fixed", choices=("width", "length"), default="width", help="Fixed dimension")
+    auto.add_argument("--fixed-value", type=float, help="Value of the fixed dimension (m)")
+    auto.add_argument("--min-compartments", type=int, default=1, help="Fewest compartments (for maintenance)")
+    auto.add_argument("--max-span", type=float, help="Longest variable dimension of a compartment (m)")
+    auto.add_argument("--min-span", type=float, default=0.0, help="Shortest variable dimension of a compartment (m)")
+    auto.add_argument("--uses", help="Proportional split, e.g. Domestic:3,Fire:1 (default: equal compartments)")
+    auto.add_argument("--output", default="compartments.dxf", help="DXF file to write")
+    args = parser.parse_args()
+    if args.auto_volume is not None:
+        if args.depth is None or args.fixed_value is None:
+            parser.error("--auto-volume needs --depth and --fixed-value")
+        try:
+            named_volumes = partition_volumes(args.auto_volume, args.depth, args.fixed_value,
+                                              args.min_compartments, args.max_span,
+                                              "proportional" if args.uses else "equal",
+                                              parse_uses(args.uses) if args.uses else None, args.min_span)
+        except ValueError as e:
+            parser.error(str(e))
+        export_compartments(make_compartments(args.depth, args.fixed, args.fixed_value, named_volumes), args.output)
+    elif args.spec:
+        run_specs(args.spec, args.watch)
+    elif args.watch:
+        parser.error("--watch needs --spec")
+    else:
+        interactive()
+
+
+def layout_compartments(compartments, padding=0.0):
+    """Lay compartments out in series along the variable dimension.
+
+    Returns (x1, y1, x2, y2, name, w, h, volume) tuples.
+    """
     # Determine orientation and rectangle sizes
-    rects = []  # list of (x1,y1,x2,y2,label, fixed, variable)
+    rects = []
     x = 0.0
     y = 0.0
     if compartments and compartments[0]["fixed_choice"] == "width":
@@ -80,7 +368,7 @@ def main():
             y1 = 0.0
             x2 = x1 + w
             y2 = y1 + h
-            rects.append((x1, y1, x2, y2, c["name"], w, h))
+            rects.append((x1, y1, x2, y2, c["name"], w, h, c["volume"]))
             x = x2 + padding
     else:
         # fixed length => fixed X size = fixed_value, variable Y size varies; stack along Y
@@ -91,96 +379,35 @@ def main():
             y1 = y
             x2 = x1 + w
             y2 = y1 + h
-            rects.append((x1, y1, x2, y2, c["name"], w, h))
+            rects.append((x1, y1, x2, y2, c["name"], w, h, c["volume"]))
             y = y2 + padding
+    return rects
 
-    # Create DXF
-    doc = ezdxf.new(dxfversion="R2010")
-    doc.units = units.M
-    msp = doc.modelspace()
-
-    text_height = 0.25
-
-    # Track drawing extents
-    drawn_rects = []
-    for (x1, y1, x2, y2, label, w, h) in rects:
-        # draw rectangle
-        msp.add_lwpolyline([(x1, y1), (x2, y1), (x2, y2), (x1, y2)], close=True)
-
-        # add labels (name, vol, dims). Place inside if space allows, else outside.
-        center_x = (x1 + x2) / 2.0
-        center_y = (y1 + y2) / 2.0
-        vol = next(c['volume'] for c in compartments if c['name'] == label)
-        lines = [f"{label}", f"Vol: {vol:.3f} m^3", f"W: {w:.3f} m", f"H: {h:.3f} m"]
-        # determine text height scaled to rect
-        th = min(text_height, max(0.08, min(w, h) / 8.0))
-        # try to place lines starting near top inside rectangle
-        top_y = y2 - 0.05
-        for idx, line in enumerate(lines):
-            t = msp.add_text(line, dxfattribs={"height": th})
-            insert_x = x1 + 0.05
-            insert_y = top_y - idx * (th + 0.02)
-            # if text would be outside bottom, shift to below rectangle
-            if insert_y - th < y1 - 0.01:
-                insert_y = y1 - (idx + 1) * (th + 0.02)
-            t.dxf.insert = (insert_x, insert_y)
-
-        drawn_rects.append((x1, y1, x2, y2, label))
 
-    filename = input("Filename to save DXF (default: compartments.dxf): ").strip() or "compartments.dxf"
-    doc.saveas(filename)
-    print(f"Saved DXF to {filename}")
+def build_drawing(compartments):
+    """Lay out and label compartments as one drawing"""
+    rects = layout_compartments(compartments)
+    placements = place_labels([r[:4] for r in rects], [compartment_label(r) for r in rects])
+    return compartment_drawing(rects, placements)
 
-    # Create PNG preview using matplotlib
-    try:
-        # compute extents
-        if drawn_rects:
-            min_x = min(r[0] for r in drawn_rects) - padding
-            min_y = min(r[1] for r in drawn_rects) - padding
-            max_x = max(r[2] for r in drawn_rects) + padding
-            max_y = max(r[3] for r in drawn_rects) + padding
-        else:
-            min_x = min_y = 0
-            max_x = max_y = 1
-
-        # Add a small margin for preview (visual only)
-        margin_x = max(0.1, (max_x - min_x) * 0.02)
-        margin_y = max(0.1, (max_y - min_y) * 0.02)
-
-        width = max_x - min_x + 2 * margin_x
-        height = max_y - min_y + 2 * margin_y
-
-        # Choose figure size in inches (max cap) while keeping aspect ratio
-        max_fig_w = 12.0
-        fig_w = min(max_fig_w, max(4.0, width))
-        fig_h = max(3.0, fig_w * (height / max(width, 1e-6)))
-
-        fig = plt.figure(figsize=(fig_w, fig_h))
-        ax = fig.add_subplot(111)
-        for x1, y1, x2, y2, label in drawn_rects:
-            rect_w = x2 - x1
-            rect_h = y2 - y1
-            ax.add_patch(plt.Rectangle((x1, y1), rect_w, rect_h, fill=False, edgecolor='black', linewidth=1))
-            # place multi-line text inside if fits
-            cx = x1 + 0.05
-            cy = y2 - 0.05
-            vol = next((c['volume'] for c in compartments if c['name'] == label), None)
-            lines = [label, f"Vol: {vol:.3f} m^3" if vol is not None else "", f"{rect_w:.3f} x {rect_h:.3f} m"]
-            for i, ln in enumerate(lines):
-                ax.text(cx, cy - i * 0.12, ln, fontsize=8, verticalalignment='top', horizontalalignment='left')
-
-        ax.set_xlim(min_x - margin_x, max_x + margin_x)
-        ax.set_ylim(min_y - margin_y, max_y + margin_y)
-        ax.set_aspect('equal')
-        # keep normal axis orientation (no invert) so Y increases upwards
-        ax.axis('off')
-
-        png_name = filename.rsplit('.', 1)[0] + '.png'
-        fig.savefig(png_name, bbox_inches='tight', dpi=150)
-        plt.close(fig)
-        print(f"Saved PNG preview to {png_name}")
-    except Exception as e:
-        print(f"PNG preview failed: {e}")
+
+def compartment_label(rect):
+    """Label lines of a compartment (name, vol, dims)"""
+    _, _, _, _, name, w, h, vol = rect
+    return [f"{name}", f"Vol: {vol:.3f} m^3", f"W: {w:.3f} m", f"H: {h:.3f} m"]
+
+
+def compartment_drawing(rects, placements):
+    """Build the drawing of the compartments and their placed labels"""
+    drawing = Drawing()
+    for rect, placement in zip(rects, placements):
+        drawing.add_rect(*rect[:4])
+        th = placement["text_height"]
+        for line, insert in zip(compartment_label(rect), placement["inserts"]):
+            drawing.add_text(line, insert, th)
+        if placement["leader"]:
+            drawing.add_line(*placement["leader"])
+    return drawing
 
 
 if __name__ == "__main__":
@@ -0,0 +1,150 @@
+"""Collision-free placement of multi-line labels next to rectangles.
+
+Used by interactive_tank.py for both the DXF drawing and the PNG preview, so
+the two always agree. Occupied boxes (compartments and already placed
+labels) are kept in a uniform grid index; each label tries a short list of
+candidate positions - inside its rectangle first, then rings of positions
+around it - and takes the first one that collides with nothing. A label
+with no free candidate is retried with smaller text, then pushed out ring
+by ring until it is clear, so labels never overlap. Labels placed outside
+get a leader line back to their rectangle. Each query only looks at
+nearby grid cells, so placement is near-linear in the number of
+rectangles.
+"""
+import math
+from collections import defaultdict
+from itertools import count
+
+# Text width per character as a fraction of the text (cap) height
+CHAR_WIDTH = 0.8
+LINE_GAP = 0.02
+MARGIN = 0.05
+# Rings of outside candidates tried before shrinking the text
+MAX_RINGS = 6
+# Text shrink factor per retry and the smallest text height tried
+SHRINK = 0.75
+MIN_TEXT_HEIGHT = 0.05
+
+
+class GridIndex:
+    """Uniform grid of axis-aligned boxes (x1, y1, x2, y2)"""
+
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells = defaultdict(list)
+        self.boxes = []
+
+    def _cells(self, box):
+        s = self.cell_size
+        for i in range(math.floor(box[0] / s), math.floor(box[2] / s) + 1):
+            for j in range(math.floor(box[1] / s), math.floor(box[3] / s) + 1):
+                yield i, j
+
+    def insert(self, box, owner=None):
+        idx = len(self.boxes)
+        self.boxes.append((box, owner))
+        for cell in self._cells(box):
+            self.cells[cell].append(idx)
+
+    def collides(self, box, ignore_owner=None):
+        """True if box overlaps (with positive area) a stored box"""
+        seen = set()
+        for cell in self._cells(box):
+            for idx in self.cells.get(cell, ()):
+                if idx in seen:
+                    continue
+                seen.add(idx)
+                other, owner = self.boxes[idx]
+                if owner is not None and owner == ignore_owner:
+                    continue
+                if box[0] < other[2] and other[0] < box[2] and box[1] < other[3] and other[1] < box[3]:
+                    return True
+        return False
+
+
+def text_height_for(w, h, max_height=0.25):
+    """Text height used for a compartment of size w × h"""
+    return min(max_height, max(0.08, min(w, h) / 8.0))
+
+
+def label_size(lines, text_height):
+    width = max(len(line) for line in lines) * text_height * CHAR_WIDTH
+    height = len(lines) * text_height + (len(lines) - 1) * LINE_GAP
+    return width, height
+
+
+def _candidates(rect, bw, bh, rings):
+    x1, y1, x2, y2 = rect
+    # Inside, anchored at the top-left corner
+    yield x1 + MARGIN, y2 - MARGIN - bh, False
+    for ring in rings:
+        dx = ring * (bw + MARGIN)
+        dy = ring * (bh + MARGIN)
+        yield x1, y2 + MARGIN + dy, True  # above
+        yield x1, y1 - MARGIN - bh - dy, True  # below
+        yield x2 + MARGIN + dx, y2 - bh, True  # right
+        yield x1 - MARGIN - bw - dx, y2 - bh, True  # left
+        yield x2 + MARGIN + dx, y2 + MARGIN + dy, True  # above right
+        yield x1 - MARGIN - bw - dx, y1 - MARGIN - bh - dy, True  # below left
+
+
+def _free_box(index, owner, rect, bw, bh, rings):
+    """First candidate box clear of every placed box, or None"""
+    for bx, by, outside in _candidates(rect, bw, bh, rings):
+        box = (bx, by, bx + bw, by + bh)
+        # An inside label must fit in its rectangle; it may overlap it
+        if not outside and (box[2] > rect[2] or box[1] < rect[1]):
+            continue
+        if not index.collides(box, ignore_owner=None if outside else owner):
+            return box, outside
+    return None
+
+
+def place_labels(rects, labels, max_text_height=0.25):
+    """Place one multi-line label per rectangle, never overlapping another.
+
+    rects are (x1, y1, x2, y2) boxes and labels the matching lists of text
+    lines. Returns one dict per rectangle with the text height, the
+    baseline insert point of every line and an optional leader line
+    ((x, y), (x, y)) from the label to the rectangle.
+    """
+    sizes = []
+    for (x1, y1, x2, y2), lines in zip(rects, labels):
+        th = text_height_for(x2 - x1, y2 - y1, max_text_height)
+        sizes.append((th,) + label_size(lines, th))
+
+    # Cells about the size of a typical label keep queries local
+    typical = sorted(max(bw, bh) for _, bw, bh in sizes)
+    index = GridIndex(max(typical[len(typical) // 2], 1e-3) if typical else 1.0)
+    for owner, rect in enumerate(rects):
+        index.insert(rect, owner)
+
+    placements = []
+    for owner, (rect, lines, (th, bw, bh)) in enumerate(zip(rects, labels, sizes)):
+        chosen = _free_box(index, owner, rect, bw, bh, range(MAX_RINGS))
+        # Crowded: retry the candidates with smaller text
+        small = th
+        while chosen is None and small * SHRINK >= MIN_TEXT_HEIGHT:
+            small *= SHRINK
+            sw, sh = label_size(lines, small)
+            chosen = _free_box(index, owner, rect, sw, sh, range(MAX_RINGS))
+            if chosen is not None:
+                th, bw, bh = small, sw, sh
+        if chosen is None:
+            # Still nowhere free: move further out at full size; past the
+            # placed boxes every ring is clear, so this always ends
+            chosen = _free_box(index, owner, rect, bw, bh, count(MAX_RINGS))
+
+        box, outside = chosen
+        index.insert(box)
+        inserts = [(box[0], box[3] - th - idx * (th + LINE_GAP)) for idx in range(len(lines))]
+        leader = None
+        if outside:
+            cx = (rect[0] + rect[2]) / 2.0
+            cy = (rect[1] + rect[3]) / 2.0
+            # From the label's nearest point to the rectangle centre
+            lx = min(max(cx, box[0]), box[2])
+            ly = min(max(cy, box[1]), box[3])
+            leader = ((lx, ly), (cx, cy))
+        placements.append({"text_height": th, "inserts": inserts, "leader": leader, "box": box})
+    return placements
@@ -0,0 +1,196 @@
+"""Constraint-based room placement for the flat designer (arch.py, arch2.py).
+
+Each room gets a domain of candidate placements (x, y, w, h): every grid
+position of every room size with the required area (within
+AREA_TOLERANCE), a shorter side of at least the minimum dimension and an
+aspect ratio up to MAX_ASPECT. Rooms that must lie on the outer edge of
+the flat have their domain restricted up front. The search then places
+the room with the fewest remaining candidates first and, after each
+placement, filters every other domain with NumPy masks: candidates that
+overlap the placed room are dropped, as are candidates of its adjacency
+partners that do not share a wall with it. A branch is abandoned as soon
+as a domain empties or the remaining rooms no longer fit in the free
+area, so infeasible placements are pruned long before a layout is
+complete.
+
+Distinct layouts come from randomized restarts: each restart shuffles the
+domains and searches with a node budget until its first solution.
+"""
+import math
+import random
+
+import numpy as np
+
+GRID = 0.5
+AREA_TOLERANCE = 0.15
+MAX_ASPECT = 3.0
+# Shortest shared wall for two rooms to count as adjacent (a door width)
+MIN_SHARED_WALL = 0.9
+NODE_BUDGET = 2000
+EPS = 1e-6
+
+DEFAULT_ADJACENCY = (("Kitchen", "Living Room"), ("Toilet", "Bathroom"))
+DEFAULT_BOUNDARY = ("Balcony",)
+
+
+def room_sizes(area, min_dim, grid=GRID):
+    """Grid-aligned (w, h) sizes for a room, closest area first"""
+    sizes = []
+    smallest = np.ceil(max(min_dim, grid) / grid - EPS)
+    largest = np.floor(area * (1 + AREA_TOLERANCE) / max(min_dim, grid) / grid + EPS)
+    for w in np.arange(smallest, largest + 1) * grid:
+        h = max(np.ceil(area / w / grid - EPS), smallest) * grid
+        if min(w, h) >= min_dim - EPS and max(w, h) / min(w, h) <= MAX_ASPECT + EPS \
+                and w * h <= area * (1 + AREA_TOLERANCE) + EPS:
+            sizes.append((float(w), float(h)))
+    if not sizes:
+        # Tolerance too tight for the grid: take the smallest size that fits
+        side = np.ceil(max(min_dim, (area ** 0.5)) / grid - EPS) * grid
+        sizes.append((float(side), float(np.ceil(area / side / grid - EPS) * grid)))
+    return sorted(set(sizes), key=lambda s: s[0] * s[1])
+
+
+def room_domain(area, min_dim, flat_w, flat_h, on_boundary=False, grid=GRID):
+    """Candidate placements of a room as an (n, 4) array of x, y, w, h"""
+    blocks = []
+    for w, h in room_sizes(area, min_dim, grid):
+        if w > flat_w + EPS or h > flat_h + EPS:
+            continue
+        xs = np.arange(0.0, flat_w - w + EPS, grid)
+        ys = np.arange(0.0, flat_h - h + EPS, grid)
+        gx, gy = np.meshgrid(xs, ys, indexing="ij")
+        block = np.empty((gx.size, 4))
+        block[:, 0] = gx.ravel()
+        block[:, 1] = gy.ravel()
+        block[:, 2] = w
+        block[:, 3] = h
+        blocks.append(block)
+    domain = np.concatenate(blocks) if blocks else np.zeros((0, 4))
+    if on_boundary:
+        x, y, w, h = domain.T
+        edge = (x < EPS) | (y < EPS) | (x + w > flat_w - EPS) | (y + h > flat_h - EPS)
+        domain = domain[edge]
+    return domain
+
+
+def _overlaps(domain, placed):
+    px, py, pw, ph = placed
+    x, y, w, h = domain.T
+    return (x < px + pw - EPS) & (px < x + w - EPS) & (y < py + ph - EPS) & (py < y + h - EPS)
+
+
+def _shares_wall(domain, placed):
+    px, py, pw, ph = placed
+    x, y, w, h = domain.T
+    side = (np.abs(x + w - px) < EPS) | (np.abs(px + pw - x) < EPS)
+    y_shared = np.minimum(y + h, py + ph) - np.maximum(y, py)
+    top_bottom = (np.abs(y + h - py) < EPS) | (np.abs(py + ph - y) < EPS)
+    x_shared = np.minimum(x + w, px + pw) - np.maximum(x, px)
+    return (side & (y_shared >= MIN_SHARED_WALL - EPS)) | (top_bottom & (x_shared >= MIN_SHARED_WALL - EPS))
+
+
+class LayoutProblem:
+    """Rooms, flat outline and constraints of one layout request"""
+
+    def __init__(self, rooms, flat_w, flat_h, adjacency=DEFAULT_ADJACENCY, boundary=DEFAULT_BOUNDARY,
+                 grid=GRID):
+        # rooms: {name: (area, min_dim)}; constraints naming absent rooms are ignored
+        if not (math.isfinite(flat_w) and math.isfinite(flat_h) and flat_w > 0 and flat_h > 0):
+            raise ValueError(f"Flat size must be positive: {flat_w:g} × {flat_h:g} m")
+        bad = [name for name, (area, min_dim) in rooms.items()
+               if not (math.isfinite(area) and math.isfinite(min_dim) and area > 0 and min_dim >= 0)]
+        if bad:
+            raise ValueError(f"Rooms need a positive area and a non-negative minimum dimension: {', '.join(bad)}")
+        self.names = list(rooms)
+        self.flat_w = float(flat_w)
+        self.flat_h = float(flat_h)
+        self.neighbours = {name: set() for name in self.names}
+        for a, b in adjacency:
+            if a in rooms and b in rooms:
+                self.neighbours[a].add(b)
+                self.neighbours[b].add(a)
+        self.domains = {name: room_domain(area, min_dim, self.flat_w, self.flat_h, name in boundary, grid)
+                        for name, (area, min_dim) in rooms.items()}
+        self.min_areas = {name: float((d[:, 2] * d[:, 3]).min()) if len(d) else float("inf")
+                          for name, d in self.domains.items()}
+
+    def infeasible_rooms(self):
+        """Rooms that cannot be placed even on an empty flat"""
+        return [name for name, domain in self.domains.items() if not len(domain)]
+
+    def solve(self, rng, node_budget=NODE_BUDGET):
+        """First layout found from a shuffled search, or None"""
+        domains = {name: d[rng.permutation(len(d))] for name, d in self.domains.items()}
+        self._nodes = 0
+        return self._search({}, domains, self.flat_w * self.flat_h, node_budget)
+
+    def _search(self, layout, domains, free_area, node_budget):
+        if not domains:
+            return dict(layout)
+        self._nodes += 1
+        if self._nodes > node_budget:
+            return None
+        # Most constrained room first
+        name = min(domains, key=lambda n: len(domains[n]))
+        rest = {n: d for n, d in domains.items() if n != name}
+        for placement in domains[name]:
+            area = placement[2] * placement[3]
+            if sum(self.min_areas[n] for n in rest) > free_area - area + EPS:
+                continue
+            pruned = {}
+            for other, domain in rest.items():
+                keep = ~_overlaps(domain, placement)
+                if other in self.neighbours[name]:
+                    keep &= _shares_wall(domain, placement)
+                domain = domain[keep]
+                if not len(domain):
+                    break
+                pruned[other] = domain
+            else:
+                layout[name] = tuple(float(v) for v in placement)
+                found = self._search(layout, pruned, free_area - area, node_budget)
+                if found is not None:
+                    return found
+                del layout[name]
+            if self._nodes > node_budget:
+                return None
+        return None
+
+
+def generate_layouts(rooms, flat_w, flat_h, count=3, adjacency=DEFAULT_ADJACENCY, boundary=DEFAULT_BOUNDARY,
+                     attempts=None, seed=None):
+    """Return up to count distinct layouts, each {room: (x, y, w, h)}.
+
+    Every layout places all rooms. Raises ValueError naming the rooms that
+    cannot fit in the flat at all.
+    """
+    problem = LayoutProblem(rooms, flat_w, flat_h, adjacency, boundary)
+    missing = problem.infeasible_rooms()
+    if missing:
+        raise ValueError(f"Rooms do not fit in a {flat_w:g} × {flat_h:g} m flat: {', '.join(missing)}")
+    rng = np.random.default_rng(seed if seed is not None else random.randrange(2 ** 32))
+    layouts = []
+    seen = set()
+    for _ in range(attempts or count * 10):
+        layout = problem.solve(rng)
+        if layout is None:
+            continue
+        key = tuple(sorted(layout.items()))
+        if key not in seen:
+            seen.add(key)
+            layouts.append(layout)
+            if len(layouts) >= count:
+                break
+    return layouts
+
+
+def parse_pairs(text):
+    """Parse "Kitchen-Living Room, Toilet-Bathroom" into name pairs"""
+    pairs = []
+    for item in text.split(","):
+        if item.strip():
+            a, sep, b = item.partition("-")
+            if not sep:
+                raise ValueError(f"Adjacency rule needs two rooms separated by '-': {item.strip()}")
+            pairs.append((a.strip(), b.strip()))
+    return pairs
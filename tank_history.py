@@ -0,0 +1,157 @@
+"""Undo/redo history of project state built from shared immutable snapshots.
+
+A Snapshot holds the tank order and a PersistentMap of tank name -> record.
+PersistentMap splits its entries into hash buckets kept in a tuple; setting
+or deleting a key copies only the bucket tuple and the one bucket holding
+the key, and every other bucket is shared with the previous version. A
+history step that changes k tanks therefore costs O(k) buckets instead of
+a copy of the whole project. Records themselves are never mutated: a
+changed tank gets a new record, unchanged ones are shared by reference.
+"""
+from collections import namedtuple
+
+DEFAULT_LIMIT = 500
+# Target entries per bucket when a map is built
+BUCKET_SIZE = 16
+
+
+class PersistentMap:
+    """Immutable mapping with cheap modified copies"""
+
+    __slots__ = ("_buckets", "_len")
+
+    def __init__(self, items=(), buckets=None):
+        items = list(items.items() if hasattr(items, "items") else items)
+        count = buckets or max(8, 1 << max(0, (len(items) // BUCKET_SIZE).bit_length()))
+        lists = [{} for _ in range(count)]
+        for key, value in items:
+            lists[hash(key) % count][key] = value
+        self._buckets = tuple(lists)
+        self._len = sum(len(b) for b in lists)
+
+    @classmethod
+    def _from_buckets(cls, buckets, length):
+        new = cls.__new__(cls)
+        new._buckets = buckets
+        new._len = length
+        return new
+
+    def __len__(self):
+        return self._len
+
+    def __contains__(self, key):
+        return key in self._buckets[hash(key) % len(self._buckets)]
+
+    def __getitem__(self, key):
+        return self._buckets[hash(key) % len(self._buckets)][key]
+
+    def get(self, key, default=None):
+        return self._buckets[hash(key) % len(self._buckets)].get(key, default)
+
+    def __iter__(self):
+        for bucket in self._buckets:
+            yield from bucket
+
+    def items(self):
+        for bucket in self._buckets:
+            yield from bucket.items()
+
+    def evolve(self, changes=None, removals=()):
+        """Copy with keys set from changes and removals deleted"""
+        touched = {}
+        length = self._len
+        n = len(self._buckets)
+        for key, value in (changes or {}).items():
+            idx = hash(key) % n
+            bucket = touched.get(idx)
+            if bucket is None:
+                bucket = touched[idx] = dict(self._buckets[idx])
+            length += key not in bucket
+            bucket[key] = value
+        for key in removals:
+            idx = hash(key) % n
+            bucket = touched.get(idx)
+            if bucket is None:
+                bucket = touched[idx] = dict(self._buckets[idx])
+            if key in bucket:
+                del bucket[key]
+                length -= 1
+        if not touched:
+            return self
+        buckets = list(self._buckets)
+        for idx, bucket in touched.items():
+            buckets[idx] = bucket
+        return PersistentMap._from_buckets(tuple(buckets), length)
+
+    def set(self, key, value):
+        return self.evolve({key: value})
+
+    def delete(self, key):
+        return self.evolve(removals=(key,))
+
+
+class Snapshot(namedtuple("Snapshot", "order tanks")):
+    """Tank order (a tuple of names) and the tank records"""
+
+    __slots__ = ()
+
+    @classmethod
+    def build(cls, records):
+        """Snapshot of an ordered {name: record} mapping"""
+        return cls(tuple(records), PersistentMap(records))
+
+    def evolve(self, changes=None, removals=(), order=None):
+        tanks = self.tanks.evolve(changes, removals)
+        order = self.order if order is None or order == self.order else tuple(order)
+        if tanks is self.tanks and order is self.order:
+            return self
+        return Snapshot(order, tanks)
+
+    def records(self):
+        """(name, record) pairs in tank order"""
+        return [(name, self.tanks[name]) for name in self.order]
+
+
+class History:
+    """Undo and redo stacks of snapshots plus named checkpoints"""
+
+    def __init__(self, initial, limit=DEFAULT_LIMIT):
+        self.undo_stack = [initial]
+        self.redo_stack = []
+        self.checkpoints = {}
+        self.limit = limit
+
+    @property
+    def current(self):
+        return self.undo_stack[-1]
+
+    def push(self, snapshot):
+        if snapshot is self.current:
+            return False
+        self.undo_stack.append(snapshot)
+        self.redo_stack.clear()
+        if len(self.undo_stack) > self.limit:
+            del self.undo_stack[0]
+        return True
+
+    def undo(self):
+        """Step back; return the snapshot to restore, or None"""
+        if len(self.undo_stack) < 2:
+            return None
+        self.redo_stack.append(self.undo_stack.pop())
+        return self.current
+
+    def redo(self):
+        if not self.redo_stack:
+            return None
+        self.undo_stack.append(self.redo_stack.pop())
+        return self.current
+
+    def checkpoint(self, name):
+        self.checkpoints[name] = self.current
+
+    def restore(self, name):
+        """Make a checkpoint the current state (itself an undoable step)"""
+        snapshot = self.checkpoints[name]
+        self.push(snapshot)
+        return snapshot
@@ -0,0 +1,306 @@
+"""3-D meshes of tanks and compartment blocks, written as STL, OBJ or glTF.
+
+Every solid is built from axis-aligned boxes: a tank shell is a floor slab
+plus four walls of the wall thickness around the internal L × W × D
+cavity, the water is a box up to the fill level, and compartment blocks
+add partition walls between neighbouring compartments. All boxes of a
+batch are expanded from one unit-cube template with NumPy broadcasting
+into float32 vertex and uint32 index buffers, so a tank farm of thousands
+of tanks becomes one mesh without a Python loop per triangle.
+
+Coordinates are in meters with z up; the glTF writer converts to its y-up
+convention.
+
+Usage:
+    python tank_mesh.py PROJECT_OR_SPEC.json OUT.(glb|stl|obj) [--option N]
+"""
+import argparse
+import json
+import math
+import os
+import struct
+from pathlib import Path
+
+import numpy as np
+
+from geometry_ir import partial_path
+from tank_quantities import DEFAULT_FILL_FRACTION, DEFAULT_WALL_THICKNESS
+from tank_validation import TANK_SCHEMA
+
+# Unit cube corners and outward-facing (counter-clockwise) triangles
+_CUBE = np.array([[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0],
+                  [0, 0, 1], [1, 0, 1], [1, 1, 1], [0, 1, 1]], dtype=np.float32)
+_CUBE_FACES = np.array([[0, 2, 1], [0, 3, 2],  # bottom
+                        [4, 5, 6], [4, 6, 7],  # top
+                        [0, 1, 5], [0, 5, 4],  # front (y = 0)
+                        [1, 2, 6], [1, 6, 5],  # right (x = 1)
+                        [2, 3, 7], [2, 7, 6],  # back (y = 1)
+                        [3, 0, 4], [3, 4, 7]], dtype=np.uint32)  # left (x = 0)
+
+# RGBA colors of the mesh parts in glTF output
+PART_COLORS = {
+    "shell": (0.75, 0.75, 0.72, 1.0),
+    "water": (0.2, 0.45, 0.9, 0.5),
+    "walls": (0.6, 0.6, 0.58, 1.0),
+}
+# Clear distance between tanks laid out as a farm (m)
+FARM_SPACING = 2.0
+
+
+def box_mesh(mins, maxs):
+    """Vertices and triangles of a batch of boxes given (k, 3) corner arrays"""
+    mins = np.asarray(mins, dtype=np.float32).reshape(-1, 3)
+    maxs = np.asarray(maxs, dtype=np.float32).reshape(-1, 3)
+    vertices = (mins[:, None, :] + _CUBE[None] * (maxs - mins)[:, None, :]).reshape(-1, 3)
+    offsets = (np.arange(len(mins), dtype=np.uint32) * 8)[:, None, None]
+    faces = (_CUBE_FACES[None] + offsets).reshape(-1, 3)
+    return vertices, faces
+
+
+def tank_meshes(origins, lengths, widths, depths, wall_thickness=DEFAULT_WALL_THICKNESS,
+                fill_fraction=DEFAULT_FILL_FRACTION):
+    """Shell and water meshes of a batch of tanks.
+
+    origins is a (k, 2) array of the internal corner of each tank. Returns
+    {"shell": (vertices, faces), "water": (vertices, faces)}.
+    """
+    origins = np.asarray(origins, dtype=np.float64).reshape(-1, 2)
+    x, y = origins[:, 0], origins[:, 1]
+    L = np.asarray(lengths, dtype=np.float64)
+    W = np.asarray(widths, dtype=np.float64)
+    D = np.asarray(depths, dtype=np.float64)
+    t = float(wall_thickness)
+    zero = np.zeros_like(x)
+
+    # Floor, left, right, front and back wall of every tank: (5, k, 3)
+    mins = np.stack([
+        np.stack([x - t, y - t, zero - t], -1),
+        np.stack([x - t, y - t, zero], -1),
+        np.stack([x + L, y - t, zero], -1),
+        np.stack([x, y - t, zero], -1),
+        np.stack([x, y + W, zero], -1),
+    ])
+    maxs = np.stack([
+        np.stack([x + L + t, y + W + t, zero], -1),
+        np.stack([x, y + W + t, D], -1),
+        np.stack([x + L + t, y + W + t, D], -1),
+        np.stack([x + L, y, D], -1),
+        np.stack([x + L, y + W + t, D], -1),
+    ])
+    # Keep the boxes of one tank together in the buffers
+    shell = box_mesh(mins.transpose(1, 0, 2), maxs.transpose(1, 0, 2))
+    water = box_mesh(np.stack([x, y, zero], -1), np.stack([x + L, y + W, D * fill_fraction], -1))
+    return {"shell": shell, "water": water}
+
+
+def farm_origins(lengths, widths, spacing=FARM_SPACING, wall_thickness=DEFAULT_WALL_THICKNESS):
+    """Lay tanks out on a square grid of cells sized for the largest tank"""
+    lengths = np.asarray(lengths, dtype=np.float64)
+    widths = np.asarray(widths, dtype=np.float64)
+    if not len(lengths):
+        return np.zeros((0, 2))
+    columns = math.ceil(math.sqrt(len(lengths)))
+    cell_x = lengths.max() + 2 * wall_thickness + spacing
+    cell_y = widths.max() + 2 * wall_thickness + spacing
+    idx = np.arange(len(lengths))
+    return np.stack([(idx % columns) * cell_x, (idx // columns) * cell_y], -1)
+
+
+def compartment_meshes(rects, depth, fixed_choice, wall_thickness=DEFAULT_WALL_THICKNESS,
+                       fill_fraction=DEFAULT_FILL_FRACTION):
+    """Shell, partition walls and water of an interactive_tank compartment block.
+
+    rects are the layout_compartments() tuples; partitions are centred on
+    the edges shared by consecutive compartments.
+    """
+    boxes = np.asarray([r[:4] for r in rects], dtype=np.float64).reshape(-1, 4)
+    x1, y1 = boxes[:, 0].min(), boxes[:, 1].min()
+    x2, y2 = boxes[:, 2].max(), boxes[:, 3].max()
+    parts = tank_meshes([(x1, y1)], [x2 - x1], [y2 - y1], [depth], wall_thickness, fill_fraction)
+    parts["water"] = box_mesh(np.column_stack([boxes[:, 0], boxes[:, 1], np.zeros(len(boxes))]),
+                              np.column_stack([boxes[:, 2], boxes[:, 3], np.full(len(boxes), depth * fill_fraction)]))
+
+    half = wall_thickness / 2.0
+    shared = boxes[:-1]
+    if len(shared):
+        if fixed_choice == "width":
+            # Compartments run along x: walls at each right edge
+            mins = np.column_stack([shared[:, 2] - half, shared[:, 1], np.zeros(len(shared))])
+            maxs = np.column_stack([shared[:, 2] + half, shared[:, 3], np.full(len(shared), depth)])
+        else:
+            mins = np.column_stack([shared[:, 0], shared[:, 3] - half, np.zeros(len(shared))])
+            maxs = np.column_stack([shared[:, 2], shared[:, 3] + half, np.full(len(shared), depth)])
+        parts["walls"] = box_mesh(mins, maxs)
+    return parts
+
+
+def merge(parts):
+    """Concatenate (vertices, faces) meshes into one"""
+    vertices = []
+    faces = []
+    base = 0
+    for v, f in parts:
+        vertices.append(v)
+        faces.append(f + np.uint32(base))
+        base += len(v)
+    return np.concatenate(vertices), np.concatenate(faces)
+
+
+def write_stl(path, parts):
+    """Binary STL of all parts"""
+    vertices, faces = merge(parts.values())
+    tri = vertices[faces]  # (m, 3, 3)
+    normals = np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
+    lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+    normals = normals / np.where(lengths == 0, 1, lengths)
+    record = np.dtype([("normal", "<f4", 3), ("vertices", "<f4", (3, 3)), ("attr", "<u2")])
+    data = np.zeros(len(faces), dtype=record)
+    data["normal"] = normals
+    data["vertices"] = tri
+    with open(path, 'wb') as fh:
+        fh.write(b"water tank mesh".ljust(80, b" "))
+        fh.write(struct.pack("<I", len(faces)))
+        data.tofile(fh)
+
+
+def write_obj(path, parts):
+    """Wavefront OBJ with one object per part"""
+    base = 1
+    with open(path, 'w') as fh:
+        for name, (vertices, faces) in parts.items():
+            fh.write(f"o {name}\n")
+            np.savetxt(fh, vertices, fmt="v %.4f %.4f %.4f")
+            np.savetxt(fh, faces.astype(np.int64) + base, fmt="f %d %d %d")
+            base += len(vertices)
+
+
+def write_glb(path, parts):
+    """Binary glTF 2.0 with one mesh node and material per part"""
+    doc = {"asset": {"version": "2.0", "generator": "water-tank tank_mesh"},
+           "scene": 0, "scenes": [{"nodes": list(range(len(parts)))}],
+           "nodes": [], "meshes": [], "materials": [], "accessors": [], "bufferViews": []}
+    chunks = []
+    offset = 0
+    for i, (name, (vertices, faces)) in enumerate(parts.items()):
+        # z-up meters -> glTF y-up
+        positions = np.ascontiguousarray(np.column_stack([vertices[:, 0], vertices[:, 2], -vertices[:, 1]]),
+                                         dtype=np.float32)
+        indices = np.ascontiguousarray(faces, dtype=np.uint32).reshape(-1)
+        for data, target in ((positions, 34962), (indices, 34963)):
+            doc["bufferViews"].append({"buffer": 0, "byteOffset": offset, "byteLength": data.nbytes,
+                                       "target": target})
+            chunks.append(data.tobytes())
+            offset += data.nbytes
+        doc["accessors"].append({"bufferView": 2 * i, "componentType": 5126, "count": len(positions),
+                                 "type": "VEC3", "min": positions.min(0).tolist(),
+                                 "max": positions.max(0).tolist()})
+        doc["accessors"].append({"bufferView": 2 * i + 1, "componentType": 5125, "count": len(indices),
+                                 "type": "SCALAR"})
+        color = PART_COLORS.get(name, (0.7, 0.7, 0.7, 1.0))
+        material = {"name": name, "pbrMetallicRoughness": {"baseColorFactor": list(color),
+                                                           "metallicFactor": 0.0}}
+        if color[3] < 1.0:
+            material["alphaMode"] = "BLEND"
+        doc["materials"].append(material)
+        doc["meshes"].append({"name": name, "primitives": [
+            {"attributes": {"POSITION": 2 * i}, "indices": 2 * i + 1, "material": i}]})
+        doc["nodes"].append({"mesh": i, "name": name})
+    doc["buffers"] = [{"byteLength": offset}]
+
+    json_chunk = json.dumps(doc, separators=(",", ":")).encode()
+    json_chunk += b" " * (-len(json_chunk) % 4)
+    bin_chunk = b"".join(chunks)
+    bin_chunk += b"\0" * (-len(bin_chunk) % 4)
+    with open(path, 'wb') as fh:
+        fh.write(struct.pack("<III", 0x46546C67, 2, 12 + 8 + len(json_chunk) + 8 + len(bin_chunk)))
+        fh.write(struct.pack("<II", len(json_chunk), 0x4E4F534A))
+        fh.write(json_chunk)
+        fh.write(struct.pack("<II", len(bin_chunk), 0x004E4942))
+        fh.write(bin_chunk)
+
+
+# Mesh writers by file suffix
+MESH_WRITERS = {
+    ".stl": write_stl,
+    ".obj": write_obj,
+    ".glb": write_glb,
+}
+
+
+def write_mesh(path, parts):
+    """Write the non-empty parts; a partial file never replaces an existing mesh"""
+    writer = MESH_WRITERS.get(Path(path).suffix.lower())
+    if writer is None:
+        raise ValueError(f"No mesh writer for {path} (use {', '.join(MESH_WRITERS)})")
+    parts = {name: mesh for name, mesh in parts.items() if len(mesh[1])}
+    if not parts:
+        raise ValueError(f"Nothing to write to {path}: the mesh is empty")
+    tmp = partial_path(path)
+    try:
+        writer(tmp, parts)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def option_meshes(option, wall_thickness=DEFAULT_WALL_THICKNESS, fill_fraction=DEFAULT_FILL_FRACTION):
+    """Meshes of a single design option from tank_sizing"""
+    return tank_meshes([(0.0, 0.0)], [option["length"]], [option["width"]], [option["depth"]],
+                       wall_thickness, fill_fraction)
+
+
+def farm_meshes(tanks, option_index=1, wall_thickness=DEFAULT_WALL_THICKNESS,
+                fill_fraction=DEFAULT_FILL_FRACTION):
+    """Meshes of a project's tanks, each sized to one design option, on a grid"""
+    from tank_sizing import design_options
+
+    dims = np.asarray([(o["length"], o["width"], o["depth"]) for o in
+                       (design_options(float(t["volume"]), float(t["depth"]))[option_index] for t in tanks)],
+                      dtype=np.float64).reshape(-1, 3)
+    origins = farm_origins(dims[:, 0], dims[:, 1], wall_thickness=wall_thickness)
+    return tank_meshes(origins, dims[:, 0], dims[:, 1], dims[:, 2], wall_thickness, fill_fraction)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export tanks or compartment blocks as 3-D meshes")
+    parser.add_argument("source", help="Project file (tank farm) or interactive_tank spec file (compartments)")
+    parser.add_argument("output", help="Output mesh (.glb, .stl or .obj)")
+    parser.add_argument("--option", type=int, default=1,
+                        help="Design option index per tank: 0 square, 1 rectangular 2:1, 2 rectangular 3:1")
+    parser.add_argument("--wall-thickness", type=float, default=DEFAULT_WALL_THICKNESS)
+    parser.add_argument("--fill-fraction", type=float, default=DEFAULT_FILL_FRACTION)
+    args = parser.parse_args()
+
+    with open(args.source) as fh:
+        data = json.load(fh)
+    if isinstance(data, dict) and ("compartments" in data or "auto" in data):
+        from interactive_tank import layout_compartments, load_spec
+
+        compartments, _ = load_spec(args.source)
+        parts = compartment_meshes(layout_compartments(compartments), compartments[0]["depth"],
+                                   compartments[0]["fixed_choice"], args.wall_thickness, args.fill_fraction)
+    else:
+        from tank_project import normalize_tanks
+
+        try:
+            tanks = normalize_tanks(data)
+        except (ValueError, TypeError) as e:
+            parser.error(str(e))
+        report = TANK_SCHEMA.validate(tanks)
+        if not report.ok:
+            parser.error(f"invalid tanks:\n{report.format()}")
+        if not tanks:
+            parser.error(f"{args.source} holds no tanks")
+        parts = farm_meshes(tanks, args.option, args.wall_thickness, args.fill_fraction)
+
+    try:
+        write_mesh(args.output, parts)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    triangles = sum(len(f) for _, f in parts.values())
+    print(f"Wrote {args.output} ({triangles} triangles)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""Snap tank options to standard prefabricated panel sizes.
+
+Sectional GRP and steel tanks are assembled from square panels of one
+module size: a buildable tank is nL × nW modules in plan and one of the
+supplier's standard heights. A PanelCatalogue enumerates every buildable
+(nL, nW, height) and keeps them sorted by volume (then by panel count), so
+the smallest standard tanks holding a volume are found with one
+searchsorted over the whole batch.
+
+snap() keeps the shape of an option instead: the depth snaps to the
+nearest standard height, and the plan becomes an nL × nW grid at that
+height holding the option's volume. Only the panel widths around the
+ideal width for the option's length:width ratio are tried (SNAP_WIDTHS);
+the one needing the fewest plan panels wins, ties going to the ratio
+closest to the option's. A batch is therefore snapped with a few array
+operations whatever its size. An option whose proportions do not fit the
+largest plan at any height falls back to the smallest standard tank of
+its volume; options too large for every tank in the catalogue are
+returned with zero panels.
+
+Usage:
+    python tank_panels.py [--project FILE] [--system grp-metric] [--output panels.csv]
+    python tank_panels.py --volume 45 [--system steel]
+"""
+import argparse
+import csv
+import sys
+import time
+from functools import lru_cache
+
+import numpy as np
+
+from tank_project import DEFAULT_TANKS, load_project
+from tank_sizing import DEFAULT_RATIOS
+
+# Square panel module (m), standard heights (m) and largest plan side in panels
+CATALOGUES = {
+    "grp-metric": {"module": 1.0, "heights": (1.0, 1.5, 2.0, 2.5, 3.0, 3.5, 4.0), "max_panels": 40},
+    "grp-imperial": {"module": 1.22, "heights": (1.22, 2.44, 3.66, 4.88), "max_panels": 32},
+    "steel": {"module": 1.22, "heights": (1.22, 2.44, 3.66, 4.88, 6.1), "max_panels": 32},
+}
+DEFAULT_SYSTEM = "grp-metric"
+# Longest allowed length:width ratio of a standard tank
+MAX_RATIO = 3
+EPS = 1e-9
+# Panel widths tried by snap(), as offsets from the floor of the ideal width
+SNAP_WIDTHS = (-1, 0, 1, 2)
+
+PANEL_FIELDS = ("length", "width", "depth", "volume", "panels_long", "panels_wide", "panel_rows",
+                "wall_panels", "base_panels", "roof_panels", "total_panels")
+
+
+class PanelCatalogue:
+    """Every buildable tank of one panel system, sorted by volume"""
+
+    def __init__(self, module, heights, max_panels, max_ratio=MAX_RATIO):
+        self.module = float(module)
+        self.heights = np.sort(np.asarray(heights, dtype=float))
+        self.max_panels = int(max_panels)
+        # Wall panels per column; a part-height top row still takes a panel
+        self.rows = np.ceil(self.heights / self.module - EPS).astype(np.int64)
+
+        n_wide, n_long = np.triu_indices(self.max_panels)
+        n_wide, n_long = n_wide + 1, n_long + 1
+        keep = n_long <= n_wide * max_ratio
+        n_long, n_wide = n_long[keep], n_wide[keep]
+        h = np.repeat(np.arange(len(self.heights)), len(n_long))
+        n_long, n_wide = np.tile(n_long, len(self.heights)), np.tile(n_wide, len(self.heights))
+        volume = n_long * n_wide * self.module ** 2 * self.heights[h]
+        panels = self._panel_counts(n_long, n_wide, h)["total_panels"]
+        order = np.lexsort((panels, volume))
+        self.volumes = volume[order]
+        self.table = (n_long[order], n_wide[order], h[order])
+
+    def _panel_counts(self, n_long, n_wide, h):
+        rows = self.rows[h]
+        wall = 2 * (n_long + n_wide) * rows
+        base = n_long * n_wide
+        return {"panel_rows": rows, "wall_panels": wall, "base_panels": base, "roof_panels": base,
+                "total_panels": wall + 2 * base}
+
+    def _result(self, n_long, n_wide, h, valid):
+        n_long = np.where(valid, n_long, 0)
+        n_wide = np.where(valid, n_wide, 0)
+        result = {
+            "length": n_long * self.module,
+            "width": n_wide * self.module,
+            "depth": np.where(valid, self.heights[h], 0.0),
+            "panels_long": n_long,
+            "panels_wide": n_wide,
+        }
+        result["volume"] = result["length"] * result["width"] * result["depth"]
+        counts = self._panel_counts(n_long, n_wide, h)
+        counts["panel_rows"] = np.where(valid, counts["panel_rows"], 0)
+        counts["wall_panels"] = np.where(valid, counts["wall_panels"], 0)
+        result.update(counts)
+        return result
+
+    def _smallest(self, volumes):
+        idx = np.searchsorted(self.volumes, volumes - EPS)
+        valid = idx < len(self.volumes)
+        idx = np.minimum(idx, len(self.volumes) - 1)
+        n_long, n_wide, h = (column[idx] for column in self.table)
+        return n_long, n_wide, h, valid
+
+    def smallest(self, volumes):
+        """Smallest standard tank holding each volume (fewest panels on ties)"""
+        return self._result(*self._smallest(np.atleast_1d(np.asarray(volumes, dtype=float))))
+
+    def snap(self, lengths, widths, depths):
+        """Standard tank close in shape to each option, holding at least its volume.
+
+        The returned length is the longer plan side.
+        """
+        lengths, widths, depths = np.broadcast_arrays(*(np.atleast_1d(np.asarray(a, dtype=float))
+                                                        for a in (lengths, widths, depths)))
+        long_side = np.maximum(lengths, widths)
+        short_side = np.minimum(lengths, widths)
+        ratio = long_side / short_side
+        volume = lengths * widths * depths
+
+        # Nearest standard height
+        h = np.clip(np.searchsorted(self.heights, depths), 1, len(self.heights) - 1) if len(self.heights) > 1 \
+            else np.zeros(len(depths), dtype=np.int64)
+        if len(self.heights) > 1:
+            h -= depths - self.heights[h - 1] <= self.heights[h] - depths
+        n_long = np.zeros(len(depths), dtype=np.int64)
+        n_wide = np.zeros(len(depths), dtype=np.int64)
+        valid = np.zeros(len(depths), dtype=bool)
+        todo = np.ones(len(depths), dtype=bool)
+        # Step up a height where the plan would exceed max_panels
+        while todo.any():
+            i = np.flatnonzero(todo)
+            cells = volume[i] / (self.heights[h[i]] * self.module ** 2)
+            ideal = np.sqrt(cells / ratio[i])
+            best_l = np.zeros(len(i), dtype=np.int64)
+            best_w = np.zeros(len(i), dtype=np.int64)
+            best_key = np.full((len(i), 2), np.inf)
+            for offset in SNAP_WIDTHS:
+                w = np.clip(np.floor(ideal) + offset, 1, self.max_panels).astype(np.int64)
+                l = np.maximum(np.ceil(cells / w - EPS).astype(np.int64), w)
+                ok = l <= self.max_panels
+                area = np.where(ok, l * w, np.inf)
+                misfit = np.abs(l / w - ratio[i])
+                better = (area < best_key[:, 0]) | ((area == best_key[:, 0]) & (misfit < best_key[:, 1]))
+                best_l = np.where(better, l, best_l)
+                best_w = np.where(better, w, best_w)
+                best_key = np.where(better[:, None], np.column_stack([area, misfit]), best_key)
+            found = np.isfinite(best_key[:, 0])
+            n_long[i], n_wide[i] = best_l, best_w
+            valid[i[found]] = True
+            todo[i[found]] = False
+            stuck = i[~found]
+            last = h[stuck] >= len(self.heights) - 1
+            todo[stuck[last]] = False
+            h[stuck[~last]] += 1
+        misfits = np.flatnonzero(~valid)
+        if len(misfits):
+            n_long[misfits], n_wide[misfits], h[misfits], valid[misfits] = self._smallest(volume[misfits])
+        return self._result(n_long, n_wide, h, valid)
+
+
+@lru_cache(maxsize=None)
+def catalogue(system=DEFAULT_SYSTEM):
+    """The shared catalogue of a panel system in CATALOGUES"""
+    if system not in CATALOGUES:
+        raise ValueError(f"Unknown panel system '{system}' (choose from {', '.join(CATALOGUES)})")
+    return PanelCatalogue(**CATALOGUES[system])
+
+
+def _rows(result):
+    """Split a dict of arrays into one dict of plain numbers per tank"""
+    columns = [result[name].tolist() for name in PANEL_FIELDS]
+    return [dict(zip(PANEL_FIELDS, row)) for row in zip(*columns)]
+
+
+def snap_option(option, system=DEFAULT_SYSTEM):
+    """Standard panel tank for one design option"""
+    return _rows(catalogue(system).snap(option["length"], option["width"], option["depth"]))[0]
+
+
+def format_panels(p, system=DEFAULT_SYSTEM):
+    """Human-readable summary used by the GUI"""
+    if not p["total_panels"]:
+        return f"Standard Panel Tank ({system}): larger than the catalogue"
+    return (
+        f"Standard Panel Tank ({system}): {p['length']:.2f} × {p['width']:.2f} × {p['depth']:.2f} m "
+        f"({p['volume']:.2f} m³)\n"
+        f"Panels: {p['panels_long']} × {p['panels_wide']} plan, {p['panel_rows']} rows high - "
+        f"{p['wall_panels']} wall, {p['base_panels']} base, {p['roof_panels']} roof ({p['total_panels']} total)"
+    )
+
+
+def batch_options(volumes, depths, ratios=DEFAULT_RATIOS):
+    """Option dimensions (length, width, depth) of every tank and ratio, as flat arrays.
+
+    Same sizing as tank_sizing.design_options, without building drawings;
+    rows are ordered tank by tank, ratio by ratio.
+    """
+    volumes = np.asarray(volumes, dtype=float)
+    depths = np.asarray(depths, dtype=float)
+    area = (volumes / depths)[:, None]
+    ratio = np.asarray(ratios, dtype=float)[None, :]
+    length = np.sqrt(area * ratio)
+    width = area / length
+    return length.ravel(), width.ravel(), np.repeat(depths, len(ratios))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Snap tank options to standard panel sizes")
+    parser.add_argument("--project", help="Project file with the tanks (default: the standard tanks)")
+    parser.add_argument("--system", default=DEFAULT_SYSTEM, choices=sorted(CATALOGUES), help="Panel system")
+    parser.add_argument("--volume", type=float, nargs="+", help="List the smallest standard tanks for these volumes")
+    parser.add_argument("--output", help="Write the snapped options to this CSV file")
+    args = parser.parse_args()
+    panels = catalogue(args.system)
+
+    if args.volume:
+        for volume, p in zip(args.volume, _rows(panels.smallest(args.volume))):
+            print(f"{volume:g} m³ -> " + format_panels(p, args.system).replace("\n", "; "))
+        return
+
+    tanks = load_project(args.project) if args.project else DEFAULT_TANKS
+    named = []
+    for tank in tanks:
+        try:
+            depth, volume = float(tank["depth"]), float(tank["volume"])
+        except (KeyError, TypeError, ValueError):
+            print(f"Skipping {tank['name']}: invalid parameters")
+            continue
+        if depth > 0 and volume > 0:
+            named.append((tank["name"], volume, depth))
+    if not named:
+        return
+    started = time.perf_counter()
+    names, volumes, depths = zip(*named)
+    lengths, widths, option_depths = batch_options(volumes, depths)
+    rows = _rows(panels.snap(lengths, widths, option_depths))
+    print(f"Snapped {len(rows)} options in {(time.perf_counter() - started) * 1000:.0f} ms", file=sys.stderr)
+
+    fh = open(args.output, "w", newline="") if args.output else sys.stdout
+    try:
+        writer = csv.writer(fh)
+        writer.writerow(("tank_name", "aspect_ratio", "required_volume") + PANEL_FIELDS)
+        for i, row in enumerate(rows):
+            tank = i // len(DEFAULT_RATIOS)
+            writer.writerow((names[tank], f"{DEFAULT_RATIOS[i % len(DEFAULT_RATIOS)]:g}:1", volumes[tank])
+                            + tuple(row[name] for name in PANEL_FIELDS))
+    finally:
+        if args.output:
+            fh.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Project files describing the tanks of a building.
+
+A project file is JSON of the form::
+
+    {"tanks": [{"name": "Domestic Tank", "depth": 2.5, "volume": 10.0,
+                "color": "lightblue"}, ...]}
+
+The older headless input format, a mapping of tank name to
+{"depth": ..., "volume": ...}, is accepted as well.
+"""
+import json
+from itertools import cycle
+
+# Colors given to tanks that do not define one
+PALETTE = ("lightblue", "lightgreen", "lightcoral", "lightsalmon", "khaki",
+           "plum", "lightcyan", "wheat", "palegreen", "lightpink")
+
+DEFAULT_TANKS = [
+    {"name": "Domestic Tank", "depth": 2.5, "volume": 10.0, "color": "lightblue"},
+    {"name": "Flushing Tank", "depth": 1.5, "volume": 5.0, "color": "lightgreen"},
+    {"name": "Fire Tank 1", "depth": 3.0, "volume": 50.0, "color": "lightcoral"},
+    {"name": "Fire Tank 2", "depth": 4.0, "volume": 100.0, "color": "lightsalmon"},
+]
+
+
+def normalize_tanks(data):
+    """Return the tank list of parsed project data, in file order"""
+    if isinstance(data, dict) and "tanks" in data:
+        items = data["tanks"]
+    elif isinstance(data, dict):
+        items = [dict(params, name=name) for name, params in data.items()]
+    else:
+        items = data
+
+    tanks = []
+    seen = set()
+    colors = cycle(PALETTE)
+    for idx, item in enumerate(items, start=1):
+        name = str(item.get("name") or f"Tank {idx}")
+        if name in seen:
+            raise ValueError(f"Duplicate tank name in project: {name}")
+        seen.add(name)
+        # Keep optional keys such as "kind" and "daily_demand"
+        tank = dict(item)
+        tank.update({
+            "name": name,
+            "depth": item.get("depth"),
+            "volume": item.get("volume"),
+            "color": item.get("color") or next(colors),
+        })
+        tanks.append(tank)
+    return tanks
+
+
+def load_project(path):
+    """Load the tank list of a project file"""
+    with open(path, 'r') as fh:
+        return normalize_tanks(json.load(fh))
+
+
+def save_project(path, tanks):
+    """Write a tank list as a project file"""
+    with open(path, 'w') as fh:
+        json.dump({"tanks": [dict(t) for t in tanks]}, fh, indent=2)
+
+
+def tank_inputs(tanks):
+    """Convert a tank list into the {name: {"depth", "volume"}} export input"""
+    return {t["name"]: {"depth": t["depth"], "volume": t["volume"]} for t in tanks}
@@ -0,0 +1,113 @@
+"""Structural and hydraulic quantities derived from tank dimensions.
+
+Every function works on NumPy arrays so all tanks and options of a project
+are evaluated in one call; scalars are accepted as well.
+"""
+import numpy as np
+
+WATER_DENSITY = 1000.0  # kg/m³
+GRAVITY = 9.81  # m/s²
+
+# Operating water level as a fraction of the tank depth
+DEFAULT_FILL_FRACTION = 0.8
+# Concrete wall and floor thickness (m)
+DEFAULT_WALL_THICKNESS = 0.2
+# Inlet and outlet flow rates (m³/h)
+DEFAULT_INFLOW_RATE = 10.0
+DEFAULT_OUTFLOW_RATE = 20.0
+
+QUANTITY_NAMES = (
+    "base_area",
+    "surface_area",
+    "water_depth",
+    "effective_volume",
+    "freeboard",
+    "max_wall_pressure",
+    "wall_thrust",
+    "wall_concrete_volume",
+    "floor_concrete_volume",
+    "fill_time",
+    "drain_time",
+)
+
+
+def derived_quantities(length, width, depth,
+                       fill_fraction=DEFAULT_FILL_FRACTION,
+                       wall_thickness=DEFAULT_WALL_THICKNESS,
+                       floor_thickness=None,
+                       inflow_rate=DEFAULT_INFLOW_RATE,
+                       outflow_rate=DEFAULT_OUTFLOW_RATE):
+    """Return a dict of arrays with the derived quantities of each tank.
+
+    Units: areas m², volumes m³, pressure kPa at the wall base, wall thrust
+    kN per metre of wall, fill/drain times in hours. floor_thickness
+    defaults to the wall thickness.
+    """
+    length = np.asarray(length, dtype=float)
+    width = np.asarray(width, dtype=float)
+    depth = np.asarray(depth, dtype=float)
+    t = np.asarray(wall_thickness, dtype=float)
+    tf = t if floor_thickness is None else np.asarray(floor_thickness, dtype=float)
+
+    base_area = length * width
+    water_depth = depth * fill_fraction
+    effective_volume = base_area * water_depth
+    pressure = WATER_DENSITY * GRAVITY * water_depth  # Pa
+    outer_area = (length + 2 * t) * (width + 2 * t)
+
+    with np.errstate(divide="ignore"):
+        fill_time = effective_volume / np.asarray(inflow_rate, dtype=float)
+        drain_time = effective_volume / np.asarray(outflow_rate, dtype=float)
+
+    return {
+        "base_area": base_area,
+        "surface_area": 2 * (length + width) * depth,
+        "water_depth": water_depth,
+        "effective_volume": effective_volume,
+        "freeboard": depth - water_depth,
+        "max_wall_pressure": pressure / 1000.0,
+        "wall_thrust": 0.5 * pressure * water_depth / 1000.0,
+        "wall_concrete_volume": (outer_area - base_area) * depth,
+        "floor_concrete_volume": outer_area * tf,
+        "fill_time": fill_time,
+        "drain_time": drain_time,
+    }
+
+
+def option_quantities(design_options, **params):
+    """Evaluate all options of all tanks in one batch.
+
+    design_options maps tank names to their option lists; the result maps
+    tank names to one quantity dict (plain floats) per option.
+    """
+    names = []
+    dims = []
+    for tank_name, options in design_options.items():
+        for option in options:
+            names.append(tank_name)
+            dims.append((option["length"], option["width"], option["depth"]))
+
+    result = {tank_name: [] for tank_name in design_options}
+    if not dims:
+        return result
+
+    L, W, D = np.asarray(dims, dtype=float).T
+    quantities = derived_quantities(L, W, D, **params)
+    columns = [np.broadcast_to(quantities[q], L.shape).tolist() for q in QUANTITY_NAMES]
+    for tank_name, row in zip(names, zip(*columns)):
+        result[tank_name].append(dict(zip(QUANTITY_NAMES, row)))
+    return result
+
+
+def format_quantities(q):
+    """Human-readable summary used by the GUI"""
+    return (
+        f"Effective Volume ({q['water_depth']:.2f} m water): {q['effective_volume']:.2f} m³\n"
+        f"Freeboard: {q['freeboard']:.2f} m\n"
+        f"Wall Base Pressure: {q['max_wall_pressure']:.1f} kPa\n"
+        f"Wall Thrust: {q['wall_thrust']:.1f} kN/m\n"
+        f"Wall Concrete: {q['wall_concrete_volume']:.2f} m³\n"
+        f"Floor Concrete: {q['floor_concrete_volume']:.2f} m³\n"
+        f"Fill Time: {q['fill_time']:.2f} h\n"
+        f"Drain Time: {q['drain_time']:.2f} h"
+    )
@@ -0,0 +1,418 @@
+"""Distributed headless export through a leased work queue.
+
+A coordinator splits a tank input set into one work unit per tank and
+stores the units in a SQLite queue. Workers pull units, size and export
+them with the same code as headless_export, and report their results rows.
+A pulled unit is leased to its worker for a limited time, and the worker
+renews the lease while it is still exporting the unit: if the worker dies,
+the lease expires and another worker picks the unit up again. Failed
+units are retried until they reach the attempt limit; tanks with invalid
+inputs are refused when the job is submitted, since retrying cannot fix
+them.
+
+Workers on the same machine open the queue file directly. Workers on
+other machines talk to ``serve``, a small HTTP broker in front of the
+queue, by passing its URL instead of a path. The broker only listens on
+localhost unless given another --host; anyone who can reach it can lease
+units and post results, so expose it only with a shared --token (or
+TANK_QUEUE_TOKEN), which every client must then send:
+
+    python tank_queue.py queue.db submit PROJECT.json --output-dir out
+    python tank_queue.py queue.db serve --host 0.0.0.0 --port 8765 --token SECRET
+    python tank_queue.py http://coordinator:8765 --token SECRET work
+    python tank_queue.py queue.db status
+    python tank_queue.py queue.db collect JOB results.jsonl
+"""
+import argparse
+import hmac
+import json
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import urllib.request
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from tank_project import load_project, tank_inputs
+from tank_validation import TANK_SCHEMA, ValidationError
+
+DEFAULT_LEASE_SECONDS = 120
+# Leases are renewed this many times per lease period while a unit runs
+RENEWALS_PER_LEASE = 3
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_MAX_ATTEMPTS = 3
+# Idle wait while other workers still hold leases
+POLL_SECONDS = 1.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS units (
+    id INTEGER PRIMARY KEY,
+    job TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_units_status ON units(status, id);
+CREATE INDEX IF NOT EXISTS idx_units_job ON units(job, status);
+"""
+
+
+class WorkQueue:
+    """Work units in a SQLite file, leased to workers"""
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def submit(self, job, payloads):
+        """Add a job's units; raises ValidationError (and adds nothing) if any tank is invalid"""
+        # A bad input fails the same way on every attempt, so refuse it up front
+        report = TANK_SCHEMA.validate({"name": [p.get("tank_name") for p in payloads],
+                                       "depth": [p.get("depth") for p in payloads],
+                                       "volume": [p.get("volume") for p in payloads]})
+        if not report.ok:
+            raise ValidationError(report, f"Job {job} not submitted")
+        self.conn.execute("BEGIN IMMEDIATE")
+        self.conn.executemany("INSERT INTO units (job, payload) VALUES (?, ?)",
+                              ((job, json.dumps(p)) for p in payloads))
+        self.conn.execute("COMMIT")
+
+    def lease(self, worker, lease_seconds=DEFAULT_LEASE_SECONDS, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        """Lease the next unit to worker; return {"id", "job", "payload"}, or None when idle.
+
+        Expired leases are taken back first. Returns {"wait": True} while
+        other workers still hold unexpired leases, so callers keep polling.
+        """
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Units whose worker vanished on their last attempt have failed
+            self.conn.execute(
+                "UPDATE units SET status = 'failed', error = 'lease expired' "
+                "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?", (now, max_attempts))
+            row = self.conn.execute(
+                "SELECT id, job, payload FROM units WHERE status = 'pending' "
+                "OR (status = 'leased' AND lease_expires < ?) ORDER BY id LIMIT 1", (now,)).fetchone()
+            if row is None:
+                busy = self.conn.execute("SELECT 1 FROM units WHERE status = 'leased' LIMIT 1").fetchone()
+                self.conn.execute("COMMIT")
+                return {"wait": True} if busy else None
+            self.conn.execute(
+                "UPDATE units SET status = 'leased', attempts = attempts + 1, lease_owner = ?, "
+                "lease_expires = ? WHERE id = ?", (worker, now + lease_seconds, row[0]))
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return {"id": row[0], "job": row[1], "payload": json.loads(row[2])}
+
+    def renew(self, unit_id, worker, lease_seconds=DEFAULT_LEASE_SECONDS):
+        """Extend worker's lease on a unit; False if the lease moved to another worker"""
+        cur = self.conn.execute(
+            "UPDATE units SET lease_expires = ? WHERE id = ? AND lease_owner = ? AND status = 'leased'",
+            (time.time() + lease_seconds, unit_id, worker))
+        return cur.rowcount == 1
+
+    def complete(self, unit_id, worker, result):
+        """Store a unit's result; ignored if the lease moved to another worker"""
+        cur = self.conn.execute(
+            "UPDATE units SET status = 'done', result = ?, error = NULL "
+            "WHERE id = ? AND lease_owner = ? AND status = 'leased'", (json.dumps(result), unit_id, worker))
+        return cur.rowcount == 1
+
+    def fail(self, unit_id, worker, error, max_attempts=DEFAULT_MAX_ATTEMPTS, permanent=False):
+        """Record a failed attempt; the unit is retried until max_attempts unless permanent"""
+        cur = self.conn.execute(
+            "UPDATE units SET status = CASE WHEN attempts < ? AND NOT ? THEN 'pending' ELSE 'failed' END, "
+            "error = ?, lease_owner = NULL, lease_expires = NULL "
+            "WHERE id = ? AND lease_owner = ? AND status = 'leased'",
+            (max_attempts, permanent, error, unit_id, worker))
+        return cur.rowcount == 1
+
+    def status(self, job=None):
+        """Unit counts by status, for one job or all"""
+        sql = "SELECT status, COUNT(*) FROM units"
+        params = ()
+        if job:
+            sql += " WHERE job = ?"
+            params = (job,)
+        return dict(self.conn.execute(sql + " GROUP BY status", params).fetchall())
+
+    def results(self, job):
+        """(payload, status, result, error) of every unit of a job"""
+        return [(json.loads(payload), status, json.loads(result) if result else None, error)
+                for payload, status, result, error in self.conn.execute(
+                    "SELECT payload, status, result, error FROM units WHERE job = ? ORDER BY id", (job,))]
+
+
+class BrokerClient:
+    """WorkQueue interface over the HTTP broker"""
+
+    def __init__(self, url, token=None):
+        self.url = url.rstrip("/")
+        self.token = token
+
+    def _call(self, method, **params):
+        headers = {"Content-Type": "application/json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        request = urllib.request.Request(f"{self.url}/{method}", data=json.dumps(params).encode(), headers=headers)
+        with urllib.request.urlopen(request, timeout=60) as response:
+            return json.loads(response.read())
+
+    def lease(self, worker, lease_seconds=DEFAULT_LEASE_SECONDS, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        return self._call("lease", worker=worker, lease_seconds=lease_seconds, max_attempts=max_attempts)
+
+    def renew(self, unit_id, worker, lease_seconds=DEFAULT_LEASE_SECONDS):
+        return self._call("renew", unit_id=unit_id, worker=worker, lease_seconds=lease_seconds)
+
+    def complete(self, unit_id, worker, result):
+        return self._call("complete", unit_id=unit_id, worker=worker, result=result)
+
+    def fail(self, unit_id, worker, error, max_attempts=DEFAULT_MAX_ATTEMPTS, permanent=False):
+        return self._call("fail", unit_id=unit_id, worker=worker, error=error, max_attempts=max_attempts,
+                          permanent=permanent)
+
+    def status(self, job=None):
+        return self._call("status", job=job)
+
+    def results(self, job):
+        return [tuple(unit) for unit in self._call("results", job=job)]
+
+    def close(self):
+        pass
+
+
+def open_queue(location, token=None):
+    """WorkQueue for a file path, BrokerClient for an http:// URL"""
+    if location.startswith(("http://", "https://")):
+        return BrokerClient(location, token)
+    return WorkQueue(location)
+
+
+def serve(path, host=DEFAULT_HOST, port=8765, token=None):
+    """Serve a queue file to workers until interrupted.
+
+    With a token, requests without "Authorization: Bearer <token>" are
+    refused.
+    """
+    methods = ("lease", "renew", "complete", "fail", "status", "results")
+    expected = f"Bearer {token}".encode() if token else None
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            method = self.path.strip("/")
+            if expected and not hmac.compare_digest(self.headers.get("Authorization", "").encode(), expected):
+                self.send_error(401)
+                return
+            if method not in methods:
+                self.send_error(404)
+                return
+            params = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            # One connection per request: sqlite3 connections stay in their thread
+            queue = WorkQueue(path)
+            try:
+                body = json.dumps(getattr(queue, method)(**params)).encode()
+            except (TypeError, ValueError, sqlite3.Error) as e:
+                self.send_error(400, str(e))
+                return
+            finally:
+                queue.close()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    if not token and host not in ("127.0.0.1", "localhost", "::1"):
+        print(f"Warning: serving {path} to the network without --token; anyone who can connect "
+              "can lease units and post results")
+    print(f"Serving {path} on http://{host}:{port} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Stopped")
+    finally:
+        server.server_close()
+
+
+def tank_units(tanks, output_dir, quantity_params=None, formats=()):
+    """One work unit payload per tank"""
+    return [{"tank_name": name, "depth": params["depth"], "volume": params["volume"],
+             "output_dir": str(output_dir), "quantity_params": quantity_params or {}, "formats": list(formats)}
+            for name, params in tank_inputs(tanks).items()]
+
+
+def run_unit(payload, job, output_dir=None):
+    """Size and export one tank; return its results rows"""
+    from tank_quantities import option_quantities
+    from tank_results import result_row
+    from tank_sizing import design_options
+    from water_tank_design import export_option_dxf, option_filename
+
+    name = payload["tank_name"]
+    report = TANK_SCHEMA.validate({"name": [name], "depth": [payload.get("depth")],
+                                   "volume": [payload.get("volume")]})
+    if not report.ok:
+        raise ValidationError(report, name)
+    depth, volume = float(report.columns["depth"][0]), float(report.columns["volume"][0])
+    outdir = Path(output_dir or payload["output_dir"])
+    outdir.mkdir(parents=True, exist_ok=True)
+    options = design_options(volume, depth)
+    quantities = option_quantities({name: options}, **payload["quantity_params"])[name]
+    rows = []
+    for option, q in zip(options, quantities):
+        outpath = export_option_dxf(outdir / option_filename(name, option), name, option, volume,
+                                    payload["formats"])
+        rows.append(result_row(job, name, option, volume, q, outpath))
+    return rows
+
+
+def _renew_lease(queue, unit_id, worker, lease_seconds, stop):
+    """Renew a lease until stop is set or the lease is lost (runs in its own thread)"""
+    # sqlite3 connections stay in their thread: a local queue needs its own
+    own = WorkQueue(queue.path) if isinstance(queue, WorkQueue) else None
+    try:
+        while not stop.wait(lease_seconds / RENEWALS_PER_LEASE):
+            try:
+                if not (own or queue).renew(unit_id, worker, lease_seconds):
+                    return
+            except (OSError, sqlite3.Error) as e:
+                # The lease may still be renewed in time by the next attempt
+                print(f"[{worker}] lease renewal failed: {e}")
+    finally:
+        if own is not None:
+            own.close()
+
+
+def work(queue, worker, lease_seconds=DEFAULT_LEASE_SECONDS, max_attempts=DEFAULT_MAX_ATTEMPTS,
+         output_dir=None):
+    """Pull and run units until the queue is drained; return (done, failed)"""
+    done = failed = 0
+    while True:
+        unit = queue.lease(worker, lease_seconds, max_attempts)
+        if unit is None:
+            return done, failed
+        if unit.get("wait"):
+            time.sleep(POLL_SECONDS)
+            continue
+        name = unit["payload"]["tank_name"]
+        # Keep the lease while the unit runs, however long it takes
+        stop = threading.Event()
+        renewer = threading.Thread(target=_renew_lease, args=(queue, unit["id"], worker, lease_seconds, stop),
+                                   daemon=True)
+        renewer.start()
+        try:
+            rows = run_unit(unit["payload"], unit["job"], output_dir)
+        except Exception as e:
+            # Reported to the queue, which retries the unit up to max_attempts;
+            # invalid inputs fail the same way every time, so they are not retried
+            print(f"[{worker}] {name} failed: {e}")
+            queue.fail(unit["id"], worker, f"{type(e).__name__}: {e}", max_attempts,
+                       isinstance(e, ValidationError))
+            failed += 1
+            continue
+        finally:
+            stop.set()
+            renewer.join()
+        if queue.complete(unit["id"], worker, rows):
+            done += 1
+        else:
+            print(f"[{worker}] lease on {name} expired before completion; result discarded")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distributed tank export through a leased work queue")
+    parser.add_argument("queue", help="Queue file (coordinator, local workers) or broker URL (remote workers)")
+    parser.add_argument("--token", default=os.environ.get("TANK_QUEUE_TOKEN"),
+                        help="Shared secret of the broker (default: $TANK_QUEUE_TOKEN)")
+    # Also accepted after the command; SUPPRESS keeps a token given before it
+    token = argparse.ArgumentParser(add_help=False)
+    token.add_argument("--token", default=argparse.SUPPRESS, help="Shared secret of the broker")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    submit = sub.add_parser("submit", parents=[token], help="Split a project into work units")
+    submit.add_argument("project", help="Project file with the tanks to export")
+    submit.add_argument("--output-dir", required=True, help="Export directory (shared by the workers)")
+    submit.add_argument("--job", help="Job name (default: project name and time)")
+    submit.add_argument("--formats", default="", help="Comma-separated extra drawing formats (svg, pdf, png)")
+
+    srv = sub.add_parser("serve", parents=[token], help="Serve the queue file to remote workers over HTTP")
+    srv.add_argument("--host", default=DEFAULT_HOST,
+                     help="Address to listen on (default: localhost only; e.g. 0.0.0.0 for remote workers)")
+    srv.add_argument("--port", type=int, default=8765)
+
+    wrk = sub.add_parser("work", parents=[token], help="Pull and export units until the queue is drained")
+    wrk.add_argument("--worker-id", default=f"{socket.gethostname()}-{os.getpid()}")
+    wrk.add_argument("--lease-seconds", type=float, default=DEFAULT_LEASE_SECONDS)
+    wrk.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS)
+    wrk.add_argument("--output-dir", help="Write drawings here instead of the submitted directory")
+
+    st = sub.add_parser("status", parents=[token], help="Show unit counts")
+    st.add_argument("--job")
+
+    collect = sub.add_parser("collect", parents=[token], help="Write a job's results rows and list its failures")
+    collect.add_argument("job")
+    collect.add_argument("results", help="Results file (.jsonl, .csv or .parquet)")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        serve(args.queue, args.host, args.port, args.token)
+        return 0
+
+    queue = open_queue(args.queue, args.token)
+    try:
+        if args.command == "submit":
+            job = args.job or f"{Path(args.project).stem}-{datetime.now().isoformat(timespec='seconds')}"
+            formats = [fmt.strip() for fmt in args.formats.split(",") if fmt.strip()]
+            units = tank_units(load_project(args.project), args.output_dir, formats=formats)
+            try:
+                queue.submit(job, units)
+            except ValidationError as e:
+                print(e)
+                return 1
+            print(f"Submitted job {job}: {len(units)} units")
+        elif args.command == "work":
+            done, failed = work(queue, args.worker_id, args.lease_seconds, args.max_attempts, args.output_dir)
+            print(f"[{args.worker_id}] {done} units done, {failed} failed attempts")
+        elif args.command == "status":
+            print(", ".join(f"{status}: {count}" for status, count in sorted(queue.status(args.job).items()))
+                  or "empty")
+        else:
+            from tank_results import ResultsWriter
+
+            failures = 0
+            with ResultsWriter(args.results) as results:
+                for payload, status, rows, error in queue.results(args.job):
+                    if status == "done":
+                        for row in rows:
+                            results.write_row(row)
+                    else:
+                        failures += 1
+                        print(f"{payload['tank_name']}: {status}{f' ({error})' if error else ''}")
+            print(f"Wrote results: {args.results} ({results.rows_written} rows), {failures} units not done")
+            return 1 if failures else 0
+    finally:
+        queue.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,196 @@
+"""Machine-readable results of headless exports.
+
+One row is written per tank × option with every computed quantity and the
+path of the drawing. Rows are streamed as they are produced, so a results
+file can be appended to by later runs and read back row by row without
+opening any DXF. The format follows the file suffix:
+
+* ``.jsonl`` (default) - one JSON object per line
+* ``.csv`` - header row followed by one line per row
+* ``.parquet`` - columnar file, requires the optional ``pyarrow`` package
+
+Long batch exports also keep an ExportJournal: an append-only log of the
+tank/option units already written, synced to disk every few seconds, from
+which an interrupted run is resumed.
+"""
+import csv
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+from tank_quantities import QUANTITY_NAMES
+
+# Longest time completed units may sit in the journal without an fsync
+CHECKPOINT_SECONDS = 2.0
+
+RESULT_COLUMNS = (
+    "run_id",
+    "tank_name",
+    "option",
+    "aspect_ratio",
+    "length",
+    "width",
+    "depth",
+    "volume",
+) + QUANTITY_NAMES + ("output_path",)
+
+
+def result_row(run_id, tank_name, option, volume, quantities, output_path):
+    """Build a results row for one exported option"""
+    row = {
+        "run_id": run_id,
+        "tank_name": tank_name,
+        "option": option["name"],
+        "aspect_ratio": option["aspect_ratio"],
+        "length": option["length"],
+        "width": option["width"],
+        "depth": option["depth"],
+        "volume": volume,
+        "output_path": str(output_path) if output_path else None,
+    }
+    for name in QUANTITY_NAMES:
+        row[name] = quantities[name]
+    return {column: row[column] for column in RESULT_COLUMNS}
+
+
+class ResultsWriter:
+    """Stream result rows to a JSONL, CSV or Parquet file"""
+
+    def __init__(self, path, append=False):
+        self.path = Path(path)
+        self.append = append
+        self.format = self.path.suffix.lower().lstrip(".") or "jsonl"
+        if self.format not in ("jsonl", "csv", "parquet"):
+            raise ValueError(f"Unsupported results format: {self.path.suffix}")
+        self._fh = None
+        self._csv = None
+        self._columns = None
+        self.rows_written = 0
+
+    def __enter__(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.format == "parquet":
+            # Checked here rather than on close, before any rows are produced
+            try:
+                import pyarrow.parquet
+            except ImportError:
+                raise RuntimeError("Writing .parquet results requires the 'pyarrow' package")
+            # Parquet files cannot be appended to; existing rows are re-read
+            # and rewritten together with the new ones on close.
+            self._columns = {c: [] for c in RESULT_COLUMNS}
+            if self.append and self.path.exists():
+                for row in read_results(self.path):
+                    self._add_columnar(row)
+            return self
+
+        mode = 'a' if self.append else 'w'
+        new_file = mode == 'w' or not self.path.exists() or self.path.stat().st_size == 0
+        self._fh = open(self.path, mode, newline='')
+        if self.format == "csv":
+            self._csv = csv.DictWriter(self._fh, fieldnames=RESULT_COLUMNS)
+            if new_file:
+                self._csv.writeheader()
+        return self
+
+    def write_row(self, row):
+        if self.format == "jsonl":
+            self._fh.write(json.dumps(row) + "\n")
+        elif self.format == "csv":
+            self._csv.writerow(row)
+        else:
+            self._add_columnar(row)
+        self.rows_written += 1
+
+    def _add_columnar(self, row):
+        for column, values in self._columns.items():
+            values.append(row.get(column))
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.format == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            pq.write_table(pa.table(self._columns), str(self.path))
+        else:
+            self._fh.close()
+        return False
+
+
+def read_results(path):
+    """Yield the rows of a results file"""
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == ".parquet":
+        import pyarrow.parquet as pq
+        yield from pq.read_table(str(path)).to_pylist()
+    elif suffix == ".csv":
+        numeric = set(RESULT_COLUMNS) - {"run_id", "tank_name", "option", "aspect_ratio", "output_path"}
+        with open(path, newline='') as fh:
+            for row in csv.DictReader(fh):
+                yield {k: (float(v) if k in numeric and v != "" else (v or None)) for k, v in row.items()}
+    else:
+        with open(path) as fh:
+            for line in fh:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def unit_key(*parts):
+    """Stable key of one export unit from everything that affects its output"""
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class ExportJournal:
+    """Append-only log of completed export units.
+
+    Each line holds a unit key and its results row. A line is only written
+    after the unit's files are in place, so every journaled unit is complete.
+    With resume=True the existing entries are loaded into ``completed``
+    (a torn last line from a crash is ignored) and new ones appended. A
+    later entry for the same output file supersedes earlier ones, since
+    it overwrote their file.
+    """
+
+    def __init__(self, path, resume=False):
+        self.path = Path(path)
+        self.resume = resume
+        self.completed = {}
+        self._fh = None
+        self._last_sync = 0.0
+
+    def __enter__(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.resume and self.path.exists():
+            latest = {}  # output path -> key of its last entry
+            with open(self.path) as fh:
+                for line in fh:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    key, path = entry["key"], entry["row"].get("output_path")
+                    if latest.get(path, key) != key:
+                        self.completed.pop(latest[path], None)
+                    latest[path] = key
+                    self.completed[key] = entry["row"]
+        self._fh = open(self.path, 'a' if self.resume else 'w')
+        self._last_sync = time.monotonic()
+        return self
+
+    def record(self, key, row):
+        self._fh.write(json.dumps({"key": key, "row": row}) + "\n")
+        self._fh.flush()
+        if time.monotonic() - self._last_sync >= CHECKPOINT_SECONDS:
+            self.sync()
+
+    def sync(self):
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+        self._last_sync = time.monotonic()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.sync()
+        self._fh.close()
+        return False
@@ -0,0 +1,288 @@
+"""Arrange the tanks of a project on one site (plinth, plant room or roof).
+
+Every tank takes the plan of its selected design option plus its walls,
+grown by half the clearance on each side so that neighbours end up at
+least the clearance apart. Placement is a MaxRects packer: the free space
+is kept as the maximal free rectangles, in NumPy arrays, and a tank goes
+into the free rectangle that fits it most tightly (best short side fit),
+in either orientation when rotation is allowed. Every free rectangle the
+tank overlaps is then split around it. Tanks are placed largest first.
+
+A non-rectangular site is handled by blocking the area outside the
+boundary polygon before packing. The polygon's bounding box is cut into
+horizontal strips at every vertex, each at most STRIP_HEIGHT high, and the
+parts of a strip outside the polygon become obstacles. Within a strip the
+polygon edges are straight, so the blocked parts are exact at the strip's
+top and bottom and err on the safe side in between.
+
+Usage:
+    python tank_site.py --boundary "0,0 20,0 20,12 0,12" [--project FILE] [--option 1]
+        [--clearance 0.6] [--output site.dxf] [--formats png,svg]
+
+A tank's "option" key in the project file (1-based index or option name)
+overrides --option for that tank.
+"""
+import argparse
+import math
+import time
+from pathlib import Path
+
+import numpy as np
+
+from geometry_ir import TEXT_CHAR_WIDTH, Drawing, emit
+from tank_project import DEFAULT_TANKS, load_project
+from tank_quantities import DEFAULT_WALL_THICKNESS
+from tank_sizing import design_options
+from tank_validation import TANK_SCHEMA
+
+DEFAULT_CLEARANCE = 0.6
+STRIP_HEIGHT = 0.5
+EPS = 1e-9
+
+
+def parse_polygon(text):
+    """Parse "x,y x,y ..." into a list of points"""
+    try:
+        points = [tuple(float(v) for v in pair.split(",")) for pair in text.split()]
+    except ValueError:
+        raise ValueError(f"Invalid boundary '{text}': expected 'x,y x,y ...'")
+    if len(points) < 3 or any(len(p) != 2 for p in points):
+        raise ValueError(f"Invalid boundary '{text}': need at least three x,y points")
+    return points
+
+
+def polygon_intervals(polygon, y):
+    """Sorted x intervals of the polygon interior on the horizontal line y"""
+    xs = []
+    for (x1, y1), (x2, y2) in zip(polygon, polygon[1:] + polygon[:1]):
+        if (y1 <= y) != (y2 <= y):
+            xs.append(x1 + (y - y1) * (x2 - x1) / (y2 - y1))
+    xs.sort()
+    return list(zip(xs[0::2], xs[1::2]))
+
+
+def _intersect(a, b):
+    """Intersection of two sorted interval lists"""
+    result = []
+    i = j = 0
+    while i < len(a) and j < len(b):
+        lo, hi = max(a[i][0], b[j][0]), min(a[i][1], b[j][1])
+        if hi > lo:
+            result.append((lo, hi))
+        if a[i][1] < b[j][1]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+
+def blocked_rects(polygon, margin=0.0, strip_height=STRIP_HEIGHT):
+    """Rectangles (x0, y0, x1, y1) covering the bounding box outside the polygon, grown by margin"""
+    xs = [x for x, _ in polygon]
+    x_min, x_max = min(xs), max(xs)
+    levels = sorted(set(y for _, y in polygon))
+    blocks = []
+    for a, b in zip(levels, levels[1:]):
+        pieces = max(1, math.ceil((b - a) / strip_height - EPS))
+        for k in range(pieces):
+            y0 = a + (b - a) * k / pieces
+            y1 = a + (b - a) * (k + 1) / pieces
+            # No vertex lies strictly inside the strip: sample just within it
+            delta = (y1 - y0) * 1e-6
+            inside = _intersect(polygon_intervals(polygon, y0 + delta), polygon_intervals(polygon, y1 - delta))
+            edges = [x_min] + [x for interval in inside for x in interval] + [x_max]
+            for lo, hi in zip(edges[0::2], edges[1::2]):
+                if hi > lo + EPS:
+                    blocks.append((lo - margin, y0 - margin, hi + margin, y1 + margin))
+    return blocks
+
+
+class SitePacker:
+    """MaxRects free-space index of a rectangular region"""
+
+    def __init__(self, x0, y0, x1, y1):
+        self.free = np.array([[x0, y0, x1, y1]], dtype=float) if x1 > x0 and y1 > y0 else np.zeros((0, 4))
+
+    def block(self, rect):
+        """Remove the rectangle (x0, y0, x1, y1) from the free space"""
+        x0, y0, x1, y1 = rect
+        f = self.free
+        hit = (f[:, 0] < x1 - EPS) & (f[:, 2] > x0 + EPS) & (f[:, 1] < y1 - EPS) & (f[:, 3] > y0 + EPS)
+        if not hit.any():
+            return
+        split = f[hit]
+        keep = f[~hit]
+        parts = []
+        # Left, right, bottom and top remainders of every split rectangle
+        for side, edge, value in ((split[:, 0] < x0 - EPS, 2, x0),
+                                  (split[:, 2] > x1 + EPS, 0, x1),
+                                  (split[:, 1] < y0 - EPS, 3, y0),
+                                  (split[:, 3] > y1 + EPS, 1, y1)):
+            part = split[side].copy()
+            part[:, edge] = value
+            parts.append(part)
+        new = np.vstack(parts)
+        if len(new):
+            # Drop pieces lying inside another free rectangle (or duplicating an earlier piece)
+            inside_keep = np.zeros(len(new), dtype=bool)
+            # Only free rectangles overlapping the split ones can contain a piece
+            lo, hi = split[:, :2].min(axis=0), split[:, 2:].max(axis=0)
+            near = keep[(keep[:, 0] < hi[0]) & (keep[:, 2] > lo[0]) & (keep[:, 1] < hi[1]) & (keep[:, 3] > lo[1])]
+            if len(near):
+                inside_keep = self._contains(near, new).any(axis=0)
+            within = self._contains(new, new)
+            same = within & within.T
+            # Of identical pieces only the first survives
+            within &= ~same | np.triu(np.ones(within.shape, dtype=bool), 1)
+            new = new[~(inside_keep | within.any(axis=0))]
+        self.free = np.vstack([keep, new])
+
+    @staticmethod
+    def _contains(outer, inner):
+        """Matrix [i, j]: outer[i] contains inner[j]"""
+        return ((outer[:, None, 0] <= inner[None, :, 0] + EPS) & (outer[:, None, 1] <= inner[None, :, 1] + EPS)
+                & (outer[:, None, 2] >= inner[None, :, 2] - EPS) & (outer[:, None, 3] >= inner[None, :, 3] - EPS))
+
+    def insert(self, width, height, rotate=True):
+        """Place a width × height rectangle; return (x, y, rotated) or None"""
+        f = self.free
+        fw = f[:, 2] - f[:, 0]
+        fh = f[:, 3] - f[:, 1]
+        best = None
+        sizes = ((width, height, False), (height, width, True)) if rotate and width != height \
+            else ((width, height, False),)
+        for w, h, rotated in sizes:
+            fit = np.flatnonzero((fw >= w - EPS) & (fh >= h - EPS))
+            if not len(fit):
+                continue
+            short = np.minimum(fw[fit] - w, fh[fit] - h)
+            long = np.maximum(fw[fit] - w, fh[fit] - h)
+            # Tightest fit, then lowest and leftmost position
+            i = fit[np.lexsort((f[fit, 0], f[fit, 1], long, short))[0]]
+            key = (min(fw[i] - w, fh[i] - h), max(fw[i] - w, fh[i] - h), f[i, 1], f[i, 0])
+            if best is None or key < best[0]:
+                best = (key, f[i, 0], f[i, 1], w, h, rotated)
+        if best is None:
+            return None
+        _, x, y, w, h, rotated = best
+        self.block((x, y, x + w, y + h))
+        return x, y, rotated
+
+
+def pack_site(tanks, boundary, clearance=DEFAULT_CLEARANCE, edge_clearance=None, rotate=True,
+              strip_height=STRIP_HEIGHT):
+    """Place (name, length, width) footprints inside the boundary polygon.
+
+    Tanks keep at least clearance between each other and edge_clearance
+    (default: clearance, never less than half of it) from the boundary.
+    Returns ({name: {"x", "y", "length", "width", "rotated"}}, unplaced names),
+    x/y being the lower-left corner of the placed footprint.
+    """
+    half = clearance / 2
+    edge = max(clearance if edge_clearance is None else edge_clearance, half)
+    margin = edge - half
+    xs = [x for x, _ in boundary]
+    ys = [y for _, y in boundary]
+    packer = SitePacker(min(xs) + margin, min(ys) + margin, max(xs) - margin, max(ys) - margin)
+    for rect in blocked_rects(boundary, margin, strip_height):
+        packer.block(rect)
+
+    placements = {}
+    unplaced = []
+    for name, length, width in sorted(tanks, key=lambda t: -t[1] * t[2]):
+        spot = packer.insert(length + clearance, width + clearance, rotate)
+        if spot is None:
+            unplaced.append(name)
+            continue
+        x, y, rotated = spot
+        placements[name] = {
+            "x": x + half,
+            "y": y + half,
+            "length": width if rotated else length,
+            "width": length if rotated else width,
+            "rotated": rotated,
+        }
+    return placements, unplaced
+
+
+def select_option(tank, default=1):
+    """The design option chosen for a tank ("option": 1-based index or name)"""
+    options = design_options(float(tank["volume"]), float(tank["depth"]))
+    choice = tank.get("option", default)
+    if isinstance(choice, str) and not choice.strip().isdigit():
+        for option in options:
+            if option["name"].lower() == choice.strip().lower():
+                return option
+        raise ValueError(f"{tank['name']}: no design option named '{choice}'")
+    index = int(choice)
+    if not 1 <= index <= len(options):
+        raise ValueError(f"{tank['name']}: option must be between 1 and {len(options)}")
+    return options[index - 1]
+
+
+def site_drawing(boundary, placements, options, wall_thickness=DEFAULT_WALL_THICKNESS):
+    """Combined plan: boundary, tank outer walls and inner plan, labels"""
+    drawing = Drawing()
+    drawing.add_polyline(boundary, closed=True, color=7)
+    for name, p in placements.items():
+        x0, y0 = p["x"], p["y"]
+        x1, y1 = x0 + p["length"], y0 + p["width"]
+        drawing.add_rect(x0, y0, x1, y1, color=5)
+        t = wall_thickness
+        if x1 - x0 > 2 * t and y1 - y0 > 2 * t:
+            drawing.add_rect(x0 + t, y0 + t, x1 - t, y1 - t, color=4)
+        option = options[name]
+        lines = [name, f"{option['length']:.2f} × {option['width']:.2f} × {option['depth']:.2f} m"]
+        # Fit the label inside the walls
+        height = min((y1 - y0) / 6, (x1 - x0 - 2 * t) / (TEXT_CHAR_WIDTH * max(len(line) for line in lines) + 1.5),
+                     0.5)
+        for i, line in enumerate(lines):
+            drawing.add_text(line, (x0 + t + height * 0.5, y1 - t - (i + 1.5) * height * 1.4), height)
+    return drawing
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Arrange the tanks of a project on a site")
+    parser.add_argument("--boundary", required=True, help="Site boundary polygon, e.g. '0,0 20,0 20,12 0,12' (m)")
+    parser.add_argument("--project", help="Project file with the tanks (default: the standard tanks)")
+    parser.add_argument("--option", default="1", help="Design option used for every tank (1-based index or name)")
+    parser.add_argument("--clearance", type=float, default=DEFAULT_CLEARANCE, help="Gap between tanks (m)")
+    parser.add_argument("--edge-clearance", type=float, help="Gap between tanks and the boundary (m)")
+    parser.add_argument("--wall-thickness", type=float, default=DEFAULT_WALL_THICKNESS, help="Tank wall thickness (m)")
+    parser.add_argument("--no-rotate", action="store_true", help="Keep every tank's length along x")
+    parser.add_argument("--output", default="site_plan.dxf", help="Combined plan DXF")
+    parser.add_argument("--formats", default="", help="Extra drawing formats, e.g. png,svg")
+    args = parser.parse_args()
+
+    try:
+        boundary = parse_polygon(args.boundary)
+        tanks = load_project(args.project) if args.project else DEFAULT_TANKS
+        # Placements are keyed by name, so duplicate names would silently drop tanks
+        report = TANK_SCHEMA.validate({"name": [tank.get("name") for tank in tanks],
+                                       "depth": [tank.get("depth") for tank in tanks],
+                                       "volume": [tank.get("volume") for tank in tanks]})
+        if not report.ok:
+            parser.error(f"invalid tanks:\n{report.format()}")
+        options = {tank["name"]: select_option(tank, args.option) for tank in tanks}
+    except (OSError, ValueError, TypeError, KeyError) as e:
+        parser.error(str(e))
+
+    t = args.wall_thickness
+    footprints = [(name, o["length"] + 2 * t, o["width"] + 2 * t) for name, o in options.items()]
+    started = time.perf_counter()
+    placements, unplaced = pack_site(footprints, boundary, args.clearance, args.edge_clearance,
+                                     not args.no_rotate)
+    print(f"Placed {len(placements)} of {len(footprints)} tanks in {(time.perf_counter() - started) * 1000:.0f} ms")
+    if unplaced:
+        print(f"Did not fit: {', '.join(unplaced)}")
+
+    outputs = [args.output] + [str(Path(args.output).with_suffix("." + fmt.strip().lstrip(".")))
+                               for fmt in args.formats.split(",") if fmt.strip()]
+    emit(site_drawing(boundary, placements, options, t), outputs, meters=True)
+    print(f"Saved site plan to {', '.join(outputs)}")
+    if unplaced:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
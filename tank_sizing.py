@@ -0,0 +1,119 @@
+"""Memoized tank sizing shared by the GUI and headless export.
+
+Identical tank specs (e.g. the same fire tank repeated across towers) are
+sized once: options are cached on a normalized (volume, depth, ratios,
+rounding) key, and each cached option carries the part of its drawing that
+does not depend on the tank name, so exporting a repeated design only adds
+the name texts to geometry that is already built.
+"""
+import math
+from functools import lru_cache
+
+from geometry_ir import Drawing
+
+# length:width ratios of the options produced for every tank
+DEFAULT_RATIOS = (1, 2, 3)
+DEFAULT_ROUNDING = 6
+CACHE_SIZE = 4096
+
+
+def normalize_key(volume, depth, ratios=DEFAULT_RATIOS, rounding=DEFAULT_ROUNDING):
+    """Return the cache key for a sizing request"""
+    return (round(float(volume), rounding), round(float(depth), rounding),
+            tuple(ratios), int(rounding))
+
+
+def design_options(volume, depth, ratios=DEFAULT_RATIOS, rounding=DEFAULT_ROUNDING):
+    """Return the design options for a tank of the given volume and depth.
+
+    The returned tuple and its option dicts are shared between callers and
+    must not be mutated.
+    """
+    volume, depth, ratios, rounding = normalize_key(volume, depth, ratios, rounding)
+    if depth <= 0 or volume <= 0:
+        raise ValueError("Depth and Volume must be positive values")
+    return _design_options(volume, depth, ratios, rounding)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _design_options(volume, depth, ratios, rounding):
+    base_area = volume / depth
+    options = []
+    for ratio in ratios:
+        if ratio == 1:
+            length = width = math.sqrt(base_area)
+            name = "Square Tank"
+        else:
+            length = math.sqrt(base_area * ratio)
+            width = base_area / length
+            name = f"Rectangular Tank ({ratio:g}:1)"
+        option = {
+            "name": name,
+            "length": length,
+            "width": width,
+            "depth": depth,
+            "aspect_ratio": f"{ratio:g}:1",
+        }
+        option["geometry"] = _option_geometry(option, volume)
+        options.append(option)
+    return tuple(options)
+
+
+def _option_geometry(option, volume):
+    """Pre-build the name-independent part of an option's drawing"""
+    L = option["length"]
+    W = option["width"]
+    D = option["depth"]
+    offset_y = W + 5
+    drawing = Drawing()
+    drawing.add_polyline(((0, 0), (L, 0), (L, W), (0, W), (0, 0)), color=1)
+    drawing.add_polyline(((0, offset_y), (L, offset_y), (L, offset_y + D), (0, offset_y + D), (0, offset_y)),
+                         color=2)
+    specs = [
+        f"Design Type: {option['name']}",
+        f"Length: {L:.2f} m",
+        f"Width: {W:.2f} m",
+        f"Depth: {D:.2f} m",
+        f"Volume: {volume:.2f} m³",
+        f"Base Area: {L * W:.2f} m²",
+        f"Surface Area: {2 * (L + W) * D:.2f} m²",
+        f"Aspect Ratio: {option['aspect_ratio']}",
+    ]
+    text_offset = offset_y + D + 5
+    # spec line 0 is the tank name, added by option_drawing
+    for idx, spec in enumerate(specs, start=1):
+        drawing.add_text(spec, (0, text_offset + idx * 1.5), 3)
+    return drawing
+
+
+def option_drawing(tank_name, option, dimensions=False, created=None):
+    """Return the full drawing of a sized option for the given tank.
+
+    dimensions adds L/W/D labels next to the plan and elevation, and
+    created a "Created:" line under the specs (both used by the GUI).
+    """
+    L, W, D = option["length"], option["width"], option["depth"]
+    text_offset = W + 5 + D + 5
+    drawing = Drawing()
+    drawing.add_text(f"{tank_name} - {option['name']}", (0, 0), 10)
+    drawing.add_text(f"Tank Name: {tank_name}", (0, text_offset), 3)
+    drawing.extend(option["geometry"])
+    if dimensions:
+        offset_y = W + 5
+        drawing.add_text(f"L: {L:.2f}m", (L / 2, -2), 5)
+        drawing.add_text(f"W: {W:.2f}m", (-3, W / 2), 5)
+        drawing.add_text(f"L: {L:.2f}m", (L / 2, offset_y - 2), 5)
+        drawing.add_text(f"D: {D:.2f}m", (-3, offset_y + D / 2), 5)
+    if created:
+        # Below the last spec line of _option_geometry
+        drawing.add_text(f"Created: {created}", (0, text_offset + 9 * 1.5), 3)
+    return drawing
+
+
+def sizing_cache_info():
+    """Return hit/miss statistics of the sizing cache"""
+    return _design_options.cache_info()
+
+
+def clear_sizing_cache():
+    _design_options.cache_clear()
@@ -0,0 +1,238 @@
+"""SQLite store for projects, tank inputs, design options and exports.
+
+Tanks, every generated option with its derived quantities, and exported
+artifacts are kept in one local database file, indexed on tank type,
+volume, depth and footprint so queries across projects ("all fire tanks
+with a footprint under 20 m²") do not scan everything. Writes go through
+executemany inside a single transaction per project.
+
+Usage:
+    python tank_store.py DB import PROJECT.json [--name NAME]
+    python tank_store.py DB query [--type fire] [--max-footprint 20] ...
+"""
+import argparse
+import json
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+
+from tank_project import load_project
+from tank_quantities import QUANTITY_NAMES, option_quantities
+from tank_simulation import tank_kind
+from tank_sizing import design_options
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS projects (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    created TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tanks (
+    id INTEGER PRIMARY KEY,
+    project_id INTEGER NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    tank_type TEXT NOT NULL,
+    depth REAL,
+    volume REAL,
+    color TEXT,
+    extra TEXT,
+    UNIQUE (project_id, name)
+);
+CREATE TABLE IF NOT EXISTS options (
+    id INTEGER PRIMARY KEY,
+    tank_id INTEGER NOT NULL REFERENCES tanks(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    aspect_ratio TEXT NOT NULL,
+    length REAL NOT NULL,
+    width REAL NOT NULL,
+    depth REAL NOT NULL,
+    footprint REAL NOT NULL,
+    {", ".join(f"{q} REAL" for q in QUANTITY_NAMES)},
+    UNIQUE (tank_id, name)
+);
+CREATE TABLE IF NOT EXISTS artifacts (
+    id INTEGER PRIMARY KEY,
+    option_id INTEGER NOT NULL REFERENCES options(id) ON DELETE CASCADE,
+    path TEXT NOT NULL,
+    format TEXT NOT NULL,
+    created TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tanks_project ON tanks(project_id, position);
+CREATE INDEX IF NOT EXISTS idx_tanks_type_volume ON tanks(tank_type, volume);
+CREATE INDEX IF NOT EXISTS idx_tanks_volume ON tanks(volume);
+CREATE INDEX IF NOT EXISTS idx_tanks_depth ON tanks(depth);
+CREATE INDEX IF NOT EXISTS idx_options_tank ON options(tank_id);
+CREATE INDEX IF NOT EXISTS idx_options_footprint ON options(footprint);
+CREATE INDEX IF NOT EXISTS idx_artifacts_option ON artifacts(option_id);
+"""
+
+TANK_KEYS = ("name", "depth", "volume", "color")
+# File suffixes opened as project stores rather than JSON project files
+STORE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+
+
+class ProjectStore:
+    """A project database file"""
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def project_names(self):
+        return [row[0] for row in self.conn.execute("SELECT name FROM projects ORDER BY name")]
+
+    def save_project(self, name, tanks, quantity_params=None):
+        """Store (or replace) a project's tanks with all their options.
+
+        Tanks with missing or invalid inputs are stored without options.
+        Returns the project id.
+        """
+        sized = {}
+        for tank in tanks:
+            try:
+                sized[tank["name"]] = design_options(float(tank["volume"]), float(tank["depth"]))
+            except (TypeError, ValueError):
+                continue
+        quantities = option_quantities(sized, **(quantity_params or {}))
+
+        with self.conn:
+            self.conn.execute("DELETE FROM projects WHERE name = ?", (name,))
+            project_id = self.conn.execute(
+                "INSERT INTO projects (name, created) VALUES (?, ?)",
+                (name, datetime.now().isoformat(timespec="seconds"))).lastrowid
+
+            self.conn.executemany(
+                "INSERT INTO tanks (project_id, position, name, tank_type, depth, volume, color, extra) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                ((project_id, pos, t["name"], t.get("kind") or tank_kind(t["name"]),
+                  _number(t.get("depth")), _number(t.get("volume")), t.get("color"),
+                  json.dumps({k: v for k, v in t.items() if k not in TANK_KEYS}))
+                 for pos, t in enumerate(tanks)))
+            tank_ids = dict(self.conn.execute(
+                "SELECT name, id FROM tanks WHERE project_id = ?", (project_id,)).fetchall())
+
+            columns = ("tank_id", "name", "aspect_ratio", "length", "width", "depth", "footprint") + QUANTITY_NAMES
+            self.conn.executemany(
+                f"INSERT INTO options ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                ((tank_ids[tank_name], o["name"], o["aspect_ratio"], o["length"], o["width"], o["depth"],
+                  o["length"] * o["width"]) + tuple(q[name] for name in QUANTITY_NAMES)
+                 for tank_name, options in sized.items()
+                 for o, q in zip(options, quantities[tank_name])))
+        return project_id
+
+    def load_tanks(self, name=None):
+        """Return a project's tank list in project file form.
+
+        Without a name the store must hold exactly one project. An unknown
+        name raises ValueError listing the stored projects.
+        """
+        names = self.project_names()
+        if not names:
+            raise ValueError(f"No projects in {self.path}")
+        if name is None:
+            if len(names) > 1:
+                raise ValueError(f"{self.path} holds several projects, choose one of: {', '.join(names)}")
+            name = names[0]
+        elif name not in names:
+            raise ValueError(f"No project '{name}' in {self.path} (available: {', '.join(names)})")
+        rows = self.conn.execute(
+            "SELECT t.name, t.depth, t.volume, t.color, t.extra FROM tanks t "
+            "JOIN projects p ON p.id = t.project_id WHERE p.name = ? ORDER BY t.position", (name,))
+        tanks = []
+        for row in rows:
+            tank = json.loads(row["extra"]) if row["extra"] else {}
+            tank.update(name=row["name"], depth=row["depth"], volume=row["volume"], color=row["color"])
+            tanks.append(tank)
+        return tanks
+
+    def add_artifacts(self, project, artifacts):
+        """Record exported files as (tank name, option name, path) tuples"""
+        now = datetime.now().isoformat(timespec="seconds")
+        with self.conn:
+            option_ids = {(row[0], row[1]): row[2] for row in self.conn.execute(
+                "SELECT t.name, o.name, o.id FROM options o JOIN tanks t ON t.id = o.tank_id "
+                "JOIN projects p ON p.id = t.project_id WHERE p.name = ?", (project,))}
+            self.conn.executemany(
+                "INSERT INTO artifacts (option_id, path, format, created) VALUES (?, ?, ?, ?)",
+                ((option_ids[(tank_name, option_name)], str(path), Path(path).suffix.lstrip('.').lower(), now)
+                 for tank_name, option_name, path in artifacts
+                 if path and (tank_name, option_name) in option_ids))
+
+    def query_options(self, tank_type=None, max_footprint=None, min_volume=None, max_volume=None,
+                      max_depth=None, project=None, limit=None):
+        """Return matching options joined with their tank and project"""
+        where = []
+        params = []
+        for clause, value in (("t.tank_type = ?", tank_type), ("o.footprint <= ?", max_footprint),
+                              ("t.volume >= ?", min_volume), ("t.volume <= ?", max_volume),
+                              ("o.depth <= ?", max_depth), ("p.name = ?", project)):
+            if value is not None:
+                where.append(clause)
+                params.append(value)
+        sql = ("SELECT p.name AS project, t.name AS tank_name, t.tank_type, t.volume, o.* FROM options o "
+               "JOIN tanks t ON t.id = o.tank_id JOIN projects p ON p.id = t.project_id")
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY o.footprint"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return [dict(row) for row in self.conn.execute(sql, params)]
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite project store for tank designs")
+    parser.add_argument("db", help="Project database file")
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", help="Import a project file")
+    imp.add_argument("project", help="Project JSON file")
+    imp.add_argument("--name", help="Project name (default: file name)")
+    query = sub.add_parser("query", help="Query stored design options")
+    query.add_argument("--type", dest="tank_type", help="Tank type (domestic, flushing, fire)")
+    query.add_argument("--max-footprint", type=float, help="Maximum footprint in m²")
+    query.add_argument("--min-volume", type=float)
+    query.add_argument("--max-volume", type=float)
+    query.add_argument("--max-depth", type=float)
+    query.add_argument("--project", help="Restrict to one project")
+    query.add_argument("--limit", type=int)
+    args = parser.parse_args()
+
+    with ProjectStore(args.db) as store:
+        if args.command == "import":
+            name = args.name or Path(args.project).stem
+            tanks = load_project(args.project)
+            store.save_project(name, tanks)
+            print(f"Stored project '{name}' ({len(tanks)} tanks) in {args.db}")
+        else:
+            rows = store.query_options(args.tank_type, args.max_footprint, args.min_volume, args.max_volume,
+                                       args.max_depth, args.project, args.limit)
+            for row in rows:
+                print(f"{row['project']} / {row['tank_name']} ({row['tank_type']}): {row['name']} "
+                      f"{row['length']:.2f} x {row['width']:.2f} x {row['depth']:.2f} m, "
+                      f"footprint {row['footprint']:.2f} m²")
+            print(f"{len(rows)} options")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""Batch validation of tank and compartment inputs.
+
+A Schema is compiled once from per-field rules into column checks. validate()
+turns each input column into a NumPy array in one pass and runs every check
+on the whole column, so all problems of all rows are found at once and
+returned as a ValidationReport with 1-based row numbers, before any sizing
+or export work starts.
+
+Numbers are parsed in chunks: a chunk NumPy converts in one call (floats,
+ints, numeric strings) costs nothing per value, and only a chunk holding a
+bad value is parsed value by value to find it. Only None and blank strings
+count as missing; booleans and NaN ("nan" too) are not numbers, and
+infinities must be finite. Duplicate names are found by
+sorting their hashes; only names with colliding hashes are compared.
+
+Rules per field:
+    type      "number" (default) or "name"
+    required  a missing or blank value is an error (default True)
+    positive  numbers must be > 0
+    min, max  inclusive numeric range
+    unique    names must not repeat
+"""
+from itertools import repeat
+
+import numpy as np
+
+CHUNK = 65536
+# Values a chunk must not hold to be converted by NumPy in one call
+UNPARSED_TYPES = frozenset((type(None), bool, np.bool_))
+# Errors listed by ValidationReport.format() before "... and N more"
+FORMAT_LIMIT = 20
+
+
+class ValidationError(ValueError):
+    """Raised with the full report when inputs are invalid"""
+
+    def __init__(self, report, context=None):
+        self.report = report
+        text = report.format()
+        super().__init__(f"{context}:\n{text}" if context else text)
+
+
+class ValidationReport:
+    """Every error found by Schema.validate, grouped by check"""
+
+    def __init__(self, row_count, labels=None):
+        self.row_count = row_count
+        self.labels = labels
+        self.groups = []  # (field, message, row indices)
+        self.columns = {}  # parsed columns, set by Schema.validate
+
+    def add(self, field, message, mask):
+        rows = np.flatnonzero(mask) if mask.dtype == bool else mask
+        if len(rows):
+            self.groups.append((field, message, rows))
+
+    @property
+    def ok(self):
+        return not self.groups
+
+    @property
+    def error_count(self):
+        return sum(len(rows) for _, _, rows in self.groups)
+
+    @property
+    def bad_rows(self):
+        """Sorted indices (0-based) of the rows with at least one error"""
+        if not self.groups:
+            return np.zeros(0, dtype=np.int64)
+        return np.unique(np.concatenate([rows for _, _, rows in self.groups]))
+
+    def errors(self, limit=None):
+        """Error dicts ({"row", "name", "field", "message"}) ordered by row"""
+        if not self.groups:
+            return []
+        rows = np.concatenate([rows for _, _, rows in self.groups])
+        group = np.repeat(np.arange(len(self.groups)), [len(r) for _, _, r in self.groups])
+        order = np.lexsort((group, rows))[:limit]
+        result = []
+        for i in order.tolist():
+            row = int(rows[i])
+            field, message, _ = self.groups[group[i]]
+            label = self.labels[row] if self.labels is not None else None
+            result.append({"row": row + 1, "name": label or None, "field": field, "message": message})
+        return result
+
+    def by_row(self):
+        """{row index (0-based): ["field message", ...]}"""
+        messages = {}
+        for error in self.errors():
+            messages.setdefault(error["row"] - 1, []).append(f"{error['field']} {error['message']}")
+        return messages
+
+    def format(self, limit=FORMAT_LIMIT):
+        """One line per error, e.g. "Row 3 (Fire Tank): volume must be positive" """
+        lines = []
+        for error in self.errors(limit):
+            where = f"Row {error['row']}" + (f" ({error['name']})" if error["name"] else "")
+            lines.append(f"{where}: {error['field']} {error['message']}")
+        if self.error_count > len(lines):
+            lines.append(f"... and {self.error_count - len(lines)} more errors")
+        return "\n".join(lines)
+
+
+def _numbers(values):
+    """Float array of a column plus masks of missing and non-numeric values"""
+    n = len(values)
+    missing = np.zeros(n, dtype=bool)
+    if isinstance(values, np.ndarray) and values.dtype.kind in "fiub":
+        # A bool column holds flags, not numbers
+        out = np.full(n, np.nan) if values.dtype.kind == "b" else values.astype(float)
+        return out, missing, np.isnan(out)
+    out = np.empty(n)
+    invalid = np.zeros(n, dtype=bool)
+    for start in range(0, n, CHUNK):
+        chunk = values[start:start + CHUNK]
+        # NumPy would turn True into 1.0 and None into NaN, so those go value by value
+        if not UNPARSED_TYPES.intersection(map(type, chunk)):
+            try:
+                out[start:start + len(chunk)] = np.asarray(chunk, dtype=float)
+                continue
+            except (TypeError, ValueError, OverflowError):
+                pass
+        for i, value in enumerate(chunk, start):
+            if value is None or (isinstance(value, str) and not value.strip()):
+                out[i] = np.nan
+                missing[i] = True
+            elif isinstance(value, (bool, np.bool_)):
+                out[i] = np.nan
+            else:
+                try:
+                    out[i] = float(value)
+                except OverflowError:
+                    # An int beyond float range, like "1e400": reported as not finite
+                    out[i] = np.inf
+                except (TypeError, ValueError):
+                    out[i] = np.nan
+    invalid |= np.isnan(out) & ~missing
+    return out, missing, invalid
+
+
+def _names(values):
+    """Names as a list of str plus the mask of blank ones"""
+    n = len(values)
+    try:
+        blank = np.fromiter(map(len, values), dtype=np.int64, count=n) == 0
+        blank |= np.fromiter(map(str.isspace, values), dtype=bool, count=n)
+    except TypeError:
+        # Not all str (e.g. None or numbers): normalize first
+        values = ["" if v is None else str(v) for v in values]
+        blank = np.fromiter((not v.strip() for v in values), dtype=bool, count=n)
+    return values, blank
+
+
+def _duplicates(names, blank):
+    """Rows whose (non-blank) name already appeared in an earlier row"""
+    rows = np.flatnonzero(~blank)
+    hashes = np.fromiter(map(hash, names), dtype=np.int64, count=len(names))[rows]
+    ordered = np.sort(hashes)
+    if not (ordered[1:] == ordered[:-1]).any():
+        return np.zeros(0, dtype=np.int64)
+    order = np.argsort(hashes, kind="stable")
+    h = hashes[order]
+    same = h[1:] == h[:-1]
+    collide = np.zeros(len(h), dtype=bool)
+    collide[1:] |= same
+    collide[:-1] |= same
+    seen = set()
+    duplicates = []
+    for row in np.sort(rows[order[collide]]).tolist():
+        if names[row] in seen:
+            duplicates.append(row)
+        else:
+            seen.add(names[row])
+    return np.asarray(duplicates, dtype=np.int64)
+
+
+class Schema:
+    """Validation rules for the columns of a table, compiled once"""
+
+    def __init__(self, fields, label="name"):
+        self.fields = fields
+        self.label = label if label in fields else None
+        self.checks = []  # (field, kind, required, unique, [(test, message)])
+        for field, rule in fields.items():
+            kind = rule.get("type", "number")
+            if kind not in ("number", "name"):
+                raise ValueError(f"Unknown field type '{kind}' for {field}")
+            tests = []
+            if rule.get("positive"):
+                tests.append((lambda a: a <= 0, "must be positive"))
+            if "min" in rule:
+                tests.append((lambda a, v=rule["min"]: a < v, f"must be at least {rule['min']:g}"))
+            if "max" in rule:
+                tests.append((lambda a, v=rule["max"]: a > v, f"must be at most {rule['max']:g}"))
+            self.checks.append((field, kind, rule.get("required", True), rule.get("unique", False), tests))
+
+    def columns(self, data):
+        """Columns of rows (a list of dicts) or of a {field: sequence} mapping"""
+        if isinstance(data, dict):
+            n = len(next(iter(data.values()), ()))
+            return {field: data[field] if field in data else [None] * n for field in self.fields}
+        try:
+            return {field: list(map(dict.get, data, repeat(field))) for field in self.fields}
+        except TypeError:
+            # Rows that are not dicts count as empty
+            return {field: [row.get(field) if isinstance(row, dict) else None for row in data]
+                    for field in self.fields}
+
+    def validate(self, data):
+        """Check every row; the report's .columns holds the parsed columns"""
+        columns = self.columns(data)
+        n = len(next(iter(columns.values()), ()))
+        report = ValidationReport(n)
+        for field, kind, required, unique, tests in self.checks:
+            values = columns[field]
+            if kind == "name":
+                names, blank = _names(values)
+                if required:
+                    report.add(field, "is missing", blank)
+                if unique:
+                    report.add(field, "repeats the name of an earlier row", _duplicates(names, blank))
+                report.columns[field] = names
+                continue
+            numbers, missing, invalid = _numbers(values)
+            if required:
+                report.add(field, "is missing", missing)
+            report.add(field, "is not a number", invalid)
+            infinite = np.isinf(numbers)
+            report.add(field, "must be finite", infinite)
+            ok = ~(missing | invalid | infinite)
+            for test, message in tests:
+                with np.errstate(invalid="ignore"):
+                    report.add(field, message, ok & test(numbers))
+            report.columns[field] = numbers
+        if self.label:
+            report.labels = report.columns[self.label]
+        return report
+
+
+TANK_SCHEMA = Schema({
+    "name": {"type": "name", "unique": True},
+    "depth": {"positive": True},
+    "volume": {"positive": True},
+})
+
+COMPARTMENT_SCHEMA = Schema({
+    # Unnamed compartments get a default name
+    "name": {"type": "name", "required": False, "unique": True},
+    "volume": {"positive": True},
+})
+
+COMPARTMENT_SPEC_SCHEMA = Schema({
+    "depth": {"positive": True},
+    "fixed_value": {"positive": True},
+})
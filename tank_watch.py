@@ -0,0 +1,54 @@
+"""Polling file watcher for the --watch modes of the export scripts.
+
+Input files are checked every WATCH_INTERVAL seconds by modification time
+and size, which needs no extra dependency and works the same on every
+platform. Callers re-parse a changed file and use diff_specs to find the
+entries whose parsed spec actually changed, so only those are regenerated.
+"""
+import os
+import time
+
+WATCH_INTERVAL = 0.05
+
+
+def file_signature(path):
+    """(mtime, size) of a file, or None while it does not exist"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def watch_files(paths, on_change, interval=WATCH_INTERVAL, baseline=None):
+    """Call on_change(changed_paths) whenever watched files change.
+
+    baseline maps paths to the signatures taken when they were last read,
+    so changes made during an initial export are not missed. Runs until
+    interrupted with Ctrl+C.
+    """
+    paths = list(paths)
+    baseline = baseline or {}
+    last = {path: baseline[path] if path in baseline else file_signature(path) for path in paths}
+    print(f"Watching {', '.join(str(p) for p in paths)} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(interval)
+            changed = []
+            for path in paths:
+                signature = file_signature(path)
+                if signature != last[path]:
+                    last[path] = signature
+                    if signature is not None:
+                        changed.append(path)
+            if changed:
+                on_change(changed)
+    except KeyboardInterrupt:
+        print("Stopped watching")
+
+
+def diff_specs(old, new):
+    """Return (changed, removed) keys between two {key: spec} mappings"""
+    changed = [key for key, spec in new.items() if key not in old or old[key] != spec]
+    removed = [key for key in old if key not in new]
+    return changed, removed
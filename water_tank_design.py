@@ -1,31 +1,71 @@
 import tkinter as tk
-from tkinter import messagebox, ttk, filedialog
+from tkinter import messagebox, ttk, filedialog, simpledialog
 import math
 import argparse
 import json
 from pathlib import Path
 import random
 import os
+import sqlite3
+import time
 from datetime import datetime
 
+from design_space import default_space
+from drawing_viewer import DrawingViewer
+from geometry_ir import emit, partial_path
+from tank_history import History, Snapshot
+from tank_mesh import option_meshes, write_mesh
+from tank_panels import format_panels, snap_option
+from tank_project import DEFAULT_TANKS, PALETTE, load_project, save_project, tank_inputs
+from tank_quantities import (DEFAULT_FILL_FRACTION, DEFAULT_INFLOW_RATE, DEFAULT_OUTFLOW_RATE,
+                             DEFAULT_WALL_THICKNESS, format_quantities, option_quantities)
+from tank_results import ExportJournal, ResultsWriter, result_row, unit_key
+from tank_simulation import simulate_tanks, tank_kind
+from tank_sizing import design_options, option_drawing, sizing_cache_info
+from tank_store import STORE_SUFFIXES, ProjectStore
+from tank_validation import TANK_SCHEMA
+from tank_watch import diff_specs, file_signature, watch_files
+
+# Delay after the last keystroke before a tank is recalculated
+LIVE_UPDATE_DELAY_MS = 250
+# Checkpoint journal and failure report written into the export directory
+JOURNAL_NAME = "export_journal.jsonl"
+FAILURE_REPORT_NAME = "export_failures.json"
+
 class WaterTankDesigner:
-    def __init__(self, root):
+    def __init__(self, root, tanks=None):
         self.root = root
         self.root.title("Water Tank Design Calculator")
         self.root.geometry("700x800")
         
-        # Tank types
-        self.tank_types = {
-            "Domestic Tank": {"quantity": 1, "color": "lightblue"},
-            "Flushing Tank": {"quantity": 1, "color": "lightgreen"},
-            "Fire Tank 1": {"quantity": 1, "color": "lightcoral"},
-            "Fire Tank 2": {"quantity": 1, "color": "lightsalmon"}
-        }
+        # Tank types and their raw inputs, in project order
+        self.tank_types = {}
+        self.tank_inputs = {}
         
         self.tank_data = {}
         self.design_options = {}
+        self.design_quantities = {}
         self.current_option = 0
+        self.options_window = None
+        self.project_path = None
+        self.selected_tank = None
+        
+        # Live recalculation state
+        self.dirty_tanks = set()
+        self.live_inputs = {}
+        self.live_update_job = None
+        self.loading_editor = False
+        
+        # Undo history: tanks edited since the last snapshot
+        self.history = None
+        self.history_changes = set()
+        self.history_order_changed = False
         self.create_widgets()
+        
+        if tanks is None:
+            # Start with the standard tanks and empty inputs
+            tanks = [dict(t, depth=None, volume=None) for t in DEFAULT_TANKS]
+        self.load_tanks(tanks)
     
     def create_widgets(self):
         # Title
@@ -33,16 +73,42 @@ class WaterTankDesigner:
                         font=("Arial", 16, "bold"))
         title.pack(pady=10)
         
-        # Create notebook for tabs
-        self.notebook = ttk.Notebook(self.root)
-        self.notebook.pack(fill="both", expand=True, padx=10, pady=10)
+        # Project buttons
+        project_frame = tk.Frame(self.root)
+        project_frame.pack(fill="x", padx=10)
+        tk.Button(project_frame, text="Open Project...", command=self.open_project).pack(side="left", padx=2)
+        tk.Button(project_frame, text="Save Project...", command=self.save_project_as).pack(side="left", padx=2)
+        tk.Button(project_frame, text="Add Tank", command=self.add_tank).pack(side="left", padx=2)
+        tk.Button(project_frame, text="Remove Tank", command=self.remove_tank).pack(side="left", padx=2)
+        tk.Button(project_frame, text="Undo", command=self.undo).pack(side="left", padx=2)
+        tk.Button(project_frame, text="Redo", command=self.redo).pack(side="left", padx=2)
+        tk.Button(project_frame, text="Checkpoint...", command=self.save_checkpoint).pack(side="left", padx=2)
+        tk.Button(project_frame, text="Restore...", command=self.restore_checkpoint).pack(side="left", padx=2)
+        self.root.bind("<Control-z>", lambda e: self.undo())
+        self.root.bind("<Control-y>", lambda e: self.redo())
+        self.root.bind("<Control-Z>", lambda e: self.redo())
         
-        # Create frames for each tank type
-        self.entries = {}
-        for tank_name in self.tank_types.keys():
-            frame = ttk.Frame(self.notebook)
-            self.notebook.add(frame, text=tank_name)
-            self.create_tank_input_frame(frame, tank_name)
+        # Tank table: rows are plain Treeview items, one shared editor below
+        table_frame = tk.Frame(self.root)
+        table_frame.pack(fill="both", expand=True, padx=10, pady=10)
+        
+        columns = ("depth", "volume", "dimensions")
+        self.tank_table = ttk.Treeview(table_frame, columns=columns, height=8)
+        self.tank_table.heading("#0", text="Tank")
+        self.tank_table.heading("depth", text="Depth (m)")
+        self.tank_table.heading("volume", text="Volume (m³)")
+        self.tank_table.heading("dimensions", text="Rectangular (2:1) L × W (m)")
+        self.tank_table.column("#0", width=180)
+        self.tank_table.column("depth", width=80, anchor="e")
+        self.tank_table.column("volume", width=90, anchor="e")
+        self.tank_table.column("dimensions", width=200)
+        table_scroll = ttk.Scrollbar(table_frame, orient="vertical", command=self.tank_table.yview)
+        self.tank_table.configure(yscrollcommand=table_scroll.set)
+        self.tank_table.pack(side="left", fill="both", expand=True)
+        table_scroll.pack(side="right", fill="y")
+        self.tank_table.bind("<<TreeviewSelect>>", self.on_tank_selected)
+        
+        self.create_tank_input_frame(self.root)
         
         # Buttons frame
         button_frame = tk.Frame(self.root)
@@ -57,96 +123,320 @@ class WaterTankDesigner:
                              command=self.reset_form,
                              bg="orange", fg="white", font=("Arial", 10, "bold"))
         reset_btn.pack(side="left", padx=5)
+        
+        explorer_btn = tk.Button(button_frame, text="Design Explorer",
+                                 command=self.open_design_explorer,
+                                 bg="purple", fg="white", font=("Arial", 10, "bold"))
+        explorer_btn.pack(side="left", padx=5)
     
-    def create_tank_input_frame(self, parent, tank_name):
+    def create_tank_input_frame(self, parent):
         # Main container
         main_frame = tk.Frame(parent)
-        main_frame.pack(fill="both", expand=True, padx=20, pady=20)
+        main_frame.pack(fill="x", padx=20)
         
         # Tank name label
-        name_label = tk.Label(main_frame, text=f"{tank_name} Specifications", 
-                            font=("Arial", 12, "bold"))
-        name_label.pack(pady=10)
+        name_label = tk.Label(main_frame, text="", font=("Arial", 12, "bold"))
+        name_label.pack(pady=5)
+        
+        inputs_frame = tk.Frame(main_frame)
+        inputs_frame.pack(side="left", fill="y")
         
         # Depth input
-        depth_frame = tk.Frame(main_frame)
+        depth_frame = tk.Frame(inputs_frame)
         depth_frame.pack(fill="x", pady=10)
         tk.Label(depth_frame, text="Depth (meters):", font=("Arial", 10), width=20, anchor="w").pack(side="left")
-        depth_entry = tk.Entry(depth_frame, font=("Arial", 10), width=15)
+        depth_var = tk.StringVar()
+        depth_entry = tk.Entry(depth_frame, textvariable=depth_var, font=("Arial", 10), width=15)
         depth_entry.pack(side="left", padx=10)
         
         # Volume input
-        volume_frame = tk.Frame(main_frame)
+        volume_frame = tk.Frame(inputs_frame)
         volume_frame.pack(fill="x", pady=10)
         tk.Label(volume_frame, text="Volume (cubic meters):", font=("Arial", 10), width=20, anchor="w").pack(side="left")
-        volume_entry = tk.Entry(volume_frame, font=("Arial", 10), width=15)
+        volume_var = tk.StringVar()
+        volume_entry = tk.Entry(volume_frame, textvariable=volume_var, font=("Arial", 10), width=15)
         volume_entry.pack(side="left", padx=10)
         
         # Info frame
-        info_frame = tk.LabelFrame(main_frame, text="Calculated Dimensions", font=("Arial", 10, "bold"))
+        info_frame = tk.LabelFrame(inputs_frame, text="Calculated Dimensions", font=("Arial", 10, "bold"))
         info_frame.pack(fill="x", pady=15)
         
         info_label = tk.Label(info_frame, text="", font=("Arial", 9), justify="left")
         info_label.pack(padx=10, pady=10)
         
-        self.entries[tank_name] = {
-            "depth": depth_entry,
-            "volume": volume_entry,
-            "info_label": info_label
+        # Live preview of the rectangular (2:1) option
+        preview_canvas = tk.Canvas(main_frame, width=220, height=220, bg="white", relief="sunken", border=2)
+        preview_canvas.pack(side="right", pady=5)
+        
+        self.editor = {
+            "name_label": name_label,
+            "depth": depth_var,
+            "volume": volume_var,
+            "info_label": info_label,
+            "preview": preview_canvas
         }
+        
+        # Recalculate the selected tank while typing
+        for field, var in (("depth", depth_var), ("volume", volume_var)):
+            var.trace_add("write", lambda *_, f=field, v=var: self.on_editor_change(f, v))
     
-    def calculate_tanks(self):
+    def load_tanks(self, tanks):
+        """Replace the tank table with the given tank list"""
+        self.tank_types = {}
+        self.tank_inputs = {}
+        self.live_inputs = {}
+        self.dirty_tanks = set()
+        self.selected_tank = None
+        self.tank_table.delete(*self.tank_table.get_children())
+        for tank in tanks:
+            self.insert_tank(tank, schedule=False)
+        self.schedule_live_update()
+        
+        children = self.tank_table.get_children()
+        if children:
+            self.tank_table.selection_set(children[0])
+        # A newly loaded project starts a fresh history
+        self.history = History(Snapshot.build({name: self.tank_record(name) for name in self.tank_inputs}))
+        self.history_changes = set()
+        self.history_order_changed = False
+    
+    def insert_tank(self, tank, schedule=True):
+        name = tank["name"]
+        # Optional project keys (e.g. "kind", "daily_demand") are carried along
+        extra = {k: v for k, v in tank.items() if k not in ("name", "depth", "volume", "color")}
+        self.tank_types[name] = {"quantity": 1, "color": tank["color"], "extra": extra}
+        self.tank_inputs[name] = {
+            "depth": "" if tank.get("depth") is None else str(tank["depth"]),
+            "volume": "" if tank.get("volume") is None else str(tank["volume"]),
+        }
+        self.tank_table.insert("", "end", iid=name, text=name,
+                               values=(self.tank_inputs[name]["depth"], self.tank_inputs[name]["volume"], ""))
+        self.dirty_tanks.add(name)
+        if schedule:
+            self.schedule_live_update()
+    
+    def project_tanks(self):
+        """Return the current tanks in project file form"""
+        return [dict(self.tank_types[name]["extra"], name=name, depth=inputs["depth"] or None,
+                     volume=inputs["volume"] or None, color=self.tank_types[name]["color"])
+                for name, inputs in self.tank_inputs.items()]
+    
+    def open_project(self):
+        file_path = filedialog.askopenfilename(filetypes=[("Project files", "*.json"),
+                                                          ("Project stores", " ".join(f"*{s}" for s in STORE_SUFFIXES)),
+                                                          ("All files", "*.*")])
+        if not file_path:
+            return
+        try:
+            tanks = open_any_project(file_path)
+        except (OSError, ValueError, sqlite3.Error) as e:
+            messagebox.showerror("Error", f"Failed to open project: {str(e)}")
+            return
+        self.project_path = file_path
+        self.load_tanks(tanks)
+    
+    def save_project_as(self):
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".json",
+            filetypes=[("Project files", "*.json"),
+                       ("Project stores", " ".join(f"*{s}" for s in STORE_SUFFIXES)),
+                       ("All files", "*.*")],
+            initialfile=Path(self.project_path).name if self.project_path else "tanks.json"
+        )
+        if not file_path:
+            return
+        try:
+            if Path(file_path).suffix.lower() in STORE_SUFFIXES:
+                with ProjectStore(file_path) as store:
+                    store.save_project(Path(file_path).stem, self.project_tanks())
+            else:
+                save_project(file_path, self.project_tanks())
+        except (OSError, sqlite3.Error) as e:
+            messagebox.showerror("Error", f"Failed to save project: {str(e)}")
+            return
+        self.project_path = file_path
+    
+    def add_tank(self):
+        idx = len(self.tank_inputs) + 1
+        while f"Tank {idx}" in self.tank_inputs:
+            idx += 1
+        name = f"Tank {idx}"
+        self.insert_tank({"name": name, "color": PALETTE[(idx - 1) % len(PALETTE)]})
+        self.tank_table.selection_set(name)
+        self.tank_table.see(name)
+        self.history_changes.add(name)
+        self.history_order_changed = True
+        self.record_history()
+    
+    def remove_tank(self):
+        for name in self.tank_table.selection():
+            self.tank_table.delete(name)
+            del self.tank_inputs[name]
+            del self.tank_types[name]
+            self.live_inputs.pop(name, None)
+            self.dirty_tanks.discard(name)
+            self.history_changes.add(name)
+            self.history_order_changed = True
+        self.record_history()
+        self.selected_tank = None
+        children = self.tank_table.get_children()
+        if children:
+            self.tank_table.selection_set(children[0])
+        else:
+            self.show_tank_in_editor(None)
+    
+    def on_tank_selected(self, event=None):
+        selection = self.tank_table.selection()
+        if selection and selection[0] != self.selected_tank:
+            self.show_tank_in_editor(selection[0])
+    
+    def show_tank_in_editor(self, tank_name):
+        """Point the shared editor at another tank"""
+        self.selected_tank = tank_name
+        inputs = self.tank_inputs.get(tank_name, {"depth": "", "volume": ""})
+        self.loading_editor = True
         try:
-            self.tank_data = {}
+            self.editor["depth"].set(inputs["depth"])
+            self.editor["volume"].set(inputs["volume"])
+        finally:
+            self.loading_editor = False
+        self.editor["name_label"].config(text=f"{tank_name} Specifications" if tank_name else "")
+        # Redraw the editor from the stored inputs
+        self.live_inputs.pop(tank_name, None)
+        self.dirty_tanks.add(tank_name)
+        self.schedule_live_update()
+    
+    def on_editor_change(self, field, var):
+        if self.loading_editor or self.selected_tank is None:
+            return
+        self.tank_inputs[self.selected_tank][field] = var.get()
+        self.dirty_tanks.add(self.selected_tank)
+        self.history_changes.add(self.selected_tank)
+        self.schedule_live_update()
+    
+    def schedule_live_update(self):
+        """(Re)start the debounce timer for dirty tanks"""
+        if self.live_update_job is not None:
+            self.root.after_cancel(self.live_update_job)
+        self.live_update_job = self.root.after(LIVE_UPDATE_DELAY_MS, self.run_live_updates)
+    
+    def run_live_updates(self):
+        """Refresh the table row, and the editor if selected, of every dirty tank"""
+        self.live_update_job = None
+        # Keystrokes within one debounce window make one undo step
+        self.record_history()
+        dirty, self.dirty_tanks = self.dirty_tanks, set()
+        for tank_name in dirty:
+            if tank_name is None:
+                self.update_editor(None, ("", ""), None)
+                continue
+            if tank_name not in self.tank_inputs:
+                continue
+            raw = self.tank_inputs[tank_name]
+            inputs = (raw["depth"].strip(), raw["volume"].strip())
+            # Skip tanks whose inputs did not change since the last update
+            if self.live_inputs.get(tank_name) == inputs:
+                continue
+            self.live_inputs[tank_name] = inputs
             
-            for tank_name, entry_dict in self.entries.items():
-                depth_str = entry_dict["depth"].get().strip()
-                volume_str = entry_dict["volume"].get().strip()
-                
-                # Validate input is not empty
-                if not depth_str or not volume_str:
-                    raise ValueError(f"{tank_name}: Both Depth and Volume fields must be filled")
-                
-                # Convert to float with error handling
-                try:
-                    depth = float(depth_str)
-                    volume = float(volume_str)
-                except ValueError:
-                    raise ValueError(f"{tank_name}: Please enter valid numbers (not text)")
-                
-                if depth <= 0 or volume <= 0:
-                    raise ValueError(f"{tank_name}: Depth and Volume must be positive values")
-                
-                # Calculate base area from volume
-                # Volume = Base Area × Depth
-                base_area = volume / depth
-                
-                # Assuming square tank: length = width = sqrt(base_area)
-                side_length = math.sqrt(base_area)
-                
-                # Alternative: rectangular tank with aspect ratio 2:1
-                length = math.sqrt(base_area * 2)
-                width = base_area / length
-                
-                self.tank_data[tank_name] = {
-                    "depth": depth,
-                    "volume": volume,
-                    "base_area": base_area,
-                    "length": length,
-                    "width": width,
-                    "side_length": side_length
-                }
-                
-                # Update info label
-                info_text = f"Square Tank: {side_length:.2f}m × {side_length:.2f}m × {depth:.2f}m\n"
-                info_text += f"Rectangular Tank: {length:.2f}m × {width:.2f}m × {depth:.2f}m\n"
-                info_text += f"Base Area: {base_area:.2f} m²\n"
-                info_text += f"Volume: {volume:.2f} m³"
-                
-                entry_dict["info_label"].config(text=info_text)
+            try:
+                depth, volume = self.parse_tank_inputs(tank_name, *inputs)
+                data = self.compute_tank_data(depth, volume)
+                error = None
+            except ValueError as e:
+                data = None
+                error = str(e) if all(inputs) else ""
+            
+            dims = f"{data['length']:.2f} × {data['width']:.2f}" if data else error
+            self.tank_table.item(tank_name, values=(inputs[0], inputs[1], dims))
+            if tank_name == self.selected_tank:
+                self.update_editor(tank_name, inputs, data, error)
+    
+    def update_editor(self, tank_name, inputs, data, error=""):
+        canvas = self.editor["preview"]
+        canvas.delete("all")
+        if data is None:
+            self.editor["info_label"].config(text=error or "")
+            return
+        self.editor["info_label"].config(text=self.format_tank_info(data))
+        canvas.create_text(110, 10, text="Top View", font=("Arial", 10, "bold"))
+        self.draw_top_view_canvas(canvas, tank_name, data)
+    
+    def parse_tank_inputs(self, tank_name, depth_str, volume_str):
+        """Validate the raw depth/volume strings of a tank"""
+        # Validate input is not empty
+        if not depth_str or not volume_str:
+            raise ValueError(f"{tank_name}: Both Depth and Volume fields must be filled")
+        
+        # Convert to float with error handling
+        try:
+            depth = float(depth_str)
+            volume = float(volume_str)
+        except ValueError:
+            raise ValueError(f"{tank_name}: Please enter valid numbers (not text)")
+        
+        if depth <= 0 or volume <= 0:
+            raise ValueError(f"{tank_name}: Depth and Volume must be positive values")
+        return depth, volume
+    
+    def compute_tank_data(self, depth, volume):
+        """Calculate the square and 2:1 rectangular dimensions of a tank"""
+        # Calculate base area from volume
+        # Volume = Base Area × Depth
+        base_area = volume / depth
+        
+        # Assuming square tank: length = width = sqrt(base_area)
+        side_length = math.sqrt(base_area)
+        
+        # Alternative: rectangular tank with aspect ratio 2:1
+        length = math.sqrt(base_area * 2)
+        width = base_area / length
+        
+        return {
+            "depth": depth,
+            "volume": volume,
+            "base_area": base_area,
+            "length": length,
+            "width": width,
+            "side_length": side_length
+        }
+    
+    def format_tank_info(self, data):
+        side_length = data["side_length"]
+        depth = data["depth"]
+        info_text = f"Square Tank: {side_length:.2f}m × {side_length:.2f}m × {depth:.2f}m\n"
+        info_text += f"Rectangular Tank: {data['length']:.2f}m × {data['width']:.2f}m × {depth:.2f}m\n"
+        info_text += f"Base Area: {data['base_area']:.2f} m²\n"
+        info_text += f"Volume: {data['volume']:.2f} m³"
+        return info_text
+    
+    def calculate_tanks(self):
+        # Check every tank at once and report all problems together
+        names = list(self.tank_inputs)
+        report = TANK_SCHEMA.validate({
+            "name": names,
+            "depth": [inputs["depth"] for inputs in self.tank_inputs.values()],
+            "volume": [inputs["volume"] for inputs in self.tank_inputs.values()],
+        })
+        if not report.ok:
+            # Show the first offending tank in the editor
+            first = names[report.bad_rows[0]]
+            self.tank_table.selection_set(first)
+            self.tank_table.see(first)
+            messagebox.showerror("Input Error", f"{len(report.bad_rows)} of {len(names)} tanks have invalid inputs:\n\n"
+                                                f"{report.format()}")
+            return
+        
+        try:
+            depths = report.columns["depth"].tolist()
+            volumes = report.columns["volume"].tolist()
+            self.tank_data = {tank_name: self.compute_tank_data(depth, volume)
+                              for tank_name, depth, volume in zip(names, depths, volumes)}
             
             # Generate design options
             self.generate_design_options()
+            self.history_changes.update(self.tank_inputs)
+            self.record_history()
             # Display visualization
             self.display_design_options()
             
@@ -218,10 +508,11 @@ class WaterTankDesigner:
         color = self.tank_types[tank_name]["color"]
         canvas.create_rectangle(x1, y1, x2, y2, fill=color, outline="black", width=2)
         
-        # Draw water level (80% full)
-        water_level = y1 + (y2 - y1) * 0.8
+        # Draw operating water level
+        water_level = y2 - (y2 - y1) * DEFAULT_FILL_FRACTION
         canvas.create_rectangle(x1, water_level, x2, y2, fill="lightblue", outline="blue", width=1)
-        canvas.create_text((x1 + x2) / 2, water_level - 5, text="80%", font=("Arial", 7), fill="blue")
+        canvas.create_text((x1 + x2) / 2, water_level - 5, text=f"{DEFAULT_FILL_FRACTION:.0%}",
+                           font=("Arial", 7), fill="blue")
         
         # Draw dimensions
         canvas.create_text((x1 + x2) / 2, y2 + 15, text=f"{length:.1f}m", font=("Arial", 8))
@@ -232,47 +523,18 @@ class WaterTankDesigner:
         self.design_options = {}
         
         for tank_name, data in self.tank_data.items():
-            options = []
-            base_area = data["base_area"]
-            depth = data["depth"]
-            
-            # Option 1: Square Tank
-            side = math.sqrt(base_area)
-            options.append({
-                "name": "Square Tank",
-                "length": side,
-                "width": side,
-                "depth": depth,
-                "aspect_ratio": "1:1"
-            })
-            
-            # Option 2: Rectangular Tank (2:1)
-            length = math.sqrt(base_area * 2)
-            width = base_area / length
-            options.append({
-                "name": "Rectangular Tank (2:1)",
-                "length": length,
-                "width": width,
-                "depth": depth,
-                "aspect_ratio": "2:1"
-            })
-            
-            # Option 3: Rectangular Tank (3:1)
-            length = math.sqrt(base_area * 3)
-            width = base_area / length
-            options.append({
-                "name": "Rectangular Tank (3:1)",
-                "length": length,
-                "width": width,
-                "depth": depth,
-                "aspect_ratio": "3:1"
-            })
-            
-            self.design_options[tank_name] = options
+            self.design_options[tank_name] = design_options(data["volume"], data["depth"])
+        
+        # Derived quantities of all tanks and options in one batch
+        self.design_quantities = option_quantities(self.design_options)
     
     def display_design_options(self):
         """Display all design options in a new window with scrolling"""
+        # Replace the window of the previous calculation instead of stacking them
+        if self.options_window is not None and self.options_window.winfo_exists():
+            self.options_window.destroy()
         options_window = tk.Toplevel(self.root)
+        self.options_window = options_window
         options_window.title("Tank Design Options")
         options_window.geometry("1200x1000")
         
@@ -410,7 +672,7 @@ class WaterTankDesigner:
         """Show detailed view of selected design"""
         design_window = tk.Toplevel(self.root)
         design_window.title(f"Selected Design - {tank_name}")
-        design_window.geometry("700x600")
+        design_window.geometry("700x800")
         
         # Title
         title_label = tk.Label(design_window, text=f"{tank_name} - {option['name']}", 
@@ -427,6 +689,10 @@ class WaterTankDesigner:
         # Draw isometric view
         self.draw_isometric_tank(canvas, option, tank_name)
         
+        idx = self.design_options[tank_name].index(option)
+        quantities = self.design_quantities[tank_name][idx]
+        demand_check = self.check_demand(tank_name, option)
+        
         # Details panel
         details_frame = tk.LabelFrame(design_window, text="Tank Specifications", 
                                      font=("Arial", 11, "bold"))
@@ -440,6 +706,9 @@ Volume: {self.tank_data[tank_name]['volume']:.2f} m³
 Base Area: {option['length'] * option['width']:.2f} m²
 Surface Area: {2 * (option['length'] + option['width']) * option['depth']:.2f} m²
 Aspect Ratio: {option['aspect_ratio']}
+{format_quantities(quantities)}
+{format_panels(snap_option(option))}
+{demand_check}
         """
         
         details_label = tk.Label(details_frame, text=details_text, font=("Arial", 10), 
@@ -456,11 +725,39 @@ Aspect Ratio: {option['aspect_ratio']}
                                 bg="blue", fg="white", font=("Arial", 10, "bold"))
         save_dxf_btn.pack(side="left", padx=5)
         
+        save_mesh_btn = tk.Button(button_frame, text="Save 3D Model",
+                                  command=lambda: self.save_as_mesh(tank_name, option),
+                                  bg="blue", fg="white", font=("Arial", 10, "bold"))
+        save_mesh_btn.pack(side="left", padx=5)
+        
+        zoom_btn = tk.Button(button_frame, text="Zoom View",
+                             command=lambda: DrawingViewer(tk.Toplevel(self.root), option_drawing(tank_name, option),
+                                                           title=f"{tank_name} - {option['name']}"),
+                             font=("Arial", 10, "bold"))
+        zoom_btn.pack(side="left", padx=5)
+        
         # Close button
         close_btn = tk.Button(button_frame, text="Close", command=design_window.destroy,
                             bg="red", fg="white", font=("Arial", 10, "bold"))
         close_btn.pack(side="left", padx=5)
     
+    def check_demand(self, tank_name, option):
+        """Simulate a week of the tank's demand profile and summarize it"""
+        days = 7
+        tank = dict(self.tank_types[tank_name]["extra"], name=tank_name, depth=option["depth"],
+                    volume=self.tank_data[tank_name]["volume"])
+        _, result = simulate_tanks([tank], days=days)
+        if result["empty_steps"][0]:
+            hours = result["first_empty_step"][0] / 60
+            status = f"runs EMPTY after {hours:.1f} h ({result['unmet_volume'][0]:.2f} m³ unmet)"
+        elif result["overflow_steps"][0]:
+            status = f"OVERFLOWS ({result['overflow_volume'][0]:.2f} m³)"
+        else:
+            status = "meets demand"
+        kind = tank.get("kind") or tank_kind(tank_name)
+        return (f"Demand Check ({days} days, {kind} profile): {status}\n"
+                f"Level Range: {result['min_level'][0]:.2f} - {result['max_level'][0]:.2f} m³")
+    
     def draw_isometric_tank(self, canvas, option, tank_name):
         """Draw isometric view of tank"""
         length = option["length"]
@@ -510,13 +807,14 @@ Aspect Ratio: {option['aspect_ratio']}
                          text=f"Width: {width:.1f}m", font=("Arial", 10, "bold"))
         
         # Add water level indicator
-        water_depth = depth * 0.8
+        # Water surface sits below the top edge by the freeboard
+        water_depth = d_iso * (1 - DEFAULT_FILL_FRACTION)
         water_points = [x_center, y_center + water_depth, x_center + l_iso, y_center - w_iso + water_depth,
                        x_center + l_iso, y_center - w_iso + water_depth, x_center, y_center + water_depth]
         canvas.create_polygon(water_points, fill="lightblue", outline="blue", width=1)
     
     def save_as_dxf(self, tank_name, option):
-        """Save tank design as DXF file"""
+        """Save tank design as DXF file (or SVG/PDF/PNG) from the shared drawing"""
         try:
             # Try to use ezdxf if available
             try:
@@ -529,67 +827,38 @@ Aspect Ratio: {option['aspect_ratio']}
             # Ask user where to save
             file_path = filedialog.asksaveasfilename(
                 defaultextension=".dxf",
-                filetypes=[("DXF files", "*.dxf"), ("All files", "*.*")],
+                filetypes=[("DXF files", "*.dxf"), ("SVG files", "*.svg"), ("PDF files", "*.pdf"),
+                           ("PNG images", "*.png"), ("All files", "*.*")],
                 initialfile=f"{tank_name}_{option['name'].replace(' ', '_')}.dxf"
             )
             
             if not file_path:
                 return
             
-            # Create DXF file
-            dwg = ezdxf.new('R2010')
-            msp = dwg.modelspace()
-            
-            length = option['length']
-            width = option['width']
-            depth = option['depth']
-            
-            # Add title
-            msp.add_text(f"{tank_name} - {option['name']}", dxfattribs={'height': 10})
-            
-            # Draw top view (plan)
-            msp.add_lwpolyline([(0, 0), (length, 0), (length, width), (0, width), (0, 0)],
-                             dxfattribs={'color': 1})
-            
-            # Add dimensions for top view
-            msp.add_text(f"L: {length:.2f}m", dxfattribs={'height': 5, 'insert': (length/2, -2)})
-            msp.add_text(f"W: {width:.2f}m", dxfattribs={'height': 5, 'insert': (-3, width/2)})
-            
-            # Draw side view (elevation) offset
-            offset_y = width + 5
-            msp.add_lwpolyline([(0, offset_y), (length, offset_y), (length, offset_y + depth), 
-                              (0, offset_y + depth), (0, offset_y)],
-                             dxfattribs={'color': 2})
-            
-            # Add dimensions for side view
-            msp.add_text(f"L: {length:.2f}m", dxfattribs={'height': 5, 'insert': (length/2, offset_y - 2)})
-            msp.add_text(f"D: {depth:.2f}m", dxfattribs={'height': 5, 'insert': (-3, offset_y + depth/2)})
-            
-            # Add specifications as text
-            text_offset = offset_y + depth + 5
-            specs = [
-                f"Tank Name: {tank_name}",
-                f"Design Type: {option['name']}",
-                f"Length: {length:.2f} m",
-                f"Width: {width:.2f} m",
-                f"Depth: {depth:.2f} m",
-                f"Volume: {self.tank_data[tank_name]['volume']:.2f} m³",
-                f"Base Area: {length * width:.2f} m²",
-                f"Surface Area: {2 * (length + width) * depth:.2f} m²",
-                f"Aspect Ratio: {option['aspect_ratio']}",
-                f"Created: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-            ]
-            
-            for idx, spec in enumerate(specs):
-                msp.add_text(spec, dxfattribs={'height': 3, 'insert': (0, text_offset + idx * 1.5)})
-            
-            # Save the DXF file
-            dwg.saveas(file_path)
-            messagebox.showinfo("Success", f"DXF file saved successfully!\n\n{file_path}")
+            drawing = option_drawing(tank_name, option, dimensions=True,
+                                     created=datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+            emit(drawing, [file_path])
+            messagebox.showinfo("Success", f"Drawing saved successfully!\n\n{file_path}")
             
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save DXF file: {str(e)}")
     
+    def save_as_mesh(self, tank_name, option):
+        """Save the tank shell and water as a 3-D mesh"""
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".glb",
+            filetypes=[("glTF binary", "*.glb"), ("STL", "*.stl"), ("OBJ", "*.obj"), ("All files", "*.*")],
+            initialfile=f"{tank_name}_{option['name'].replace(' ', '_')}.glb"
+        )
+        if not file_path:
+            return
+        try:
+            write_mesh(file_path, option_meshes(option))
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Error", f"Failed to save 3D model: {str(e)}")
+            return
+        messagebox.showinfo("Success", f"3D model saved successfully!\n\n{file_path}")
+    
     def save_dxf_simple(self, tank_name, option):
         """Save tank design as simple DXF format (without ezdxf library)"""
         try:
@@ -649,112 +918,245 @@ TEXT
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save DXF file: {str(e)}")
     
+    def open_design_explorer(self):
+        """Browse the precomputed design space with sliders"""
+        space = default_space()
+        window = tk.Toplevel(self.root)
+        window.title("Design Explorer")
+        window.geometry("640x620")
+        
+        # Start from the selected tank's inputs when they are valid
+        volume, depth = 50.0, 2.5
+        inputs = self.tank_inputs.get(self.selected_tank)
+        if inputs:
+            try:
+                depth, volume = self.parse_tank_inputs(self.selected_tank, inputs["depth"].strip(),
+                                                       inputs["volume"].strip())
+            except ValueError:
+                pass
+        
+        variables = {}
+        for label, key, lo, hi, value, step in (
+                ("Volume (m³)", "volume", space.volumes[0], space.volumes[-1], volume, 1),
+                ("Depth (m)", "depth", space.depths[0], space.depths[-1], depth, 0.05),
+                ("Length:Width ratio", "ratio", space.ratios[0], space.ratios[-1], 1.0, 0.1)):
+            variables[key] = tk.DoubleVar(value=value)
+            tk.Scale(window, label=label, variable=variables[key], from_=float(lo), to=float(hi),
+                     resolution=step, orient="horizontal", length=560).pack(padx=10)
+        
+        info_label = tk.Label(window, font=("Arial", 10), justify="left", bg="lightyellow")
+        info_label.pack(fill="x", padx=10, pady=5)
+        tk.Label(window, text="Pareto frontier for this volume: footprint vs longest side",
+                 font=("Arial", 10, "bold")).pack()
+        canvas = tk.Canvas(window, width=600, height=300, bg="white")
+        canvas.pack(padx=10, pady=5)
+        state = {"volume_index": None, "scale": None}
+        
+        def to_canvas(footprint, longest):
+            x0, y0, sx, sy = state["scale"]
+            return 40 + (footprint - x0) * sx, 280 - (longest - y0) * sy
+        
+        def draw_frontier(volume_value):
+            # Only redrawn when the volume slider moves to another grid slice
+            index = space.nearest_volume_index(volume_value)
+            if index == state["volume_index"]:
+                return
+            state["volume_index"] = index
+            rows = space.frontier(index)
+            canvas.delete("all")
+            fx, px = rows[:, 2], rows[:, 4]
+            span_f = max(float(fx.max() - fx.min()), 1e-6)
+            span_p = max(float(px.max() - px.min()), 1e-6)
+            state["scale"] = (float(fx.min()), float(px.min()), 540 / span_f, 260 / span_p)
+            canvas.create_line(40, 280, 590, 280)
+            canvas.create_line(40, 280, 40, 10)
+            canvas.create_text(315, 292, text=f"footprint {fx.min():.1f}-{fx.max():.1f} m²", font=("Arial", 8))
+            canvas.create_text(40, 5, text=f"{px.max():.1f} m", font=("Arial", 8), anchor="w")
+            for depth_value, ratio_value, footprint, surface, longest in rows:
+                x, y = to_canvas(footprint, longest)
+                canvas.create_oval(x - 2, y - 2, x + 2, y + 2, fill="gray", outline="")
+        
+        def update(*_):
+            values = {key: var.get() for key, var in variables.items()}
+            draw_frontier(values["volume"])
+            m = space.lookup(values["volume"], values["depth"], values["ratio"])
+            info_label.config(text=f"L {m['length']:.2f} m × W {m['width']:.2f} m × D {values['depth']:.2f} m\n"
+                                   f"Footprint: {m['footprint']:.2f} m²   Surface Area: {m['surface_area']:.2f} m²   "
+                                   f"Longest side: {m['max_dimension']:.2f} m")
+            canvas.delete("design")
+            x, y = to_canvas(m["footprint"], m["max_dimension"])
+            canvas.create_oval(x - 5, y - 5, x + 5, y + 5, outline="red", width=2, tags="design")
+        
+        for var in variables.values():
+            var.trace_add("write", update)
+        update()
+    
     def reset_form(self):
         """Clear all input fields"""
-        for tank_name, entry_dict in self.entries.items():
-            entry_dict["depth"].delete(0, tk.END)
-            entry_dict["volume"].delete(0, tk.END)
-            entry_dict["info_label"].config(text="")
+        for tank_name, inputs in self.tank_inputs.items():
+            inputs["depth"] = ""
+            inputs["volume"] = ""
+            self.dirty_tanks.add(tank_name)
+            self.history_changes.add(tank_name)
+        self.record_history()
+        self.show_tank_in_editor(self.selected_tank)
         messagebox.showinfo("Reset", "All fields cleared!")
+    
+    def tank_record(self, name):
+        """History record of a tank, reusing the current one if nothing changed"""
+        inputs = self.tank_inputs[name]
+        record = {
+            "depth": inputs["depth"],
+            "volume": inputs["volume"],
+            "type": self.tank_types[name],
+            "data": self.tank_data.get(name),
+            "options": self.design_options.get(name),
+            "quantities": self.design_quantities.get(name),
+        }
+        old = self.history.current.tanks.get(name) if self.history else None
+        # Options and quantities follow from the data, so comparing it is enough
+        if old is not None and all(old[k] == record[k] for k in ("depth", "volume", "data")) \
+                and old["type"] is record["type"]:
+            return old
+        return record
+    
+    def record_history(self):
+        """Push a snapshot holding new records for the tanks changed since the last one"""
+        if self.history is None or not (self.history_changes or self.history_order_changed):
+            return
+        current = self.history.current
+        changes = {}
+        removals = []
+        for name in self.history_changes:
+            if name not in self.tank_inputs:
+                removals.append(name)
+                continue
+            record = self.tank_record(name)
+            if record is not current.tanks.get(name):
+                changes[name] = record
+        order = tuple(self.tank_inputs) if self.history_order_changed else None
+        self.history_changes = set()
+        self.history_order_changed = False
+        self.history.push(current.evolve(changes, removals, order))
+    
+    def restore_snapshot(self, snapshot):
+        """Rebuild the tank table and results from a history snapshot"""
+        selected = self.selected_tank
+        self.tank_types = {}
+        self.tank_inputs = {}
+        self.tank_data = {}
+        self.design_options = {}
+        self.design_quantities = {}
+        self.live_inputs = {}
+        self.dirty_tanks = set()
+        self.selected_tank = None
+        self.tank_table.delete(*self.tank_table.get_children())
+        for name, record in snapshot.records():
+            self.tank_types[name] = record["type"]
+            self.tank_inputs[name] = {"depth": record["depth"], "volume": record["volume"]}
+            if record["data"] is not None:
+                self.tank_data[name] = record["data"]
+            if record["options"] is not None:
+                self.design_options[name] = record["options"]
+                self.design_quantities[name] = record["quantities"]
+            self.tank_table.insert("", "end", iid=name, text=name, values=(record["depth"], record["volume"], ""))
+            self.dirty_tanks.add(name)
+        self.schedule_live_update()
+        
+        children = self.tank_table.get_children()
+        if selected in self.tank_inputs:
+            self.tank_table.selection_set(selected)
+            self.show_tank_in_editor(selected)
+        elif children:
+            self.tank_table.selection_set(children[0])
+        else:
+            self.show_tank_in_editor(None)
+    
+    def undo(self):
+        self.record_history()
+        snapshot = self.history.undo()
+        if snapshot is not None:
+            self.restore_snapshot(snapshot)
+    
+    def redo(self):
+        self.record_history()
+        snapshot = self.history.redo()
+        if snapshot is not None:
+            self.restore_snapshot(snapshot)
+    
+    def save_checkpoint(self):
+        name = simpledialog.askstring("Checkpoint", "Name for the current design state:", parent=self.root)
+        if not name:
+            return
+        self.record_history()
+        self.history.checkpoint(name.strip())
+    
+    def restore_checkpoint(self):
+        names = sorted(self.history.checkpoints)
+        if not names:
+            messagebox.showinfo("Restore Checkpoint", "No checkpoints saved yet.")
+            return
+        name = simpledialog.askstring("Restore Checkpoint", "Checkpoint to restore:\n" + "\n".join(names),
+                                      parent=self.root)
+        if not name:
+            return
+        if name.strip() not in self.history.checkpoints:
+            messagebox.showerror("Error", f"No checkpoint named '{name.strip()}'")
+            return
+        self.record_history()
+        self.restore_snapshot(self.history.restore(name.strip()))
 
 
-def main():
-    root = tk.Tk()
-    app = WaterTankDesigner(root)
-    root.mainloop()
-
-
-def headless_export(output_dir, input_data=None):
-    """Generate DXF files for provided tank inputs without launching the GUI.
+def open_any_project(path):
+    """Load a tank list from a project file or a project store.
 
-    input_data should be a dict mapping tank names to {"depth": float, "volume": float}.
-    If not provided, sensible defaults will be used.
+    A store loads the project named like the file, or its only project.
     """
-    outdir = Path(output_dir)
-    outdir.mkdir(parents=True, exist_ok=True)
+    if Path(path).suffix.lower() in STORE_SUFFIXES:
+        with ProjectStore(path) as store:
+            name = Path(path).stem
+            return store.load_tanks(name if name in store.project_names() else None)
+    return load_project(path)
 
-    # default sample inputs
-    defaults = {
-        "Domestic Tank": {"depth": 2.5, "volume": 10.0},
-        "Flushing Tank": {"depth": 1.5, "volume": 5.0},
-        "Fire Tank 1": {"depth": 3.0, "volume": 50.0},
-        "Fire Tank 2": {"depth": 4.0, "volume": 100.0}
-    }
-
-    data = input_data or defaults
-
-    for tank_name, params in data.items():
-        try:
-            depth = float(params["depth"])
-            volume = float(params["volume"])
-        except Exception:
-            print(f"Skipping {tank_name}: invalid parameters: {params}")
-            continue
 
-        if depth <= 0 or volume <= 0:
-            print(f"Skipping {tank_name}: non-positive values")
-            continue
+def main(project=None):
+    root = tk.Tk()
+    tanks = open_any_project(project) if project else None
+    app = WaterTankDesigner(root, tanks)
+    if project:
+        app.project_path = project
+    root.mainloop()
 
-        base_area = volume / depth
 
-        # produce same three options as GUI
-        options = []
-        side = math.sqrt(base_area)
-        options.append({"name": "Square Tank", "length": side, "width": side, "depth": depth, "aspect_ratio": "1:1"})
+def export_option_dxf(outpath, tank_name, option, volume, extra_formats=()):
+    """Write one design option to a DXF file and return its path.
 
-        length = math.sqrt(base_area * 2)
-        width = base_area / length
-        options.append({"name": "Rectangular Tank (2:1)", "length": length, "width": width, "depth": depth, "aspect_ratio": "2:1"})
-
-        length = math.sqrt(base_area * 3)
-        width = base_area / length
-        options.append({"name": "Rectangular Tank (3:1)", "length": length, "width": width, "depth": depth, "aspect_ratio": "3:1"})
+    extra_formats (e.g. ("svg", "pdf")) are written next to the DXF from the
+    same drawing geometry. Errors are raised to the caller; only a missing
+    ezdxf falls back to the basic DXF writer.
+    """
+    drawing = option_drawing(tank_name, option)
+    extra_paths = [outpath.with_suffix(f".{fmt.lower()}") for fmt in extra_formats]
+    try:
+        emit(drawing, [outpath] + extra_paths)
+        print(f"Wrote DXF: {outpath}")
+    except ImportError as e:
+        if e.name != "ezdxf":
+            raise
+        # The DXF is written first, so nothing else was written yet
+        _export_simple_dxf(outpath, tank_name, option, volume)
+        emit(drawing, extra_paths)
+    for path in extra_paths:
+        print(f"Wrote drawing: {path}")
+    return outpath
 
-        for option in options:
-            fname = f"{tank_name}_{option['name'].replace(' ', '_')}.dxf"
-            outpath = outdir / fname
 
-            # Try ezdxf first
-            try:
-                import ezdxf
-                dwg = ezdxf.new('R2010')
-                msp = dwg.modelspace()
-
-                L = option['length']
-                W = option['width']
-                D = option['depth']
-
-                msp.add_text(f"{tank_name} - {option['name']}", dxfattribs={'height': 10})
-                msp.add_lwpolyline([(0, 0), (L, 0), (L, W), (0, W), (0, 0)], dxfattribs={'color': 1})
-                offset_y = W + 5
-                msp.add_lwpolyline([(0, offset_y), (L, offset_y), (L, offset_y + D), (0, offset_y + D), (0, offset_y)], dxfattribs={'color': 2})
-
-                specs = [
-                    f"Tank Name: {tank_name}",
-                    f"Design Type: {option['name']}",
-                    f"Length: {L:.2f} m",
-                    f"Width: {W:.2f} m",
-                    f"Depth: {D:.2f} m",
-                    f"Volume: {volume:.2f} m³",
-                    f"Base Area: {L * W:.2f} m²",
-                    f"Surface Area: {2 * (L + W) * D:.2f} m²",
-                    f"Aspect Ratio: {option['aspect_ratio']}",
-                ]
-
-                text_offset = offset_y + D + 5
-                for idx, spec in enumerate(specs):
-                    msp.add_text(spec, dxfattribs={'height': 3, 'insert': (0, text_offset + idx * 1.5)})
-
-                dwg.saveas(str(outpath))
-                print(f"Wrote DXF: {outpath}")
-
-            except Exception:
-                # fallback simple DXF
-                try:
-                    L = option['length']
-                    W = option['width']
-                    D = option['depth']
-                    dxf_content = """999
+def _export_simple_dxf(outpath, tank_name, option, volume):
+    """Write a basic DXF without ezdxf"""
+    L = option['length']
+    W = option['width']
+    D = option['depth']
+    dxf_content = """999
 AutoCAD DXF file
 0
 SECTION
@@ -782,32 +1184,289 @@ TEXT
 10
 1
 """
-                    dxf_content += f"{tank_name} - {option['name']}\n0\nTEXT\n8\n0\n10\n0\n20\n-15\n40\n5\n1\n"
-                    dxf_content += f"Length: {L:.2f}m, Width: {W:.2f}m, Depth: {D:.2f}m\n0\nTEXT\n8\n0\n10\n0\n20\n-25\n40\n5\n1\n"
-                    dxf_content += f"Volume: {volume:.2f} m³\n0\nTEXT\n8\n0\n10\n0\n20\n-35\n40\n5\n1\n"
-                    dxf_content += f"Created: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n0\nENDSEC\n0\nEOF\n"
-                    with open(outpath, 'w') as f:
-                        f.write(dxf_content)
-                    print(f"Wrote simple DXF: {outpath}")
-                except Exception as e:
-                    print(f"Failed to write DXF for {tank_name} {option['name']}: {e}")
+    dxf_content += f"{tank_name} - {option['name']}\n0\nTEXT\n8\n0\n10\n0\n20\n-15\n40\n5\n1\n"
+    dxf_content += f"Length: {L:.2f}m, Width: {W:.2f}m, Depth: {D:.2f}m\n0\nTEXT\n8\n0\n10\n0\n20\n-25\n40\n5\n1\n"
+    dxf_content += f"Volume: {volume:.2f} m³\n0\nTEXT\n8\n0\n10\n0\n20\n-35\n40\n5\n1\n"
+    dxf_content += f"Created: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n0\nENDSEC\n0\nEOF\n"
+    tmp = partial_path(outpath)
+    try:
+        with open(tmp, 'w') as f:
+            f.write(dxf_content)
+        os.replace(tmp, outpath)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    print(f"Wrote simple DXF: {outpath}")
+
+
+def option_filename(tank_name, option):
+    return f"{tank_name}_{option['name'].replace(' ', '_')}.dxf"
+
+
+def headless_export(output_dir, input_data=None, quantity_params=None,
+                    results_path=None, append_results=False, formats=(),
+                    store_path=None, project_name="headless", resume=False, incremental=False):
+    """Generate DXF files for provided tank inputs without launching the GUI.
+
+    input_data should be a dict mapping tank names to {"depth": float, "volume": float},
+    or a project tank list as returned by tank_project.load_project.
+    If not provided, sensible defaults will be used.
+
+    quantity_params are passed to tank_quantities.derived_quantities. One
+    row per tank option, with its quantities and drawing path, is streamed
+    to results_path (default: results.jsonl in output_dir). formats lists
+    drawing formats (svg, pdf, png) written alongside each DXF. With
+    store_path the tanks, options and written drawings are also recorded
+    in a project store under project_name.
+
+    Completed tank options are journaled in output_dir; with resume=True
+    options already written by an interrupted run with the same inputs
+    are skipped and their rows replayed from the journal. Tanks and options
+    that fail are listed in export_failures.json in output_dir and returned.
+
+    incremental=True re-exports some tanks of an earlier run into the same
+    output_dir: the journal is appended to (nothing is skipped) and the
+    failure report keeps the entries of the other tanks.
+    """
+    outdir = Path(output_dir)
+    outdir.mkdir(parents=True, exist_ok=True)
+
+    # default sample inputs
+    data = input_data or tank_inputs(DEFAULT_TANKS)
+    tanks = data if isinstance(data, list) else [dict(params, name=name) for name, params in data.items()]
+    if isinstance(data, list):
+        data = tank_inputs(data)
+
+    sized = {}
+    volumes = {}
+    failures = []
+
+    # Validate all tanks before any export work
+    names = list(data)
+    params = [p if isinstance(p, dict) else {} for p in data.values()]
+    report = TANK_SCHEMA.validate({"name": names,
+                                   "depth": [p.get("depth") for p in params],
+                                   "volume": [p.get("volume") for p in params]})
+    invalid = report.by_row()
+    if invalid:
+        print(f"Skipping {len(invalid)} of {len(names)} tanks with invalid inputs:\n{report.format()}")
+    for row, messages in invalid.items():
+        failures.append({"tank_name": names[row], "option": None, "error": "; ".join(messages)})
+
+    depths = report.columns["depth"].tolist()
+    volumes_in = report.columns["volume"].tolist()
+    for row, tank_name in enumerate(names):
+        if row in invalid:
+            continue
+        depth, volume = depths[row], volumes_in[row]
+        # produce same three options as GUI
+        sized[tank_name] = design_options(volume, depth)
+        volumes[tank_name] = volume
+
+    quantities = option_quantities(sized, **(quantity_params or {}))
+    run_id = datetime.now().isoformat(timespec="seconds")
+    results_path = Path(results_path) if results_path else outdir / "results.jsonl"
+
+    artifacts = []
+    resumed = 0
+    with ExportJournal(outdir / JOURNAL_NAME, resume=resume or incremental) as journal, \
+            ResultsWriter(results_path, append=append_results) as results:
+        for tank_name, options in sized.items():
+            for option, q in zip(options, quantities[tank_name]):
+                fname = option_filename(tank_name, option)
+                outpath = outdir / fname
+                key = unit_key(tank_name, option['name'], option['length'], option['width'], option['depth'],
+                               volumes[tank_name], quantity_params, list(formats), fname)
+                row = None if incremental else journal.completed.get(key)
+                if row is not None and outpath.exists():
+                    resumed += 1
+                else:
+                    try:
+                        export_option_dxf(outpath, tank_name, option, volumes[tank_name], formats)
+                    except Exception as e:
+                        print(f"Failed to export {tank_name} {option['name']}: {e}")
+                        failures.append({"tank_name": tank_name, "option": option['name'],
+                                         "error": f"{type(e).__name__}: {e}"})
+                        continue
+                    row = result_row(run_id, tank_name, option, volumes[tank_name], q, outpath)
+                    journal.record(key, row)
+                results.write_row(row)
+                artifacts.append((tank_name, option['name'], outpath))
+                artifacts.extend((tank_name, option['name'], outpath.with_suffix(f".{fmt.lower()}"))
+                                 for fmt in formats)
+    if resumed:
+        print(f"Resumed: {resumed} options already exported")
+    print(f"Wrote results: {results_path} ({results.rows_written} rows)")
+
+    report_path = write_failure_report(outdir, run_id, failures, names if incremental else None)
+    if failures:
+        print(f"{len(failures)} failed, see {report_path}:")
+        for failure in failures:
+            label = " ".join(filter(None, (failure['tank_name'], failure['option'])))
+            print(f"  {label}: {failure['error']}")
+
+    if store_path:
+        store_project(store_path, project_name, tanks, quantity_params, artifacts)
+
+    info = sizing_cache_info()
+    print(f"Sizing cache: {info.hits} hits, {info.misses} misses")
+    return failures
+
+
+def write_failure_report(outdir, run_id, failures, replaced_tanks=None):
+    """Write export_failures.json, or remove it when nothing failed.
+
+    With replaced_tanks only the entries of those tanks in the existing
+    report are replaced by failures; the others are kept.
+    """
+    report_path = Path(outdir) / FAILURE_REPORT_NAME
+    if replaced_tanks is not None and report_path.exists():
+        try:
+            with open(report_path) as fh:
+                previous = json.load(fh)["failures"]
+        except (OSError, ValueError, KeyError):
+            previous = []
+        replaced_tanks = set(replaced_tanks)
+        failures = [f for f in previous if f["tank_name"] not in replaced_tanks] + failures
+    if failures:
+        tmp = partial_path(report_path)
+        with open(tmp, 'w') as fh:
+            json.dump({"run_id": run_id, "failures": failures}, fh, indent=2)
+        os.replace(tmp, report_path)
+    else:
+        report_path.unlink(missing_ok=True)
+    return report_path
+
+
+def store_project(store_path, project_name, tanks, quantity_params, artifacts):
+    """Record the tanks, their options and the written drawings in a project store"""
+    with ProjectStore(store_path) as store:
+        store.save_project(project_name, tanks, quantity_params)
+        store.add_artifacts(project_name, artifacts)
+    print(f"Stored project '{project_name}' in {store_path}")
+
+
+def _existing_artifacts(outdir, specs, formats):
+    """(tank name, option name, path) of the drawings in outdir for every tank"""
+    artifacts = []
+    for tank_name, params in specs.items():
+        try:
+            options = design_options(float(params["volume"]), float(params["depth"]))
+        except (KeyError, TypeError, ValueError):
+            continue
+        for option in options:
+            path = outdir / option_filename(tank_name, option)
+            for output in [path] + [path.with_suffix(f".{fmt.lower()}") for fmt in formats]:
+                if output.exists():
+                    artifacts.append((tank_name, option['name'], output))
+    return artifacts
+
+
+def watch_export(output_dir, source, quantity_params=None, results_path=None,
+                 append_results=False, formats=(), store_path=None, project_name="headless", resume=False):
+    """Export every tank of source, then re-export tanks as their inputs change.
+
+    source is polled until interrupted. On each save only tanks whose depth
+    or volume changed are exported again (their rows appended to the results
+    file and the journal, their failures merged into the report); drawings
+    of removed tanks are deleted. With store_path the whole project is
+    stored again after each change.
+    """
+    outdir = Path(output_dir)
+    results_path = Path(results_path) if results_path else outdir / "results.jsonl"
+    baseline = {source: file_signature(source)}
+    tanks = open_any_project(source)
+    specs = tank_inputs(tanks)
+    headless_export(outdir, tanks, quantity_params, results_path, append_results, formats,
+                    store_path, project_name, resume)
+
+    def on_change(paths):
+        nonlocal specs
+        started = time.perf_counter()
+        try:
+            tanks = open_any_project(source)
+            new_specs = tank_inputs(tanks)
+        except (OSError, ValueError, sqlite3.Error) as e:
+            # Usually a save still in progress; the next write triggers again
+            print(f"Cannot read {source}: {e}")
+            return
+        changed, removed = diff_specs(specs, new_specs)
+        for tank_name in removed:
+            _remove_tank_outputs(outdir, tank_name, specs[tank_name], formats)
+        if removed:
+            write_failure_report(outdir, datetime.now().isoformat(timespec="seconds"), [], removed)
+        if changed:
+            headless_export(outdir, {name: new_specs[name] for name in changed}, quantity_params,
+                            results_path, True, formats, incremental=True)
+        if store_path and (changed or removed):
+            store_project(store_path, project_name, tanks, quantity_params,
+                          _existing_artifacts(outdir, new_specs, formats))
+        specs = new_specs
+        print(f"{len(changed)} changed, {len(removed)} removed "
+              f"({(time.perf_counter() - started) * 1000:.0f} ms)")
+
+    watch_files([source], on_change, baseline=baseline)
+
+
+def _remove_tank_outputs(outdir, tank_name, params, formats):
+    try:
+        options = design_options(float(params["volume"]), float(params["depth"]))
+    except (KeyError, TypeError, ValueError):
+        return  # invalid inputs never produced drawings
+    for option in options:
+        path = outdir / option_filename(tank_name, option)
+        for output in [path] + [path.with_suffix(f".{fmt.lower()}") for fmt in formats]:
+            output.unlink(missing_ok=True)
+    print(f"Removed drawings of {tank_name}")
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Water Tank Designer (GUI or headless DXF export)")
     parser.add_argument("--export-dxf", dest="export_dxf", help="Directory to write DXF files (headless mode)")
     parser.add_argument("--input-json", dest="input_json", help="Optional JSON file with tank inputs")
+    parser.add_argument("--project", help="Project file with the tank catalogue (GUI and headless mode)")
+    parser.add_argument("--fill-fraction", type=float, default=DEFAULT_FILL_FRACTION,
+                        help="Operating water level as a fraction of depth")
+    parser.add_argument("--wall-thickness", type=float, default=DEFAULT_WALL_THICKNESS,
+                        help="Concrete wall/floor thickness in meters")
+    parser.add_argument("--inflow-rate", type=float, default=DEFAULT_INFLOW_RATE, help="Inlet flow rate in m³/h")
+    parser.add_argument("--outflow-rate", type=float, default=DEFAULT_OUTFLOW_RATE, help="Outlet flow rate in m³/h")
+    parser.add_argument("--results", help="Results file (.jsonl, .csv or .parquet; default: results.jsonl in the export directory)")
+    parser.add_argument("--append-results", action="store_true", help="Append to an existing results file")
+    parser.add_argument("--formats", default="",
+                        help="Comma-separated extra drawing formats written with each DXF (svg, pdf, png)")
+    parser.add_argument("--store", help="Project store (.db) to record tanks, options and drawings in")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip tank options already exported by an interrupted run into the same directory")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep running and re-export tanks whose inputs change in the --project/--input-json file")
     args = parser.parse_args()
 
     if args.export_dxf:
         inputs = None
-        if args.input_json:
+        source = args.project or args.input_json
+        if source:
             try:
-                with open(args.input_json, 'r') as fh:
-                    inputs = json.load(fh)
+                inputs = open_any_project(source)
             except Exception as e:
-                print(f"Failed to load input JSON {args.input_json}: {e}")
+                print(f"Failed to load input JSON {source}: {e}")
                 raise
-        headless_export(args.export_dxf, inputs)
+        quantity_params = {
+            "fill_fraction": args.fill_fraction,
+            "wall_thickness": args.wall_thickness,
+            "inflow_rate": args.inflow_rate,
+            "outflow_rate": args.outflow_rate,
+        }
+        formats = [fmt.strip() for fmt in args.formats.split(",") if fmt.strip()]
+        if args.watch:
+            if not source:
+                parser.error("--watch needs --project or --input-json")
+            watch_export(args.export_dxf, source, quantity_params, args.results, args.append_results, formats,
+                         args.store, Path(source).stem, args.resume)
+        else:
+            failures = headless_export(args.export_dxf, inputs, quantity_params, args.results, args.append_results,
+                                       formats, args.store, Path(source).stem if source else "headless", args.resume)
+            if failures:
+                raise SystemExit(1)
     else:
-        main()
+        main(args.project)